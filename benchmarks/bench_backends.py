@@ -0,0 +1,160 @@
+"""提取后端对比：同一批PDF分别用各后端提取，报告速度和与参考后端的逐行差异，按文档类别汇总
+
+每个文件、每个后端在单独的子进程中完整提取（与bench_suite相同的流程），报告页数/秒和
+相对参考后端的速度；数据行逐页与参考后端比对，列出只在参考后端或只在该后端出现的行。
+文档类别按版面指纹（pdf_strategy.layout_fingerprint：生成软件、页面尺寸、表格线、字体）归类，
+汇总时为每一类推荐与参考后端结果完全一致的最快后端。有差异时以非0状态退出。
+未指定PDF时用register_samples离线生成各版式的样本。
+
+用法: python benchmarks/bench_backends.py [PDF文件或文件夹 ...] [--backends pdfplumber,pdfminer]
+                                          [--reference pdfplumber] [--pages 30] [--show 5]
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_backend import BACKENDS, DEFAULT_BACKEND, open_pdf  # noqa: E402
+from pdf_strategy import layout_fingerprint  # noqa: E402
+from register_samples import PROFILES, make_register  # noqa: E402
+
+
+def run_backend(pdf_path, backend, start_page=2):
+    """在子进程中用指定后端提取一个文件，返回计时和{页码: 数据行}"""
+    import queue
+
+    from pdf_engine import PDFTableExtractor
+
+    extractor = PDFTableExtractor(log_queue=queue.Queue())
+    extractor.backend = backend
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    page_rows = {}
+    pages = 0
+    for current_page, page_data in extractor.iter_pdf_pages(pdf_path, start_page):
+        pages += 1
+        page_rows[current_page] = [row for row in page_data if any(cell for cell in row[:11])]
+    return {
+        "pages": pages,
+        "wall_seconds": time.perf_counter() - started,
+        "cpu_seconds": time.process_time() - cpu_started,
+        "page_rows": page_rows,
+    }
+
+
+def compare_rows(reference, candidate):
+    """逐页比较数据行，返回(不一致的页码, 只在参考中的行, 只在候选中的行)；行的顺序不同也算页不一致"""
+    differing_pages = []
+    missing = []
+    extra = []
+    for page in sorted(set(reference) | set(candidate)):
+        expected, actual = reference.get(page, []), candidate.get(page, [])
+        if expected == actual:
+            continue
+        differing_pages.append(page)
+        expected_count = Counter(map(tuple, expected))
+        actual_count = Counter(map(tuple, actual))
+        missing.extend((page, list(row)) for row in (expected_count - actual_count).elements())
+        extra.extend((page, list(row)) for row in (actual_count - expected_count).elements())
+    return differing_pages, missing, extra
+
+
+def document_family(pdf_path, start_page=2):
+    """文档类别：起始页的版面指纹"""
+    with open_pdf(pdf_path, DEFAULT_BACKEND) as pdf:
+        return layout_fingerprint(pdf, start_page)
+
+
+def collect_pdf_files(paths):
+    pdf_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            pdf_files.extend(sorted(glob.glob(os.path.join(path, "*.pdf"))))
+        else:
+            pdf_files.append(path)
+    return pdf_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="PDF文件或文件夹（默认生成合成样本）")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="参与对比的后端，逗号分隔")
+    parser.add_argument("--reference", default=DEFAULT_BACKEND, help=f"参考后端（默认: {DEFAULT_BACKEND}）")
+    parser.add_argument("--start-page", type=int, default=2)
+    parser.add_argument("--pages", type=int, default=30, help="生成样本的页数")
+    parser.add_argument("--show", type=int, default=5, help="每个文件最多列出的差异行数")
+    args = parser.parse_args()
+
+    backends = [backend for backend in args.backends.split(",") if backend]
+    unknown = set(backends + [args.reference]) - set(BACKENDS)
+    if unknown:
+        parser.error(f"未知后端: {', '.join(sorted(unknown))}")
+    if args.reference not in backends:
+        backends.insert(0, args.reference)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_files = collect_pdf_files(args.paths)
+        if not args.paths:
+            for profile in PROFILES:
+                pdf_files.append(os.path.join(tmp_dir, f"{profile}_{args.pages}.pdf"))
+                make_register(pdf_files[-1], profile, args.pages)
+
+        # {类别: {后端: [页数, 秒数, 差异行数]}}
+        families = {}
+        failed = False
+        print(f"{'文件':<24}{'后端':<12}{'页数':>6}{'页/秒':>9}{'加速':>8}{'差异页':>8}{'缺行':>6}{'多行':>6}")
+        for pdf_file in pdf_files:
+            name = os.path.basename(pdf_file)
+            try:
+                family = document_family(pdf_file, args.start_page)
+            except Exception as e:
+                print(f"{name:<24}无法打开: {str(e)}")
+                failed = True
+                continue
+            results = {}
+            for backend in backends:
+                # 每次提取一个新的子进程，后端之间不共享已导入的模块和缓存
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    results[backend] = executor.submit(run_backend, pdf_file, backend, args.start_page).result()
+
+            reference = results[args.reference]
+            for backend in backends:
+                result = results[backend]
+                differing_pages, missing, extra = compare_rows(reference["page_rows"], result["page_rows"])
+                stats = families.setdefault(family, {}).setdefault(backend, [0, 0.0, 0])
+                stats[0] += result["pages"]
+                stats[1] += result["wall_seconds"]
+                stats[2] += len(missing) + len(extra) + len(differing_pages)
+
+                pages_per_second = result["pages"] / max(result["wall_seconds"], 1e-9)
+                speedup = reference["wall_seconds"] / max(result["wall_seconds"], 1e-9)
+                print(f"{name:<24}{backend:<12}{result['pages']:>6}{pages_per_second:>9.1f}{speedup:>7.2f}x"
+                      f"{len(differing_pages):>8}{len(missing):>6}{len(extra):>6}", flush=True)
+                if differing_pages:
+                    failed = True
+                    for label, rows in (("-", missing), ("+", extra)):
+                        for page, row in rows[:args.show]:
+                            print(f"    {label} 第 {page} 页: {row}")
+                    if not missing and not extra:
+                        print(f"    第 {', '.join(map(str, differing_pages[:10]))} 页行的顺序不同")
+
+    print("\n按文档类别（版面指纹）汇总:")
+    for family, stats in families.items():
+        summary = ", ".join(f"{backend} {pages / max(seconds, 1e-9):.1f} 页/秒"
+                            + (f"（{differences} 处差异）" if differences else "")
+                            for backend, (pages, seconds, differences) in stats.items())
+        # 与参考后端结果完全一致的后端中取最快的
+        candidates = [backend for backend, (_, _, differences) in stats.items() if not differences]
+        best = min(candidates, key=lambda backend: stats[backend][1] / max(stats[backend][0], 1))
+        print(f"  {family}: {summary} → 推荐 {best}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
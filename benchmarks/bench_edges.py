@@ -0,0 +1,134 @@
+"""表格线预合并性能对比：线条策略在线段密集的页面上查找表格的耗时
+
+before为pdfplumber直接处理原始的边（page.curves + page.edges作为显式线），
+after为pdf_edges先批量合并再查找；运行前先核对两者提取出的表格单元格完全一致。
+未指定PDF时用reportlab生成一份线段密集的样本（每条表格线由大量短线段、重复描边组成）。
+
+用法: python benchmarks/bench_edges.py [PDF文件 ...] [--pages 6] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_layout import PageLayout  # noqa: E402
+
+
+def lines_settings(layout):
+    """与extract_tables_with_lines_strategy相同的设置"""
+    return {
+        "vertical_strategy": "lines",
+        "horizontal_strategy": "lines",
+        "explicit_vertical_lines": layout.explicit_edges,
+        "explicit_horizontal_lines": layout.explicit_edges,
+        "join_tolerance": 15,
+    }
+
+
+def make_dense_pdf(path, pages, seed=0):
+    """生成线段密集的表格页：表格线按约4pt切成短段并带轻微抖动，另有零长度点和短斜线噪声"""
+    from reportlab.pdfgen import canvas
+
+    rng = random.Random(seed)
+    c = canvas.Canvas(path, pagesize=(842, 595))
+    xs = [20 + i * 72 for i in range(12)]
+
+    def segmented_line(x0, y0, x1, y1, step=4):
+        count = max(1, int(max(abs(x1 - x0), abs(y1 - y0)) / step))
+        for i in range(count):
+            start, end = i / count, min(1, (i + 1 + rng.random() * 0.3) / count)
+            jitter = rng.uniform(-0.4, 0.4)
+            if x0 == x1:
+                c.line(x0 + jitter, y0 + (y1 - y0) * start, x0 + jitter, y0 + (y1 - y0) * end)
+            else:
+                c.line(x0 + (x1 - x0) * start, y0 + jitter, x0 + (x1 - x0) * end, y0 + jitter)
+
+    for _ in range(pages):
+        c.setFont('Helvetica', 7)
+        y = 560
+        for row in range(23):
+            for col, x in enumerate(xs[:-1]):
+                c.drawString(x + 2, y - 12, f"{row}-{col} {rng.randint(1, 9999)}")
+            segmented_line(xs[0], y, xs[-1], y)
+            y -= 18
+        segmented_line(xs[0], y, xs[-1], y)
+        for x in xs:
+            segmented_line(x, 560, x, y)
+        for _ in range(300):
+            px, py = rng.uniform(20, 800), rng.uniform(y, 560)
+            c.line(px, py, px, py)
+            c.line(px, py, px + rng.uniform(-2, 2), py + rng.uniform(-2, 2))
+        c.showPage()
+    c.save()
+
+
+def extract_before(layout, settings):
+    from pdfplumber.table import TableFinder, TableSettings
+
+    tset = TableSettings.resolve(settings)
+    finder = TableFinder(layout, tset)
+    return finder.cells, [layout.extract_table(table, **(tset.text_settings or {})) for table in finder.tables]
+
+
+def extract_after(layout, settings):
+    from pdfplumber.table import TableFinder
+
+    from pdf_edges import premerged_table_settings
+
+    tset = premerged_table_settings(layout, settings)
+    finder = TableFinder(layout, tset)
+    return finder.cells, [layout.extract_table(table, **(tset.text_settings or {})) for table in finder.tables]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdf_files", nargs="*")
+    parser.add_argument("--pages", type=int, default=6, help="生成样本的页数")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    import pdfplumber
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_files = args.pdf_files
+        if not pdf_files:
+            pdf_files = [os.path.join(tmp_dir, "dense.pdf")]
+            make_dense_pdf(pdf_files[0], args.pages)
+
+        before_time = after_time = 0.0
+        page_count = edge_count = 0
+        for pdf_file in pdf_files:
+            with pdfplumber.open(pdf_file) as pdf:
+                for page in pdf.pages:
+                    layout = PageLayout(page)
+                    settings = lines_settings(layout)
+                    if extract_before(layout, settings) != extract_after(layout, settings):
+                        print(f"单元格不一致: {os.path.basename(pdf_file)} 第 {page.page_number} 页")
+                        return 1
+                    page_count += 1
+                    edge_count += len(layout.edges) + len(layout.explicit_edges)
+
+                    # 两种做法轮流计时，取最好成绩
+                    best = [None, None]
+                    for _ in range(args.repeat):
+                        for idx, func in enumerate((extract_before, extract_after)):
+                            started = time.perf_counter()
+                            func(layout, settings)
+                            elapsed = time.perf_counter() - started
+                            best[idx] = elapsed if best[idx] is None else min(best[idx], elapsed)
+                    before_time += best[0]
+                    after_time += best[1]
+                    page.close()
+
+    print(f"样本: {page_count} 页，平均每页 {edge_count / max(page_count, 1):,.0f} 条边，提取的单元格一致")
+    print(f"before: {before_time / page_count * 1000:.1f} ms/页")
+    print(f"after:  {after_time / page_count * 1000:.1f} ms/页 ({before_time / after_time:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
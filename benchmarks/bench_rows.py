@@ -0,0 +1,216 @@
+"""表格行分类性能对比：表格检测、线条检测策略从已提取的表格中筛选数据行的耗时
+
+before为原逐行判断的实现（原样保留在本文件中作对照），after为pdf_rows整表一次分类的实现；
+运行前先核对两者在全部样本上保留的行和各项丢弃计数完全一致。
+样本包括有表头（表头在前三行中的不同位置）、无表头、表头在第四行之后、空行、None单元格、
+跨单元格的屋號标识（"House" + "number"）和多行单元格等情况。
+
+用法: python benchmarks/bench_rows.py [--tables 2000] [--repeat 9]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_engine import PDFTableExtractor, DATE_PATTERN  # noqa: E402
+from pdf_layout import PageLayout  # noqa: E402
+from pdf_metrics import BatchMetrics  # noqa: E402
+from register_samples import HEADER_ROWS, random_amount, random_date  # noqa: E402
+
+LEGACY_COLUMN_PATTERN = re.compile(r'^\([A-H]\)$')
+
+
+def legacy_is_valid_date(text):
+    if text is None:
+        return False
+    return DATE_PATTERN.search(str(text)) is not None
+
+
+def legacy_is_header_row(row):
+    if not row:
+        return False
+    valid_columns = 0
+    for cell in row:
+        if cell is not None and LEGACY_COLUMN_PATTERN.match(str(cell).strip()):
+            valid_columns += 1
+    return valid_columns >= 3
+
+
+def legacy_contains_house_number(row):
+    if not row:
+        return False
+    house_patterns = [r'屋號', r'House number', r'屋名', r'Name of the house']
+    row_text = ' '.join([str(cell) if cell is not None else '' for cell in row])
+    return any(pattern in row_text for pattern in house_patterns)
+
+
+def legacy_has_valid_header_structure(table):
+    if not table or len(table) < 3:
+        return False
+    for i in range(min(3, len(table))):
+        if legacy_is_header_row(table[i]):
+            return True
+    return False
+
+
+def legacy_select_rows(extractor, tables, method, headerless):
+    """原表格检测（headerless为True）/线条检测策略的行筛选，分列与新实现相同"""
+    data_rows = []
+    for table in tables:
+        if not table:
+            continue
+        if legacy_has_valid_header_structure(table):
+            data_start_index = 0
+            for row_idx, row in enumerate(table):
+                if legacy_is_header_row(row):
+                    data_start_index = min(row_idx + 3, len(table))
+                    break
+            if data_start_index == 0:
+                data_start_index = 3
+            for row in table[data_start_index:]:
+                if any(cell is not None for cell in row):
+                    if legacy_contains_house_number(row):
+                        extractor.count_metric("rows_dropped_house_number")
+                        continue
+                    cleaned_row = [str(cell) if cell is not None else '' for cell in row]
+                    processed_row = extractor.improved_column_separation(cleaned_row)
+                    processed_row.append(f"{method}(有表头)")
+                    data_rows.append(processed_row)
+        elif not headerless:
+            extractor.count_metric("tables_skipped_no_header")
+        else:
+            has_date_row = False
+            for row in table:
+                if any(cell is not None for cell in row) and len(row) > 0:
+                    if legacy_is_valid_date(row[0]):
+                        has_date_row = True
+                        break
+            if not has_date_row:
+                extractor.count_metric("tables_skipped_no_header")
+                continue
+            for row in table:
+                if any(cell is not None for cell in row) and len(row) > 0:
+                    if legacy_contains_house_number(row):
+                        extractor.count_metric("rows_dropped_house_number")
+                        continue
+                    if legacy_is_valid_date(row[0]):
+                        cleaned_row = [str(cell) if cell is not None else '' for cell in row]
+                        processed_row = extractor.improved_column_separation(cleaned_row)
+                        processed_row.append(f"{method}(无表头)")
+                        data_rows.append(processed_row)
+                    else:
+                        extractor.count_metric("rows_dropped_validation")
+    return data_rows
+
+
+class TablesLayout(PageLayout):
+    """直接给出已提取表格的页面，只计量行筛选"""
+    def __init__(self, tables):
+        self.tables = tables
+        self._explicit_edges = []
+
+    def extract_tables(self, table_settings=None):
+        return self.tables
+
+
+def make_tables(count, seed=0):
+    """模拟表格查找的结果：每张表若干行11列，单元格可能为None或含换行"""
+    rng = random.Random(seed)
+    tables = []
+    for _ in range(count):
+        rows = []
+        kind = rng.random()
+        if kind < 0.6:
+            # 有表头：表头前可能有0–2行标题
+            rows.extend([[f"标题 {i}"] + [None] * 10 for i in range(rng.randint(0, 2))])
+            rows.extend([list(row) for row in HEADER_ROWS])
+        elif kind < 0.7:
+            # 表头在第四行之后，不算有表头
+            rows.extend([["附注"] + [None] * 10 for _ in range(3)])
+            rows.extend([list(row) for row in HEADER_ROWS])
+        for _ in range(rng.randint(0, 25)):
+            choice = rng.random()
+            if choice < 0.08:
+                rows.append([None] * 11)
+            elif choice < 0.14:
+                rows.append(rng.choice([["屋號 House number", None, "3"] + [""] * 8,
+                                        ["House", "number", None] + [""] * 8,
+                                        ["Name of the", "house", "屋名"] + [""] * 8]))
+            else:
+                row = [random_date(rng), rng.choice([random_date(rng), None, ""]), "",
+                       f"Tower {rng.randint(1, 9)}", str(rng.randint(1, 60)), rng.choice("ABCDEFGH"),
+                       rng.choice(["", "P12"]), random_amount(rng), "", rng.choice(["(a)\n90天", "(b) 180天"]),
+                       rng.choice(["是", "否"])]
+                if rng.random() < 0.15:
+                    row[0] = rng.choice([None, "", "备注", "(A)"])
+                rows.append(row)
+        tables.append(rows)
+    return tables
+
+
+def bench(funcs, pages, repeat):
+    """各实现轮流计时，减少机器负载波动的影响；返回每个实现的最佳耗时"""
+    best = [None] * len(funcs)
+    for _ in range(repeat):
+        for idx, func in enumerate(funcs):
+            started = time.perf_counter()
+            for page_tables in pages:
+                func(page_tables)
+            elapsed = time.perf_counter() - started
+            best[idx] = elapsed if best[idx] is None else min(best[idx], elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=9)
+    args = parser.parse_args()
+
+    # 每页约10张表
+    tables = make_tables(args.tables)
+    pages = [tables[i:i + 10] for i in range(0, len(tables), 10)]
+    extractor = PDFTableExtractor()
+
+    def before(page_tables):
+        return (legacy_select_rows(extractor, page_tables, "表格检测策略", True)
+                + legacy_select_rows(extractor, page_tables, "线条检测策略", False))
+
+    def after(page_tables):
+        layout = TablesLayout(page_tables)
+        return (extractor.extract_tables_with_table_detection(layout, 0)
+                + extractor.extract_tables_with_lines_strategy(layout, 0))
+
+    results = []
+    for func in (before, after):
+        extractor.metrics = BatchMetrics()
+        rows = [func(page_tables) for page_tables in pages]
+        results.append((rows, extractor.metrics.report()["counters"]))
+    extractor.metrics = None
+    if results[0][0] != results[1][0]:
+        print("保留的数据行不一致")
+        return 1
+    if results[0][1] != results[1][1]:
+        print(f"丢弃计数不一致: {results[0][1]} / {results[1][1]}")
+        return 1
+
+    row_count = sum(len(table) for table in tables)
+    kept = sum(len(rows) for rows in results[1][0])
+    print(f"样本: {len(tables)} 张表 {row_count} 行，保留 {kept} 行，保留的行和丢弃计数一致")
+    before_time, after_time = bench((before, after), pages, args.repeat)
+    print(f"before: {row_count / before_time:,.0f} 行/秒")
+    print(f"after:  {row_count / after_time:,.0f} 行/秒 ({before_time / after_time:.2f}x)")
+    # 分列对两者相同，去掉后只比较行分类本身
+    extractor.improved_column_separation = list
+    before_time, after_time = bench((before, after), pages, args.repeat)
+    print(f"仅行分类（不分列）: before {row_count / before_time:,.0f} 行/秒，"
+          f"after {row_count / after_time:,.0f} 行/秒 ({before_time / after_time:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""策略自适应对比：固定级联顺序、仅文档内自适应、文档内自适应加版面记录三种方式的速度和提取结果
+
+每种版式先用同模板的另一份纪录册（不同随机种子）学习版面记录，再在被测纪录册上分别以三种方式提取；
+每次提取在单独的子进程中进行。报告页数/秒、相对固定顺序的速度、各策略的调用耗时，
+并逐页与固定顺序的结果比对，有差异时列出页码并以非0状态退出。
+gapped / rules 版式上表格检测（及线条检测）每页都没有结果，越过它们的节省最明显；
+ruled / unruled / mixed 版式上结果应与固定顺序完全相同。
+
+用法: python benchmarks/bench_strategy.py [--pages 100] [--profiles gapped,rules,ruled,unruled,mixed]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from register_samples import PROFILES, STRATEGY_PROFILES, make_register  # noqa: E402
+
+# (名称, 是否自适应, 是否使用版面记录)
+MODES = (("fixed", False, False), ("adaptive", True, False), ("profile", True, True))
+
+
+def run_mode(pdf_path, adaptive_strategy, profile_dir=None):
+    """在子进程中提取一份纪录册，返回计时、各策略耗时和{页码: 数据行}"""
+    import queue
+
+    from pdf_engine import PDFTableExtractor
+    from pdf_metrics import BatchMetrics
+    from pdf_strategy import StrategyProfiles
+
+    extractor = PDFTableExtractor(log_queue=queue.Queue())
+    extractor.adaptive_strategy = adaptive_strategy
+    extractor.strategy_profiles = StrategyProfiles(profile_dir) if profile_dir else None
+    extractor.metrics = BatchMetrics()
+
+    started = time.perf_counter()
+    page_rows = {}
+    pages = 0
+    for current_page, page_data in extractor.iter_pdf_pages(pdf_path, 2):
+        pages += 1
+        page_rows[current_page] = page_data
+    wall = time.perf_counter() - started
+    stages = {item["name"]: item["wall_seconds"] for item in extractor.metrics.report()["timings"]
+              if item["stage"] == "strategy"}
+    return {"pages": pages, "wall_seconds": wall, "stages": stages, "page_rows": page_rows}
+
+
+def run_in_subprocess(*args):
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(run_mode, *args).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=100, help="纪录册页数")
+    parser.add_argument("--profiles", default=",".join(STRATEGY_PROFILES + PROFILES), help="版式，逗号分隔")
+    args = parser.parse_args()
+
+    profiles = [profile for profile in args.profiles.split(",") if profile]
+    unknown = set(profiles) - set(STRATEGY_PROFILES + PROFILES)
+    if unknown:
+        parser.error(f"未知版式: {', '.join(sorted(unknown))}")
+
+    failed = False
+    print(f"{'样本':<16}{'方式':<10}{'页/秒':>8}{'加速':>8}{'差异页':>8}  各策略耗时(秒)")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for profile in profiles:
+            name = f"{profile}_{args.pages}"
+            pdf_path = os.path.join(tmp_dir, f"{name}.pdf")
+            make_register(pdf_path, profile, args.pages)
+            # 同模板的另一份纪录册，用来生成版面记录
+            profile_dir = os.path.join(tmp_dir, f"profiles_{profile}")
+            sibling_path = os.path.join(tmp_dir, f"{name}_sibling.pdf")
+            make_register(sibling_path, profile, args.pages, seed=1)
+            run_in_subprocess(sibling_path, True, profile_dir)
+
+            results = {}
+            for mode, adaptive_strategy, use_profile in MODES:
+                results[mode] = run_in_subprocess(pdf_path, adaptive_strategy, profile_dir if use_profile else None)
+
+            fixed = results["fixed"]
+            for mode, result in results.items():
+                differing = sorted(page for page in set(fixed["page_rows"]) | set(result["page_rows"])
+                                   if fixed["page_rows"].get(page) != result["page_rows"].get(page))
+                pages_per_second = result["pages"] / max(result["wall_seconds"], 1e-9)
+                speedup = fixed["wall_seconds"] / max(result["wall_seconds"], 1e-9)
+                stages = ", ".join(f"{stage} {seconds:.2f}" for stage, seconds in sorted(result["stages"].items()))
+                line = f"{name:<16}{mode:<10}{pages_per_second:>8.1f}{speedup:>7.2f}x{len(differing):>8}  {stages}"
+                if differing:
+                    failed = True
+                    line += f"  [第 {', '.join(map(str, differing[:10]))} 页" + (" 等" if len(differing) > 10 else "") + "]"
+                print(line, flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
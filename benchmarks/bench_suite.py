@@ -0,0 +1,171 @@
+"""基准与回归套件：在合成的成交纪录册上测量提取速度、内存和各策略耗时，并与黄金结果核对
+
+每个样本在单独的子进程中提取（与批量转换的工作进程相同，逐页产出后清理），报告：
+页数/秒、子进程峰值常驻内存、预筛与各策略的耗时；输出行按页计算摘要，与
+benchmarks/golden/ 中的黄金结果逐页比对，不一致时列出出现差异的页码并以非0状态退出。
+
+提取规则有意变化时，用 --update-golden 重新生成黄金结果，并在提交中说明原因。
+用 --no-prefilter / --fixed-strategy-order 可以在同一批样本上对比这些优化开关。
+
+用法: python benchmarks/bench_suite.py [--sizes 10,100] [--profiles ruled,unruled,mixed]
+                                       [--save results.json] [--baseline results.json] [--update-golden]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from register_samples import PROFILES, make_register  # noqa: E402
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+DEFAULT_SIZES = "10,100"
+
+
+def page_digests(page_rows):
+    """{页码: 该页数据行的SHA-1}，行按输出顺序序列化"""
+    digests = {}
+    for page_number, rows in page_rows.items():
+        payload = json.dumps(rows, ensure_ascii=False, separators=(',', ':'))
+        digests[str(page_number)] = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    return digests
+
+
+def peak_rss_mb():
+    """本进程的峰值常驻内存(MB)，无法获取时返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_sample(pdf_path, page_prefilter=True, adaptive_strategy=True):
+    """在子进程中提取一份样本，返回计时、计数和每页的行摘要"""
+    import queue
+
+    from pdf_engine import PDFTableExtractor
+    from pdf_metrics import BatchMetrics
+
+    extractor = PDFTableExtractor(log_queue=queue.Queue())
+    extractor.page_prefilter = page_prefilter
+    extractor.adaptive_strategy = adaptive_strategy
+    extractor.metrics = BatchMetrics()
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    page_rows = {}
+    for page_number, row in extractor.iter_clean_rows(pdf_path, extractor.iter_pdf_pages(pdf_path, 2),
+                                                      with_page=True):
+        page_rows.setdefault(page_number, []).append(row)
+    wall, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+
+    report = extractor.metrics.report()
+    counters = report["counters"]
+    return {
+        "pages": counters["pages"] + counters["pages_skipped_prefilter"],
+        "rows": sum(len(rows) for rows in page_rows.values()),
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {f"{item['stage']}:{item['name']}" if item['name'] else item['stage']: item["wall_seconds"]
+                   for item in report["timings"]},
+        "counters": counters,
+        "digests": page_digests(page_rows),
+    }
+
+
+def check_golden(name, result, update=False):
+    """与黄金结果比对，返回出现差异的页码列表；update为True时改写黄金结果"""
+    path = os.path.join(GOLDEN_DIR, f"{name}.json")
+    golden = {"rows": result["rows"], "pages": result["digests"]}
+    if update:
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            json.dump(golden, f, indent=1, sort_keys=True)
+            f.write("\n")
+        return []
+    try:
+        with open(path, encoding='utf-8') as f:
+            expected = json.load(f)
+    except OSError:
+        return None
+    pages = set(expected["pages"]) | set(golden["pages"])
+    return sorted((page for page in pages if expected["pages"].get(page) != golden["pages"].get(page)), key=int)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"样本页数，逗号分隔（默认: {DEFAULT_SIZES}，最大1000）")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="版式，逗号分隔")
+    parser.add_argument("--samples-dir", default=None, help="样本保存目录（默认生成到临时目录，运行后删除）")
+    parser.add_argument("--no-prefilter", action="store_true")
+    parser.add_argument("--fixed-strategy-order", action="store_true")
+    parser.add_argument("--update-golden", action="store_true", help="用本次结果改写黄金结果")
+    parser.add_argument("--save", default=None, help="将本次结果保存为JSON，供之后 --baseline 对比")
+    parser.add_argument("--baseline", default=None, help="之前 --save 的结果，对比页数/秒")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    profiles = [profile for profile in args.profiles.split(",") if profile]
+    unknown = set(profiles) - set(PROFILES)
+    if unknown:
+        parser.error(f"未知版式: {', '.join(sorted(unknown))}")
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        samples_dir = args.samples_dir or tmp_dir
+        os.makedirs(samples_dir, exist_ok=True)
+        results = {}
+        failed = False
+        print(f"{'样本':<14}{'页数':>6}{'行数':>7}{'页/秒':>9}{'峰值MB':>9}  各阶段耗时(秒)")
+        for pages in sizes:
+            for profile in profiles:
+                name = f"{profile}_{pages}"
+                pdf_path = os.path.join(samples_dir, f"{name}.pdf")
+                if not os.path.exists(pdf_path):
+                    make_register(pdf_path, profile, pages)
+                # 每个样本一个新的子进程，峰值内存互不影响
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    result = executor.submit(run_sample, pdf_path, not args.no_prefilter,
+                                             not args.fixed_strategy_order).result()
+                results[name] = {key: value for key, value in result.items() if key != "digests"}
+
+                pages_per_second = result["pages"] / result["wall_seconds"]
+                stages = ", ".join(f"{stage} {seconds:.2f}" for stage, seconds in sorted(result["stages"].items())
+                                   if stage not in ("page",))
+                peak = f"{result['peak_rss_mb']:.0f}" if result["peak_rss_mb"] is not None else "-"
+                line = f"{name:<14}{result['pages']:>6}{result['rows']:>7}{pages_per_second:>9.1f}{peak:>9}  {stages}"
+                if name in baseline:
+                    before = baseline[name]["pages"] / baseline[name]["wall_seconds"]
+                    line += f"  ({pages_per_second / before:.2f}x)"
+
+                differences = check_golden(name, result, args.update_golden)
+                if differences is None:
+                    line += "  [无黄金结果]"
+                elif differences:
+                    failed = True
+                    line += f"  [与黄金结果不一致: 第 {', '.join(differences[:10])} 页" + \
+                            (" 等" if len(differences) > 10 else "") + "]"
+                print(line, flush=True)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=1)
+    if args.update_golden:
+        print(f"已更新黄金结果: {GOLDEN_DIR}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
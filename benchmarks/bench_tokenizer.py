@@ -0,0 +1,145 @@
+"""分列性能对比：不足11列的行（文本策略等）经improved_column_separation分列的速度
+
+before为原逐项搜索实现（原样保留在本文件中作对照），after为pdf_tokenizer的一次扫描实现；
+运行前先核对两者在全部样本上的分列结果一致。
+
+用法: python benchmarks/bench_tokenizer.py [--rows 20000] [--repeat 9]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_engine import PDFTableExtractor  # noqa: E402
+
+
+def legacy_separate_columns_by_patterns(text):
+    """原实现：逐项re.findall/re.search，并在每次命中后用replace删去"""
+    result = []
+    remaining_text = text
+
+    date_matches = re.findall(r'\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{4}', remaining_text)
+    for date in date_matches[:3]:
+        result.append(date)
+        remaining_text = remaining_text.replace(date, '', 1)
+    while len(result) < 3:
+        result.append('')
+
+    building_match = re.search(r'Tower\s*\d+[A-Z]?', remaining_text, re.IGNORECASE)
+    if building_match:
+        result.append(building_match.group(0))
+        remaining_text = remaining_text.replace(building_match.group(0), '', 1)
+    else:
+        result.append('')
+
+    unit_match = re.search(r'(\d+)\s*([A-Z])', remaining_text)
+    if unit_match:
+        result.append(unit_match.group(1))
+        result.append(unit_match.group(2))
+        remaining_text = remaining_text.replace(unit_match.group(0), '', 1)
+    else:
+        result.extend(['', ''])
+
+    result.append('')
+
+    amount_match = re.search(r'(\$[\d,]+\.?\d*|USD\s*[\d,]+\.?\d*|HKD\s*[\d,]+\.?\d*)', remaining_text)
+    if amount_match:
+        result.append(amount_match.group(0))
+        remaining_text = remaining_text.replace(amount_match.group(0), '', 1)
+    else:
+        result.append('')
+
+    remaining_text = remaining_text.strip()
+    if remaining_text:
+        parts = re.split(r'\s{2,}', remaining_text)
+        if len(parts) >= 2:
+            result.append(parts[0])
+            result.append(' '.join(parts[1:]))
+        else:
+            result.append(remaining_text)
+            result.append('')
+    else:
+        result.extend(['', ''])
+
+    result.append('')
+    return result
+
+
+def random_date(rng):
+    day, month, year = rng.randint(1, 28), rng.randint(1, 12), rng.randint(2018, 2024)
+    return rng.choice([f"{day}/{month}/{year}", f"{day}.{month}.{year}", f"{day}-{month}-{year}",
+                       f"{year}年{month}月{day}日", f"{year}-{month}-{day}"])
+
+
+def random_amount(rng):
+    value = f"{rng.randint(100000, 9999999):,}"
+    return rng.choice([f"${value}", f"HK${value}", f"USD {value}", f"HKD {value}", f"{value}元"])
+
+
+def make_rows(count, seed=0):
+    """模拟文本策略切出的短行：日期、大厦、楼层单位、金额、支付条款等，部分列缺失"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        cells = [random_date(rng) for _ in range(rng.randint(1, 3))]
+        cells.append(f"Tower {rng.randint(1, 9)}{rng.choice(['', 'A', 'B'])}")
+        cells.append(f"{rng.randint(1, 60)} {rng.choice('ABCDEFGH')}")
+        cells.append(random_amount(rng))
+        cells.extend(rng.sample(['(a) 90天', '(b) 180天', '是', '否', '车位 P12'], rng.randint(0, 3)))
+        # 部分单元格被合并成一格（只用一个空格相连）
+        while len(cells) > 2 and rng.random() < 0.5:
+            idx = rng.randrange(len(cells) - 1)
+            cells[idx:idx + 2] = [cells[idx] + ' ' + cells[idx + 1]]
+        rows.append(cells)
+    return rows
+
+
+def bench(funcs, rows, repeat):
+    """各实现轮流计时，减少机器负载波动的影响；返回每个实现的最佳行/秒"""
+    best = [None] * len(funcs)
+    for _ in range(repeat):
+        for idx, func in enumerate(funcs):
+            started = time.perf_counter()
+            for row in rows:
+                func(row)
+            elapsed = time.perf_counter() - started
+            best[idx] = elapsed if best[idx] is None else min(best[idx], elapsed)
+    return [len(rows) / elapsed for elapsed in best]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=9)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    extractor = PDFTableExtractor()
+
+    def before(row):
+        # 与improved_column_separation相同的路径，只替换分列函数
+        cells = [str(cell) if cell is not None else '' for cell in row]
+        separated = legacy_separate_columns_by_patterns(' '.join(cells))
+        return separated[:11] if len(separated) >= 11 else separated
+
+    def after(row):
+        return extractor.improved_column_separation(list(row))
+
+    mismatches = sum(before(row) != after(row) for row in rows)
+    if mismatches:
+        print(f"分列结果不一致: {mismatches} 行")
+        return 1
+
+    before_rate, after_rate = bench([before, after], rows, args.repeat)
+    print(f"样本: {len(rows)} 行，分列结果一致")
+    print(f"before: {before_rate:,.0f} 行/秒")
+    print(f"after:  {after_rate:,.0f} 行/秒 ({after_rate / before_rate:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
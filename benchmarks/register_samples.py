@@ -0,0 +1,102 @@
+"""合成的一手住宅成交纪录册样本：离线生成，内容只由版式、页数和随机种子决定
+
+每页是(A)–(K)表头加三行说明的成交表，日期和金额混用多种写法，夹杂屋號行；
+版式分有表格线(ruled)、无表格线(unruled)和混合(mixed，有线/无线页交替，并插入附注页和连续空页)。
+另有两种只用于策略对比的版式：表格线在单元格中间断开(gapped，只有线条检测能连接成表格)，
+只有行间横线(rules，表格检测和线条检测都没有结果，由文本提取)。
+"""
+import random
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfgen import canvas
+
+PROFILES = ("ruled", "unruled", "mixed")
+STRATEGY_PROFILES = ("gapped", "rules")
+
+FONT_NAME = 'STSong-Light'
+
+HEADER_ROWS = [
+    ['(A)', '(B)', '(C)', '(D)', '(E)', '(F)', '(G)', '(H)', '(I)', '(J)', '(K)'],
+    ['臨時合約日期', '合約日期', '終止日期', '大廈名稱', '樓層', '單位', '車位', '成交金額', '修改', '支付條款', '相關人士'],
+    ['Date', 'Date', 'Date', 'Tower', 'Floor', 'Flat', 'Car', 'Price', 'Detail', 'Terms', 'Related'],
+]
+
+NOTES_ROW = ['Notes 附註', '', '', '', '', '', '', '', '', '', '']
+
+PAGE_SIZE = (842, 595)
+COLUMN_X = [20 + i * 72 for i in range(12)]
+ROW_HEIGHT = 18
+TOP = 560
+
+
+def random_date(rng):
+    day, month, year = rng.randint(1, 28), rng.randint(1, 12), rng.randint(2018, 2024)
+    return rng.choice([f"{day}/{month}/{year}", f"{year}-{month}-{day}", f"{year}年{month}月{day}日",
+                       f"{day}.{month}.{year}", f"{year}/{month}/{day}"])
+
+
+def random_amount(rng):
+    value = rng.randint(100, 99999) * 100
+    return rng.choice([f"${value:,}", f"HK${value:,}", f"HKD {value:,}", f"USD {value:,}", f"{value:,}元"])
+
+
+def data_row(rng):
+    if rng.random() < 0.05:
+        return ['屋號 House number', rng.choice(['1', '2', '3']), '', '', '', '', '', '', '', '', '']
+    return [random_date(rng), random_date(rng) if rng.random() < 0.8 else '',
+            random_date(rng) if rng.random() < 0.1 else '',
+            f"Tower {rng.randint(1, 9)}{rng.choice(['', 'A', 'B'])}", str(rng.randint(1, 60)),
+            rng.choice('ABCDEFGH'), '', random_amount(rng), '',
+            rng.choice(['(a) 90天', '(b) 180天']), rng.choice(['否', '是'])]
+
+
+def page_plan(profile, pages):
+    """每页的(是否有表格线, 是否为附注页)；附注页不会连续3页，不触发连续空页停止"""
+    plan = []
+    for index in range(pages):
+        ruled = profile in ("ruled",) + STRATEGY_PROFILES or (profile == "mixed" and index % 2 == 0)
+        # 每40页一页附注；混合版式每50页再插入连续两页，模拟章节之间的说明页
+        notes = index % 40 == 39 or (profile == "mixed" and index % 50 in (25, 26))
+        plan.append((ruled, notes))
+    return plan
+
+
+def draw_rule(c, y, profile):
+    """一条横线；gapped版式在每个单元格中间断开6pt"""
+    if profile != "gapped":
+        c.line(COLUMN_X[0], y, COLUMN_X[-1], y)
+        return
+    for left, right in zip(COLUMN_X, COLUMN_X[1:]):
+        middle = (left + right) / 2
+        c.line(left, y, middle - 3, y)
+        c.line(middle + 3, y, right, y)
+
+
+def make_register(path, profile, pages, seed=0):
+    """生成一份纪录册：封面一页，之后pages页成交表"""
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(UnicodeCIDFont(FONT_NAME))
+    rng = random.Random(f"{profile}-{pages}-{seed}")
+    c = canvas.Canvas(path, pagesize=PAGE_SIZE, invariant=1)
+    c.setFont(FONT_NAME, 14)
+    c.drawString(50, 500, '一手住宅物業成交紀錄冊 Register of Transactions')
+    c.showPage()
+
+    for ruled, notes in page_plan(profile, pages):
+        rows = [NOTES_ROW] * 5 if notes else HEADER_ROWS + [data_row(rng) for _ in range(rng.randint(5, 25))]
+        c.setFont(FONT_NAME, 7)
+        y = TOP
+        for row in rows:
+            for x, cell in zip(COLUMN_X, row):
+                c.drawString(x + 2, y - 12, cell)
+            if ruled:
+                draw_rule(c, y, profile)
+            y -= ROW_HEIGHT
+        if ruled:
+            draw_rule(c, y, profile)
+            if profile != "rules":
+                for x in COLUMN_X:
+                    c.line(x, TOP, x, y)
+        c.showPage()
+    c.save()
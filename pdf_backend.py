@@ -0,0 +1,286 @@
+"""提取后端：打开PDF文档并逐页提供字符、线条、文本和单词，供版面分析层和各提取策略共用
+
+- pdfplumber: 默认，参考实现
+- pdfminer: 直接用pdfminer解释页面内容流，字符在渲染时直接记成字典，不再先生成LTChar、
+  再由pdfplumber逐个属性转换（该转换约占单页耗时的四分之一）。坐标、文本和线条的取法与
+  pdfplumber一致，表格查找和文本排列仍用pdfplumber的算法（见pdf_layout）；
+  字符不带颜色和标记内容属性，页面不提供图片、注释
+两个后端的文档对象都提供 pages / metadata / path / stream / doc / rsrcmgr / close，
+页面对象都提供 chars / lines / rects / curves / edges / bbox / width / height /
+extract_text / extract_words / close。
+用 benchmarks/bench_backends.py 对比各后端在某类文档上的速度和提取结果。
+"""
+import os
+import pathlib
+
+BACKENDS = ("pdfplumber", "pdfminer")
+DEFAULT_BACKEND = "pdfplumber"
+
+
+def open_pdf(source, backend=DEFAULT_BACKEND):
+    """用指定后端打开PDF（路径或二进制流）"""
+    if backend == "pdfplumber":
+        import pdfplumber
+        return pdfplumber.open(source)
+    if backend == "pdfminer":
+        return MinerDocument(source)
+    raise ValueError(f"未知的提取后端: {backend}")
+
+
+class MinerDocument:
+    """pdfminer后端的文档：页面按需解析，接口与pdfplumber.PDF的常用部分相同"""
+    def __init__(self, source):
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfinterp import PDFResourceManager
+        from pdfminer.pdfparser import PDFParser
+        from pdfplumber.utils import resolve_and_decode
+
+        if isinstance(source, (str, os.PathLike)):
+            self.stream = open(source, 'rb')
+            self.stream_is_external = False
+            self.path = pathlib.Path(source)
+        else:
+            self.stream = source
+            self.stream_is_external = True
+            self.path = None
+        try:
+            self.doc = PDFDocument(PDFParser(self.stream))
+        except Exception:
+            self.close()
+            raise
+        self.rsrcmgr = PDFResourceManager()
+        self.metadata = {}
+        for info in self.doc.info:
+            self.metadata.update(info)
+        for key, value in self.metadata.items():
+            try:
+                self.metadata[key] = resolve_and_decode(value)
+            except Exception:
+                # 无法解析的元数据保留原值（与pdfplumber相同）
+                pass
+        self._pages = None
+
+    @property
+    def pages(self):
+        if self._pages is None:
+            from pdfminer.pdfpage import PDFPage
+
+            pages = []
+            doctop = 0
+            for page_number, page_obj in enumerate(PDFPage.create_pages(self.doc), 1):
+                page = MinerPage(self, page_obj, page_number, doctop)
+                pages.append(page)
+                doctop += page.height
+            self._pages = pages
+        return self._pages
+
+    def close(self):
+        for page in self._pages or ():
+            page.close()
+        if not self.stream_is_external:
+            self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class MinerPage:
+    """pdfminer后端的页面：首次访问字符或线条时解释一次内容流"""
+    def __init__(self, pdf, page_obj, page_number, initial_doctop=0):
+        from pdfplumber.utils import resolve_all
+
+        self.pdf = pdf
+        self.page_obj = page_obj
+        self.page_number = page_number
+        self.initial_doctop = initial_doctop
+        self.rotation = (resolve_all(page_obj.attrs.get("Rotate")) or 0) % 360
+        # 与pdfplumber相同：MediaBox规范化后上下翻转，原点在左上角
+        box = resolve_all(page_obj.attrs.get("MediaBox"))
+        x0, x1 = sorted((box[0], box[2]))
+        y0, y1 = sorted((box[1], box[3]))
+        if self.rotation in (90, 270):
+            x0, y0, x1, y1 = y0, x0, y1, x1
+        mb_height = y1 - y0
+        self.mediabox = (x0, mb_height - y1, x1, mb_height - y0)
+        self.bbox = self.mediabox
+        self._objects = None
+        self._edges = None
+
+    @property
+    def width(self):
+        return self.bbox[2] - self.bbox[0]
+
+    @property
+    def height(self):
+        return self.bbox[3] - self.bbox[1]
+
+    @property
+    def objects(self):
+        if self._objects is None:
+            self._objects = self.parse_objects()
+        return self._objects
+
+    @property
+    def chars(self):
+        return self.objects["char"]
+
+    @property
+    def lines(self):
+        return self.objects["line"]
+
+    @property
+    def rects(self):
+        return self.objects["rect"]
+
+    @property
+    def curves(self):
+        return self.objects["curve"]
+
+    @property
+    def edges(self):
+        """线条、矩形、曲线拆成的边，顺序与pdfplumber的page.edges相同"""
+        if self._edges is None:
+            from pdfplumber.utils import curve_to_edges, line_to_edge, rect_to_edges
+
+            edges = [line_to_edge(line) for line in self.lines]
+            for rect in self.rects:
+                edges.extend(rect_to_edges(rect))
+            for curve in self.curves:
+                edges.extend(curve_to_edges(curve))
+            self._edges = edges
+        return self._edges
+
+    def parse_objects(self):
+        from pdfminer.layout import LTContainer, LTCurve
+        from pdfminer.pdfinterp import PDFPageInterpreter
+
+        device = recorder_class()(self)
+        PDFPageInterpreter(self.pdf.rsrcmgr, device).process_page(self.page_obj)
+        objects = {"char": device.chars, "line": [], "rect": [], "curve": []}
+
+        # 线条按版面树的顺序取出（包括表单XObject中的），与pdfplumber相同
+        def walk(items):
+            for item in items:
+                if isinstance(item, LTCurve):
+                    kind = type(item).__name__[2:].lower()
+                    objects[kind].append(self.path_object(item, kind))
+                elif isinstance(item, LTContainer):
+                    walk(item)
+        walk(device.layout)
+        return objects
+
+    def char_object(self, text, fontname, size, adv, upright, matrix, x0, y0, x1, y1):
+        """字符字典，坐标换算与pdfplumber的process_object相同"""
+        mb_x0, mb_top = self.mediabox[0], self.mediabox[1]
+        top = (self.height - y1) + mb_top
+        if mb_x0 != 0:
+            x0, x1 = x0 + mb_x0, x1 + mb_x0
+        return {
+            "text": text, "fontname": fontname, "size": size, "adv": adv, "upright": upright,
+            "matrix": matrix, "x0": x0, "y0": y0, "x1": x1, "y1": y1, "width": x1 - x0, "height": y1 - y0,
+            "top": top, "bottom": (self.height - y0) + mb_top, "doctop": self.initial_doctop + top,
+            "object_type": "char", "page_number": self.page_number,
+        }
+
+    def path_object(self, item, kind):
+        from pdfplumber.utils import resolve_all
+
+        mb_x0, mb_top = self.mediabox[0], self.mediabox[1]
+
+        def point2coord(point):
+            return mb_x0 + point[0], mb_top + self.height - point[1]
+
+        top = (self.height - item.y1) + mb_top
+        x0, x1 = item.x0, item.x1
+        if mb_x0 != 0:
+            x0, x1 = x0 + mb_x0, x1 + mb_x0
+        return {
+            "x0": x0, "y0": item.y0, "x1": x1, "y1": item.y1, "width": item.width, "height": item.height,
+            "linewidth": item.linewidth, "stroke": item.stroke, "fill": item.fill, "evenodd": item.evenodd,
+            "stroking_color": resolve_all(item.stroking_color),
+            "non_stroking_color": resolve_all(item.non_stroking_color),
+            "pts": [point2coord(point) for point in item.pts],
+            "path": [(cmd, *map(point2coord, points)) for cmd, *points in item.original_path],
+            "dash": item.dashing_style, "object_type": kind, "page_number": self.page_number,
+            "top": top, "bottom": (self.height - item.y0) + mb_top, "doctop": self.initial_doctop + top,
+        }
+
+    def extract_text(self, **kwargs):
+        from pdfplumber.utils import chars_to_textmap
+
+        options = {"layout_bbox": self.bbox}
+        if "layout_width_chars" not in kwargs:
+            options["layout_width"] = self.width
+        if "layout_height_chars" not in kwargs:
+            options["layout_height"] = self.height
+        options.update(kwargs)
+        return chars_to_textmap(self.chars, **options).as_string
+
+    def extract_words(self, **kwargs):
+        from pdfplumber.utils import extract_words
+
+        return extract_words(self.chars, **kwargs)
+
+    def close(self):
+        self._objects = None
+        self._edges = None
+
+
+_recorder_class = None
+
+
+def recorder_class():
+    """记录页面字符和线条的pdfminer设备类；依赖pdfminer的设备基类，首次使用时才定义"""
+    global _recorder_class
+    if _recorder_class is not None:
+        return _recorder_class
+    from pdfminer.converter import PDFLayoutAnalyzer
+    from pdfminer.pdffont import PDFUnicodeNotDefined
+    from pdfminer.utils import apply_matrix_rect
+    from pdfplumber.page import fix_fontname_bytes
+
+    class Recorder(PDFLayoutAnalyzer):
+        """字符直接记成字典，线条仍由pdfminer按路径形状归为线、矩形或曲线"""
+        def __init__(self, page):
+            PDFLayoutAnalyzer.__init__(self, page.pdf.rsrcmgr, pageno=page.page_number)
+            self.page = page
+            self.chars = []
+            self.layout = None
+
+        def receive_layout(self, ltpage):
+            self.layout = ltpage
+
+        def render_char(self, matrix, font, fontsize, scaling, rise, cid, ncs, graphicstate):
+            # 与pdfminer的LTChar相同的字宽和外框计算
+            try:
+                text = font.to_unichr(cid)
+            except PDFUnicodeNotDefined:
+                text = self.handle_undefined_char(font, cid)
+            adv = font.char_width(cid) * fontsize * scaling
+            vertical = font.is_vertical()
+            if vertical:
+                vx, vy = font.char_disp(cid)
+                vx = fontsize * 0.5 if vx is None else vx * fontsize * 0.001
+                vy = (1000 - vy) * fontsize * 0.001
+                bbox = (-vx, vy + rise + adv, -vx + fontsize, vy + rise)
+            else:
+                descent = font.get_descent() * fontsize
+                bbox = (0, descent + rise, adv, descent + rise + fontsize)
+            a, b, c, d, _e, _f = matrix
+            x0, y0, x1, y1 = apply_matrix_rect(matrix, bbox)
+            if x1 < x0:
+                x0, x1 = x1, x0
+            if y1 < y0:
+                y0, y1 = y1, y0
+            fontname = font.fontname
+            if isinstance(fontname, bytes):
+                fontname = fix_fontname_bytes(fontname)
+            self.chars.append(self.page.char_object(text, fontname, x1 - x0 if vertical else y1 - y0, adv,
+                                                    a * d * scaling > 0 and b * c <= 0, matrix, x0, y0, x1, y1))
+            return adv
+
+    _recorder_class = Recorder
+    return Recorder
@@ -0,0 +1,175 @@
+"""提取结果缓存：按PDF内容哈希和提取参数存储已提取的页面结果，未变化的文件无需重新解析"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+# 默认缓存目录与容量上限
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pdf_tool")
+DEFAULT_CACHE_SIZE_MB = 512
+
+CACHE_SUFFIX = ".jsonl.gz"
+
+# 缓存条目格式版本：每行一个页面 [页码, 数据行]
+CACHE_FORMAT = 2
+
+# 超出容量时淘汰到上限的这一比例，之后的写入不必每次都扫描目录
+EVICT_TARGET = 0.9
+
+
+def make_cache_key(file_hash, settings):
+    """结果键 = 文件内容哈希 + 提取参数（起始页、策略配置、引擎版本），结果缓存与断点续传共用"""
+    payload = json.dumps({"file": file_hash, "settings": settings, "format": CACHE_FORMAT},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """磁盘结果缓存，超出容量时按最近使用时间(LRU)淘汰
+
+    总大小在首次写入时扫描目录得到，之后按写入的条目累加；累计超出上限时才重新扫描并淘汰，
+    其他进程同时写入同一目录时以那次扫描的结果为准
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size_mb=DEFAULT_CACHE_SIZE_MB):
+        self.cache_dir = os.path.join(cache_dir, "results")
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.lock = threading.Lock()
+        # 已知的缓存总大小，尚未扫描时为None
+        self.total_size = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, file_hash, settings):
+        """缓存键 = 文件内容哈希 + 提取参数（起始页、策略配置、引擎版本）"""
+        return make_cache_key(file_hash, settings)
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+    def get(self, key):
+        """返回逐页产出(页码, 数据行)的迭代器，未命中返回None"""
+        path = self.entry_path(key)
+        try:
+            f = gzip.open(path, 'rt', encoding='utf-8')
+        except OSError:
+            return None
+
+        # 更新修改时间，作为LRU的最近使用时间
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return self.iter_pages(f)
+
+    def iter_pages(self, f):
+        with f:
+            for line in f:
+                current_page, page_data = json.loads(line)
+                yield current_page, page_data
+
+    def writer(self, key):
+        """返回逐页写入的缓存写入器"""
+        return CacheWriter(self, key)
+
+    def put(self, key, page_results):
+        """一次性写入[(页码, 数据行)]"""
+        cache_writer = self.writer(key)
+        for current_page, page_data in page_results:
+            cache_writer.write_page(current_page, page_data)
+        cache_writer.commit()
+
+    def list_entries(self):
+        """返回[(最近使用时间, 大小, 路径)]"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(CACHE_SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def added(self, size):
+        """记录新写入条目增加的大小，累计超出上限时才扫描目录淘汰"""
+        with self.lock:
+            if self.total_size is None:
+                # 首次扫描已包含刚写入的条目
+                self.total_size = sum(entry_size for _, entry_size, _ in self.list_entries())
+            else:
+                self.total_size += size
+            if self.total_size > self.max_bytes:
+                self.evict_entries()
+
+    def evict(self):
+        """超出上限时淘汰最久未使用的条目，直到总大小不超过上限的EVICT_TARGET"""
+        with self.lock:
+            self.evict_entries()
+
+    def evict_entries(self):
+        entries = self.list_entries()
+        total_size = sum(size for _, size, _ in entries)
+        if total_size > self.max_bytes:
+            for _, size, path in sorted(entries):
+                if total_size <= self.max_bytes * EVICT_TARGET:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total_size -= size
+        self.total_size = total_size
+
+    def clear(self):
+        """清空缓存，返回删除的条目数"""
+        removed = 0
+        with self.lock:
+            for _, _, path in self.list_entries():
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+            self.total_size = None
+        return removed
+
+
+class CacheWriter:
+    """逐页写入临时文件，commit时原子替换为正式条目，避免读到半个文件"""
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.path = cache.entry_path(key)
+        self.tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self.file = gzip.open(self.tmp_path, 'wt', encoding='utf-8')
+
+    def write_page(self, current_page, page_data):
+        self.file.write(json.dumps([current_page, page_data], ensure_ascii=False))
+        self.file.write('\n')
+
+    def commit(self):
+        self.file.close()
+        size = os.path.getsize(self.tmp_path)
+        # 覆盖同一键的旧条目时只增加两者之差
+        try:
+            size -= os.path.getsize(self.path)
+        except OSError:
+            pass
+        os.replace(self.tmp_path, self.path)
+        self.cache.added(size)
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
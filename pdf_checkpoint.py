@@ -0,0 +1,170 @@
+"""断点续传：逐页记录已提取的结果，中断（停止、工作进程崩溃）后从最后完成的页继续
+
+每个文件一个追加写的JSONL检查点，键与结果缓存相同（文件内容哈希 + 提取参数），
+每页一行 [页码, 数据行]，写完即刷新到系统；进程崩溃时最后半行在读取时丢弃。
+文件完整处理完后检查点删除，结果转入结果缓存。
+已完成的输出文件另记一条完成记录（输出路径、结果键、规范化选项、输出文件的大小和修改时间），
+重新运行中断的批次时，输出文件未被改动的直接跳过。
+"""
+import json
+import os
+import threading
+import time
+
+from pdf_cache import DEFAULT_CACHE_DIR
+
+CHECKPOINT_SUFFIX = ".jsonl"
+COMPLETED_FILE = "completed.jsonl"
+
+# 超过该天数未续传的检查点视为废弃，启动时清理
+MAX_CHECKPOINT_AGE_DAYS = 7
+
+
+class CheckpointStore:
+    """检查点与完成记录，保存在缓存目录的checkpoints子目录"""
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.checkpoint_dir = os.path.join(cache_dir, "checkpoints")
+        self.completed_path = os.path.join(self.checkpoint_dir, COMPLETED_FILE)
+        self.lock = threading.Lock()
+        # 正在写入的检查点；同一批中内容相同的文件只由一个写入
+        self.active = set()
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        self.completed = self.load_completed()
+        self.remove_stale()
+
+    def checkpoint_path(self, key):
+        return os.path.join(self.checkpoint_dir, key + CHECKPOINT_SUFFIX)
+
+    def load(self, key):
+        """返回检查点中已完成的[(页码, 数据行)]，没有检查点时为空列表"""
+        pages = []
+        try:
+            with open(self.checkpoint_path(key), encoding='utf-8') as f:
+                for line in f:
+                    # 崩溃时写了一半的行（没有换行符或无法解析），之后的内容都不可信
+                    if not line.endswith('\n'):
+                        break
+                    try:
+                        current_page, page_data = json.loads(line)
+                    except ValueError:
+                        break
+                    pages.append((current_page, page_data))
+        except OSError:
+            return []
+        return pages
+
+    def writer(self, key, pages=()):
+        """返回追加写入的检查点写入器，该检查点正在被写入时返回None；
+        pages为已载入的有效页，用于截掉写了一半的行"""
+        with self.lock:
+            if key in self.active:
+                return None
+            self.active.add(key)
+        try:
+            return CheckpointWriter(self, key, pages)
+        except OSError:
+            self.release(key)
+            return None
+
+    def release(self, key):
+        with self.lock:
+            self.active.discard(key)
+
+    def remove(self, key):
+        try:
+            os.remove(self.checkpoint_path(key))
+        except OSError:
+            pass
+
+    def remove_stale(self):
+        cutoff = time.time() - MAX_CHECKPOINT_AGE_DAYS * 86400
+        for entry in os.scandir(self.checkpoint_dir):
+            if not entry.name.endswith(CHECKPOINT_SUFFIX) or entry.name == COMPLETED_FILE:
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def load_completed(self):
+        """{输出路径: 完成记录}，同一输出以最后一条为准"""
+        completed = {}
+        try:
+            with open(self.completed_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        completed[record["output"]] = record
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except OSError:
+            pass
+        return completed
+
+    def completion_record(self, output_file, key, normalize):
+        """输出文件当前状态对应的完成记录，输出文件不存在时返回None"""
+        try:
+            stat = os.stat(output_file)
+        except OSError:
+            return None
+        return {"output": os.path.abspath(output_file), "key": key, "normalize": bool(normalize),
+                "size": stat.st_size, "mtime": stat.st_mtime}
+
+    def is_completed(self, output_file, key, normalize):
+        """输出文件已由相同的输入和参数生成，且之后没有被改动"""
+        record = self.completion_record(output_file, key, normalize)
+        return record is not None and self.completed.get(record["output"]) == record
+
+    def mark_completed(self, output_file, key, normalize):
+        record = self.completion_record(output_file, key, normalize)
+        if record is None:
+            return
+        with self.lock:
+            self.completed[record["output"]] = record
+            try:
+                with open(self.completed_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            except OSError:
+                # 记录失败只影响下次运行是否跳过该文件
+                pass
+
+    def clear(self):
+        """删除全部检查点和完成记录，返回删除的文件数"""
+        removed = 0
+        with self.lock:
+            for entry in os.scandir(self.checkpoint_dir):
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except OSError:
+                    pass
+            self.completed = {}
+        return removed
+
+
+class CheckpointWriter:
+    """逐页追加到检查点文件，每页写完即刷新"""
+    def __init__(self, store, key, pages=()):
+        self.store = store
+        self.key = key
+        self.file = open(store.checkpoint_path(key), 'ab')
+        # 截掉载入时丢弃的半行，续写的内容接在最后一个完整的页之后
+        self.file.truncate(sum(len(self.encode(current_page, page_data)) for current_page, page_data in pages))
+
+    @staticmethod
+    def encode(current_page, page_data):
+        return (json.dumps([current_page, page_data], ensure_ascii=False) + '\n').encode('utf-8')
+
+    def write_page(self, current_page, page_data):
+        self.file.write(self.encode(current_page, page_data))
+        self.file.flush()
+
+    def close(self, completed=False):
+        """关闭检查点；completed为True时文件已完整处理，删除检查点"""
+        if self.file.closed:
+            return
+        self.file.close()
+        if completed:
+            self.store.remove(self.key)
+        self.store.release(self.key)
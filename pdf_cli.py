@@ -0,0 +1,170 @@
+"""命令行入口：无界面批量转换PDF，适合在服务器或流水线中运行
+
+示例: python pdf_cli.py ./pdfs -o ./output --start-page 2 -j 8 --format csv
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+
+from pdf_engine import PDFTableExtractor, DEFAULT_WORKERS, OUTPUT_FORMATS
+from pdf_cache import ResultCache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE_MB
+from pdf_dataset import DATASET_FORMATS, PARTITION_KEYS
+from pdf_strategy import StrategyProfiles
+from pdf_checkpoint import CheckpointStore
+from pdf_pipeline import DEFAULT_PREFETCH_MB
+from pdf_watch import FolderWatcher, DEFAULT_POLL_SECONDS
+from pdf_queue import JobQueue, QueueWorker, DEFAULT_LEASE_SECONDS
+from pdf_backend import BACKENDS, DEFAULT_BACKEND
+
+
+class ConsoleLog:
+    """将日志直接输出到终端，替代界面的日志队列"""
+    def put(self, message):
+        # 一次写入整行，避免多线程输出交错
+        sys.stdout.write(f"{time.strftime('%H:%M:%S')} - {message}\n")
+        sys.stdout.flush()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="PDF转Excel批量转换工具（命令行版）")
+    parser.add_argument("input_dir", help="PDF文件夹")
+    parser.add_argument("-o", "--output-dir", required=True, help="输出文件夹")
+    parser.add_argument("--start-page", type=int, default=2, help="起始页码（默认: 2）")
+    parser.add_argument("-j", "--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"并发数（默认: CPU核心数 {DEFAULT_WORKERS}）")
+    parser.add_argument("--mode", choices=["process", "thread"], default="process",
+                        help="执行模式：多进程或多线程（默认: process）")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default=OUTPUT_FORMATS[0],
+                        help="输出格式（默认: xlsx）")
+    parser.add_argument("--dataset", choices=DATASET_FORMATS, default=None,
+                        help="将所有文件的数据行（附来源文件和页码）合并输出为一个数据集，不再逐个生成文件")
+    parser.add_argument("--partition-by", choices=list(PARTITION_KEYS), default=None,
+                        help="合并数据集按来源文件(source)或合约日期年份(date)分区")
+    parser.add_argument("--normalize", action="store_true",
+                        help="追加规范化列：(A)(B)(C)解析为日期，(H)成交金额解析为数值和货币代码")
+    parser.add_argument("--no-prefilter", action="store_true",
+                        help="不做页面预筛，每一页都完整查找表格（用于核对预筛没有漏掉数据）")
+    parser.add_argument("--fixed-strategy-order", action="store_true",
+                        help="每页都按 表格检测→线条检测→文本提取 的固定顺序尝试，不按版面记录调整")
+    parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help=f"提取后端：解析PDF页面字符和线条的实现（默认: {DEFAULT_BACKEND}）")
+    parser.add_argument("--no-largest-first", action="store_true",
+                        help="按文件夹列出的顺序处理，不按估计页数先处理大文件")
+    parser.add_argument("--memory-limit", type=float, default=None,
+                        help="每个工作进程的内存上限，单位MB；超出时释放缓存，仍超出则该文件失败（默认不限制）")
+    parser.add_argument("--prefetch-mb", type=float, default=DEFAULT_PREFETCH_MB,
+                        help=f"提前读入后续PDF的内存上限，单位MB，0表示不预读（默认: {DEFAULT_PREFETCH_MB}）")
+    parser.add_argument("--metrics-dir", default=None,
+                        help="统计每页、每个策略及输出写出的耗时，结束后在该目录写出JSON报告和Prometheus文件")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"结果缓存目录（默认: {DEFAULT_CACHE_DIR}）")
+    parser.add_argument("--cache-size", type=float, default=DEFAULT_CACHE_SIZE_MB,
+                        help=f"结果缓存容量上限，单位MB（默认: {DEFAULT_CACHE_SIZE_MB}）")
+    parser.add_argument("--no-cache", action="store_true", help="不使用结果缓存，全部重新解析")
+    parser.add_argument("--clear-cache", action="store_true", help="转换前清空结果缓存和断点续传记录")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="不逐页记录检查点：中断后从头提取，已完成的文件也重新转换")
+    parser.add_argument("--watch", action="store_true",
+                        help="持续监视PDF文件夹，新增或修改的PDF写完后自动转换（Ctrl+C结束）")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_SECONDS,
+                        help=f"监视时没有文件系统通知（未安装watchdog）的扫描间隔，单位秒（默认: {DEFAULT_POLL_SECONDS:g}）")
+    parser.add_argument("--queue", default=None,
+                        help="分布式模式：共享卷上的SQLite队列文件，多台主机上的工作进程从中领取文件")
+    parser.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS,
+                        help=f"分布式模式下文件租约的时长，持有者失联超过该时间后由其他进程接手（默认: {DEFAULT_LEASE_SECONDS:g}）")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.partition_by and not args.dataset:
+        parser.error("--partition-by 需要与 --dataset 一起使用")
+    if args.watch and args.dataset:
+        parser.error("--watch 不能与 --dataset 一起使用：每次只转换有变化的文件，合并数据集会被覆盖")
+    if args.queue and (args.dataset or args.watch):
+        parser.error("--queue 不能与 --dataset 或 --watch 一起使用")
+
+    log = ConsoleLog()
+    converter = PDFTableExtractor(log_queue=log)
+    converter.memory_limit_mb = args.memory_limit
+    converter.normalize = args.normalize
+    converter.prefetch_mb = max(0, args.prefetch_mb)
+    converter.largest_first = not args.no_largest_first
+    converter.metrics_dir = args.metrics_dir
+    converter.page_prefilter = not args.no_prefilter
+    converter.adaptive_strategy = not args.fixed_strategy_order
+    converter.backend = args.backend
+    if converter.adaptive_strategy:
+        converter.strategy_profiles = StrategyProfiles(args.cache_dir)
+    if args.clear_cache or not args.no_cache:
+        cache = ResultCache(args.cache_dir, args.cache_size)
+        if args.clear_cache:
+            log.put(f"已清空结果缓存: {cache.clear()} 个条目")
+        if not args.no_cache:
+            converter.result_cache = cache
+    if args.clear_cache or not args.no_resume:
+        checkpoints = CheckpointStore(args.cache_dir)
+        if args.clear_cache:
+            log.put(f"已清空断点续传记录: {checkpoints.clear()} 个文件")
+        if not args.no_resume:
+            converter.checkpoints = checkpoints
+    
+    if args.queue:
+        return run_queue_worker(converter, args)
+    
+    if args.watch:
+        watcher = FolderWatcher(converter, args.input_dir, args.output_dir,
+                                poll_seconds=max(0.1, args.poll_interval), output_format=args.format,
+                                start_page=args.start_page, max_workers=max(1, args.workers),
+                                use_processes=args.mode == "process")
+        try:
+            return 0 if watcher.run() else 2
+        except KeyboardInterrupt:
+            converter.is_running = False
+            print("已停止监视", file=sys.stderr)
+            return 130
+    
+    try:
+        completed = converter.batch_convert(args.input_dir, args.output_dir,
+                                            start_page=args.start_page,
+                                            max_workers=max(1, args.workers),
+                                            use_processes=args.mode == "process",
+                                            output_format=args.format,
+                                            dataset_format=args.dataset,
+                                            partition_by=args.partition_by)
+    except KeyboardInterrupt:
+        converter.is_running = False
+        print("转换已停止", file=sys.stderr)
+        return 130
+
+    if not completed:
+        return 2
+
+    print(f"转换完成! 成功: {converter.success_count}, 失败: {converter.failed_count}")
+    return 1 if converter.failed_count else 0
+
+
+def run_queue_worker(converter, args):
+    """分布式模式：加入共享队列，领取文件处理到队列为空"""
+    workers = max(1, args.workers)
+    process_pool = None
+    if args.mode == "process" and workers > 1:
+        process_pool, worker_log_queue, log_forwarder = converter.start_process_pool(workers)
+    worker = QueueWorker(converter, JobQueue(args.queue, max(1.0, args.lease_seconds)), args.input_dir,
+                         args.output_dir, start_page=args.start_page, max_workers=workers,
+                         process_pool=process_pool, output_format=args.format)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        print("转换已停止，未完成的文件已交还队列", file=sys.stderr)
+        return 130
+    finally:
+        if process_pool is not None:
+            converter.shutdown_process_pool(process_pool, worker_log_queue, log_forwarder)
+    return 1 if worker.failed_count else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
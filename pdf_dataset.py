@@ -0,0 +1,297 @@
+"""合并数据集输出：整个批次的数据行写入同一个列式数据集(Parquet / Arrow IPC / CSV)
+
+各文件的数据行先缓冲到临时文件，文件处理成功后才交给唯一的写入线程追加到数据集，
+因此失败或中途停止的文件不会留下半份数据；数据集文件先写.part，结束时原子替换。
+分区数据集整个写在.part暂存目录中，结束时整体换下原目录，不会与之前运行留下的分区混在一起；
+中途停止或写入出错时丢弃暂存目录，保留原有数据集。
+"""
+import csv
+import os
+import queue
+import re
+import shutil
+import threading
+from urllib.parse import quote
+
+from pdf_normalize import TYPED_COLUMN_NAMES, normalize_columns, normalize_rows
+from pdf_writers import RowSpool
+
+# 支持的数据集格式及扩展名
+DATASET_FORMATS = ("parquet", "arrow", "csv")
+DATASET_SUFFIXES = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
+
+# 分区方式：按来源文件或按合约日期的年份，目录采用hive风格(key=value)
+PARTITION_KEYS = {"source": "source", "date": "year"}
+
+# 合并数据集的文件名（分区时为目录名）
+DEFAULT_DATASET_NAME = '交易资料'
+
+# 追加的列
+SOURCE_COLUMN = '来源文件'
+PAGE_COLUMN = '页码'
+
+# 无法确定分区值时使用的目录名（与hive/pyarrow的默认空分区一致）
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# 用于按年份分区的日期列：(A)临时买卖合约日期、(B)买卖合约日期、(C)终止买卖合约日期
+DATE_COLUMNS = (0, 1, 2)
+YEAR_PATTERN = re.compile(r'(?<!\d)(\d{4})(?!\d)')
+
+
+class DatasetWriter:
+    """合并数据集写入器：工作线程提交整份文件的数据行，由单个写入线程顺序写出"""
+    def __init__(self, output_path, column_names, dataset_format="parquet", partition_by=None,
+                 normalize=False, batch_rows=10000, max_pending=16):
+        if dataset_format not in DATASET_FORMATS:
+            raise ValueError(f"不支持的数据集格式: {dataset_format}")
+        if partition_by is not None and partition_by not in PARTITION_KEYS:
+            raise ValueError(f"不支持的分区方式: {partition_by}")
+
+        self.dataset_format = dataset_format
+        self.partition_by = partition_by
+        self.normalize = normalize
+        # 列顺序：数据列、规范化列（启用时）、来源文件、页码
+        typed_names = TYPED_COLUMN_NAMES if normalize else []
+        self.column_names = list(column_names) + typed_names + [SOURCE_COLUMN, PAGE_COLUMN]
+        self.data_columns = len(column_names)
+        self.batch_rows = batch_rows
+        # 不分区时输出单个文件，分区时输出目录（先写入暂存目录，清除之前中断留下的暂存目录）
+        self.output_path = output_path if partition_by else output_path + DATASET_SUFFIXES[dataset_format]
+        self.staging_path = None
+        if partition_by:
+            self.staging_path = output_path + ".part"
+            shutil.rmtree(self.staging_path, ignore_errors=True)
+
+        self.schema = None
+        if dataset_format != "csv":
+            import pyarrow as pa
+
+            typed_fields = [(name, pa.date32()) for name in typed_names[:3]]
+            if normalize:
+                typed_fields += [(typed_names[3], pa.float64()), (typed_names[4], pa.string())]
+            self.schema = pa.schema([(name, pa.string()) for name in column_names] + typed_fields +
+                                    [(SOURCE_COLUMN, pa.string()), (PAGE_COLUMN, pa.int32())])
+
+        # 已写入的分区文件：{分区值: 文件写入器}
+        self.sinks = {}
+        self.finished_files = []
+        self.row_count = 0
+        self.source_count = 0
+        self.error = None
+        # 待写出的文件缓冲，队列有上限，写入跟不上时提交方等待
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def start(self):
+        """启动写入线程"""
+        self.thread.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def spool_rows(self, page_rows):
+        """将一个来源文件的(页码, 数据行)缓冲到临时文件，尚未提交"""
+        spool = RowSpool()
+        try:
+            for current_page, row in page_rows:
+                # 过滤全空行
+                if any(row):
+                    spool.append((current_page, row))
+        except BaseException:
+            spool.close()
+            raise
+        return spool
+
+    def submit(self, source, spool):
+        """把一个来源文件的完整缓冲交给写入线程，返回行数；队列已满时等待"""
+        row_count = spool.row_count
+        if not row_count:
+            spool.close()
+            return 0
+        while True:
+            if self.error is not None:
+                spool.close()
+                raise RuntimeError(f"合并数据集写入失败: {self.error}")
+            try:
+                self.pending.put((source, spool), timeout=0.5)
+                return row_count
+            except queue.Full:
+                continue
+
+    def run(self):
+        """写入线程：按提交顺序把各文件的缓冲写入数据集"""
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            source, spool = item
+            try:
+                if self.error is None:
+                    self.write_spool(source, spool)
+            except Exception as e:
+                self.error = str(e)
+            finally:
+                spool.close()
+
+    def write_spool(self, source, spool):
+        rows_by_partition = {}
+        for batch in spool.iter_batches():
+            for current_page, row in batch:
+                rows_by_partition.setdefault(self.partition_value(source, row), []).append((current_page, row))
+            for partition, rows in rows_by_partition.items():
+                if len(rows) >= self.batch_rows:
+                    self.write_batch(partition, source, rows)
+                    rows_by_partition[partition] = []
+        for partition, rows in rows_by_partition.items():
+            if rows:
+                self.write_batch(partition, source, rows)
+
+        self.row_count += spool.row_count
+        self.source_count += 1
+        # 按来源分区时该分区已写完，立即关闭，避免同时打开大量文件
+        if self.partition_by == "source":
+            self.close_sink(self.partition_value(source, None))
+
+    def partition_value(self, source, row):
+        if self.partition_by == "source":
+            return source
+        if self.partition_by == "date":
+            for idx in DATE_COLUMNS:
+                match = YEAR_PATTERN.search(str(row[idx] or ''))
+                if match:
+                    return match.group(1)
+            return None
+        return None
+
+    def partition_file(self, partition):
+        if not self.partition_by:
+            return self.output_path
+        key = PARTITION_KEYS[self.partition_by]
+        value = NULL_PARTITION if partition is None else quote(partition, safe='')
+        return os.path.join(self.staging_path, f"{key}={value}", "part-0" + DATASET_SUFFIXES[self.dataset_format])
+
+    def write_batch(self, partition, source, rows):
+        sink = self.sinks.get(partition)
+        if sink is None:
+            path = self.partition_file(partition)
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            sink = self.sinks[partition] = self.open_sink(path)
+
+        n = self.data_columns
+        if self.dataset_format == "csv":
+            data_rows = [list(row[:n]) for _, row in rows]
+            if self.normalize:
+                data_rows = normalize_rows(data_rows)
+            sink.writer.writerows([data_row + [source, current_page]
+                                   for data_row, (current_page, _) in zip(data_rows, rows)])
+            return
+
+        import pyarrow as pa
+
+        columns = [[row[idx] if idx < len(row) else None for _, row in rows] for idx in range(n)]
+        arrays = [pa.array(column, pa.string()) for column in columns]
+        if self.normalize:
+            # 整批按列解析，直接转换为Arrow的日期和数值列
+            dates_a, dates_b, dates_c, amount, currency = normalize_columns(columns)
+            arrays += [pa.Array.from_pandas(dates).cast(pa.date32()) for dates in (dates_a, dates_b, dates_c)]
+            arrays += [pa.Array.from_pandas(amount, type=pa.float64()),
+                       pa.Array.from_pandas(currency.astype(object), type=pa.string())]
+        arrays.append(pa.array([source] * len(rows), pa.string()))
+        arrays.append(pa.array([current_page for current_page, _ in rows], pa.int32()))
+        sink.writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+
+    def open_sink(self, path):
+        return DatasetSink(path, self.dataset_format, self.column_names, self.schema)
+
+    def close_sink(self, partition):
+        sink = self.sinks.pop(partition, None)
+        if sink is not None:
+            sink.close()
+            self.finished_files.append(sink)
+
+    def close(self, commit=True):
+        """等待写入线程写完，将数据集替换为正式文件；commit为False（中途停止）时丢弃，保留原有数据集，
+        写入出错时丢弃并抛出异常。没有写入任何数据时不改动原有数据集"""
+        if self.thread.is_alive():
+            self.pending.put(None)
+            self.thread.join()
+        for partition in list(self.sinks):
+            self.close_sink(partition)
+
+        if self.error is not None or not commit:
+            self.discard()
+            if self.error is not None:
+                raise RuntimeError(f"合并数据集写入失败: {self.error}")
+            return
+        for sink in self.finished_files:
+            sink.commit()
+        if self.staging_path is not None and self.finished_files:
+            replace_directory(self.staging_path, self.output_path)
+        self.finished_files = []
+
+    def discard(self):
+        for sink in self.finished_files:
+            sink.discard()
+        self.finished_files = []
+        if self.staging_path is not None:
+            shutil.rmtree(self.staging_path, ignore_errors=True)
+
+
+def replace_directory(src, dst):
+    """用src目录替换dst：原目录先改名让出位置，src改名到位后再删除原目录；改名失败时恢复原目录"""
+    old_path = None
+    if os.path.exists(dst):
+        old_path = f"{dst}.{os.getpid()}.old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.replace(dst, old_path)
+    try:
+        os.replace(src, dst)
+    except OSError:
+        if old_path is not None:
+            os.replace(old_path, dst)
+        raise
+    if old_path is not None:
+        shutil.rmtree(old_path, ignore_errors=True)
+
+
+class DatasetSink:
+    """单个数据集文件：写入.part临时文件，commit时替换为正式文件"""
+    def __init__(self, path, dataset_format, column_names, schema=None):
+        self.path = path
+        self.tmp_path = path + ".part"
+        self.dataset_format = dataset_format
+        if dataset_format == "csv":
+            self.file = open(self.tmp_path, 'w', newline='', encoding='utf-8-sig')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(column_names)
+        elif dataset_format == "arrow":
+            import pyarrow as pa
+
+            self.file = pa.OSFile(self.tmp_path, 'wb')
+            self.writer = pa.ipc.new_file(self.file, schema)
+        else:
+            import pyarrow.parquet as pq
+
+            self.file = None
+            self.writer = pq.ParquetWriter(self.tmp_path, schema)
+
+    def close(self):
+        # csv.writer没有close，由文件对象关闭
+        if self.dataset_format != "csv":
+            self.writer.close()
+        if self.file is not None:
+            self.file.close()
+
+    def commit(self):
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
@@ -0,0 +1,150 @@
+"""表格线预处理：lines策略的边先按方向拆分，批量吸附、连接共线线段，再交给表格查找
+
+pdfplumber的TableFinder会把页面的边与显式线拼在一起，逐条复制字典完成吸附(snap)和
+连接(join)；矢量化后的扫描页上往往有上万条短线段，这一步是表格查找中最慢的部分。
+这里用numpy按数组一次算完，结果与pdfplumber的merge_edges逐位一致（吸附取平均时
+重复的线段同样计入，浮点运算顺序相同），合并后的线作为显式线传入，并关闭二次吸附与连接。
+"""
+import dataclasses
+
+# 合并后的边的类型（名称含"_edge"，pdfplumber不再拆分）
+MERGED_EDGE_TYPE = "merged_edge"
+
+# 各方向的属性：(位置, 位置的另一端, 起点, 终点, 长度)
+EDGE_KEYS = {
+    "v": ("x0", "x1", "top", "bottom", "height"),
+    "h": ("top", "bottom", "x0", "x1", "width"),
+}
+
+
+def premerged_table_settings(page, table_settings=None):
+    """返回预先合并好表格线的TableSettings；不是lines策略或合并后不足两条线时原样返回"""
+    from pdfplumber.table import TableSettings
+
+    tset = TableSettings.resolve(table_settings)
+    if tset.vertical_strategy != "lines" or tset.horizontal_strategy != "lines":
+        return tset
+    vertical_lines = tset.explicit_vertical_lines or []
+    horizontal_lines = tset.explicit_horizontal_lines or []
+    if any(not isinstance(desc, dict) for lines in (vertical_lines, horizontal_lines) for desc in lines):
+        return tset
+
+    # 与TableFinder.get_edges相同：先是页面上的边，再是显式线中该方向的边
+    edges = {orientation: [] for orientation in EDGE_KEYS}
+    for edge in page.edges:
+        length = edge["height"] if edge["orientation"] == "v" else edge["width"]
+        if edge["orientation"] in edges and length >= tset.edge_min_length_prefilter:
+            edges[edge["orientation"]].append(edge)
+    explicit_v = split_explicit_lines(vertical_lines)
+    # 线条策略的竖线、横线通常是同一个列表，只拆分一次
+    explicit_h = explicit_v if horizontal_lines is vertical_lines else split_explicit_lines(horizontal_lines)
+    edges["v"].extend(explicit_v["v"])
+    edges["h"].extend(explicit_h["h"])
+
+    # 任一方向的吸附容差大于0时，两个方向都做吸附（与merge_edges一致）
+    snap = tset.snap_x_tolerance > 0 or tset.snap_y_tolerance > 0
+    merged_v = merge_collinear_edges(edges["v"], "v", tset.snap_x_tolerance if snap else None, tset.join_y_tolerance)
+    merged_h = merge_collinear_edges(edges["h"], "h", tset.snap_y_tolerance if snap else None, tset.join_x_tolerance)
+    # 显式策略要求每个方向至少两条线
+    if len(merged_v) < 2 or len(merged_h) < 2:
+        return tset
+
+    return dataclasses.replace(
+        tset, vertical_strategy="explicit", horizontal_strategy="explicit",
+        explicit_vertical_lines=merged_v, explicit_horizontal_lines=merged_h,
+        snap_x_tolerance=0, snap_y_tolerance=0, join_x_tolerance=0, join_y_tolerance=0)
+
+
+def split_explicit_lines(lines):
+    """显式线转换为边并按方向拆分，返回{"v": [...], "h": [...]}；已是边或线段的直接使用，不再复制"""
+    from pdfplumber.utils import obj_to_edges
+
+    edges = {orientation: [] for orientation in EDGE_KEYS}
+    for desc in lines:
+        object_type = desc["object_type"]
+        if "_edge" in object_type:
+            orientation = desc["orientation"]
+        elif object_type == "line":
+            # 与line_to_edge的判断相同
+            orientation = "h" if desc["top"] == desc["bottom"] else "v"
+        else:
+            for edge in obj_to_edges(desc):
+                if edge["orientation"] in edges:
+                    edges[edge["orientation"]].append(edge)
+            continue
+        if orientation in edges:
+            edges[orientation].append(desc)
+    return edges
+
+
+def merge_collinear_edges(edges, orientation, snap_tolerance, join_tolerance):
+    """同一方向的边：按位置吸附到簇平均值（snap_tolerance为None时不吸附），再连接同一直线上
+    间隔不超过join_tolerance的线段，返回合并后的边"""
+    import numpy as np
+
+    if not edges:
+        return []
+    pos_key, other_key, lo_key, hi_key, size_key = EDGE_KEYS[orientation]
+    pos = np.array([edge[pos_key] for edge in edges], dtype=float)
+    other = np.array([edge[other_key] for edge in edges], dtype=float)
+    lo = np.array([edge[lo_key] for edge in edges], dtype=float)
+    hi = np.array([edge[hi_key] for edge in edges], dtype=float)
+    size = np.array([edge[size_key] for edge in edges], dtype=float)
+
+    if snap_tolerance is None:
+        order = np.arange(len(edges))
+    else:
+        # 位置去重排序后相邻差值超过容差处断开成簇（与cluster_list一致）
+        values = np.unique(pos)
+        starts = np.concatenate(([True], values[1:] > values[:-1] + snap_tolerance))
+        cluster = (np.cumsum(starts) - 1)[np.searchsorted(values, pos)]
+        # 簇内保持原顺序，逐个累加求平均（与pdfplumber的sum顺序相同）
+        order = np.argsort(cluster, kind="stable")
+        counts = np.bincount(cluster)
+        ordered = pos[order].tolist()
+        bounds = np.concatenate(([0], np.cumsum(counts))).tolist()
+        averages = np.array([sum(ordered[start:end]) for start, end in zip(bounds, bounds[1:])]) / counts
+        shift = averages[cluster] - pos
+        pos = pos + shift
+        other = other + shift
+
+    # 按位置、起点排序（稳定排序，相同时保持吸附后的顺序）
+    order = order[np.argsort(lo[order], kind="stable")]
+    order = order[np.argsort(pos[order], kind="stable")]
+    pos, other, lo, hi, size = pos[order], other[order], lo[order], hi[order], size[order]
+
+    # 同一位置内终点的累计最大值：终点换成名次后与位置组号组合，整体一次accumulate
+    new_group = np.concatenate(([True], pos[1:] != pos[:-1]))
+    group = np.cumsum(new_group) - 1
+    hi_values, hi_rank = np.unique(hi, return_inverse=True)
+    running = np.maximum.accumulate(group * len(hi_values) + hi_rank) % len(hi_values)
+    running_hi = hi_values[running]
+
+    # 起点超过前面线段的最远终点加容差时另起一段
+    previous_hi = np.concatenate(([0.0], running_hi[:-1]))
+    starts = new_group | (lo > previous_hi + join_tolerance)
+    segment = np.cumsum(starts) - 1
+    first = np.flatnonzero(starts)
+    last = np.concatenate((first[1:], [len(pos)])) - 1
+
+    # 线段延长时长度按pdfplumber的resize_object更新：竖线逐次累加，横线为终点减起点
+    extended = ~starts & (hi > previous_hi)
+    lengths = size[first].tolist()
+    if orientation == "v":
+        for index, diff in zip(segment[extended].tolist(), (hi - previous_hi)[extended].tolist()):
+            lengths[index] += diff
+    else:
+        grown = np.bincount(segment[extended], minlength=len(first)) > 0
+        lengths = np.where(grown, running_hi[last] - lo[first], size[first]).tolist()
+
+    merged = []
+    for p, o, start, end, length in zip(pos[first].tolist(), other[first].tolist(), lo[first].tolist(),
+                                        running_hi[last].tolist(), lengths):
+        edge = {"object_type": MERGED_EDGE_TYPE, "orientation": orientation,
+                pos_key: p, other_key: o, lo_key: start, hi_key: end, size_key: length}
+        if orientation == "v":
+            edge["width"] = o - p
+        else:
+            edge["height"] = o - p
+        merged.append(edge)
+    return merged
@@ -0,0 +1,1098 @@
+"""PDF表格提取引擎：不依赖tkinter，可供界面、命令行及其他Python程序调用"""
+import os
+from pathlib import Path
+import glob
+import re
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+import queue
+import gc
+import time
+
+from pdf_cache import file_sha256, make_cache_key
+from pdf_layout import PageLayout
+from pdf_backend import open_pdf, DEFAULT_BACKEND
+import pdf_rows
+from pdf_rows import DATE_PATTERN, AMOUNT_PATTERN, HOUSE_NUMBER_PATTERN, ROW_SEPARATOR, TableRows, find_header_row
+from pdf_writers import open_row_writer
+from pdf_dataset import DatasetWriter, DEFAULT_DATASET_NAME
+from pdf_tokenizer import split_row_text
+from pdf_strategy import StrategyTracker, strategy_order, page_strategy, layout_fingerprint
+from pdf_pipeline import PdfPrefetcher, OutputStage, DEFAULT_PREFETCH_MB, DEFAULT_PREFETCH_FILES
+from pdf_schedule import schedule_largest_first, format_duration
+from pdf_metrics import BatchMetrics
+
+# 默认并发数：与CPU核心数一致
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# 单个PDF按页分块并行时，每块的页数
+DEFAULT_CHUNK_PAGES = 25
+
+# 批量转换时刷新进度的间隔（秒）
+PROGRESS_INTERVAL = 1.0
+
+# 停止后等待工作进程在页边界退出的时间（秒），超时则强制结束
+CANCEL_GRACE_SECONDS = 3.0
+
+# 停止后未处理或未提取完的文件的结果，不计入成功/失败
+STOPPED_RESULT = ("已停止", False)
+
+# 支持的输出格式
+OUTPUT_FORMATS = ("xlsx", "csv")
+
+# 引擎版本：提取规则变化时需递增，使旧的缓存结果失效
+ENGINE_VERSION = "1.2"
+
+# 页面预筛：表头中的(A)–(H)列标识
+HEADER_MARKER_PATTERN = re.compile(r'\([A-H]\)')
+
+COLUMN_NAMES = [
+    '(A)临时买卖合约日期', '(B)买卖合约日期', '(C)终止买卖合约日期',
+    '(D)大厦名称', '(E)楼层', '(F)单位', '(G)车位信息', '(H)成交金额',
+    '(I)售价修改细节及日期', '(J)支付条款', '(K)买方是否为卖方相关人士',
+    '识别方法'  # 新增列：识别方法
+]
+
+class PDFTableExtractor:
+    """PDF表格提取引擎（不依赖界面）"""
+    def __init__(self, log_queue=None, stop_event=None):
+        # 日志队列：界面中由process_queue消费，工作进程中转发回主进程
+        self.log_queue = log_queue if log_queue is not None else queue.Queue()
+        # 停止标志：多进程模式下使用进程间共享的Event
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        # 多进程模式下工作进程报告进程号的队列，由start_process_pool创建
+        self.worker_pid_queue = None
+        
+        # 批量转换统计
+        self.success_count = 0
+        self.failed_count = 0
+        self.total_files = 0
+        self.processed_files = 0
+        # 按估计页数加权的进度
+        self.total_pages = 0
+        self.processed_pages = 0
+        self.finished_pages = 0
+        self.file_pages_done = {}
+        # 本批各文件的结果 {路径: 是否成功}，停止时未处理完的文件不在其中
+        self.file_results = {}
+        
+        # 结果缓存（pdf_cache.ResultCache），为None时不使用缓存
+        self.result_cache = None
+        
+        # 断点续传（pdf_checkpoint.CheckpointStore）：逐页记录提取结果，中断后从最后完成的页继续，
+        # 已完成且输出未改动的文件直接跳过；为None时不记录
+        self.checkpoints = None
+        
+        # 每个工作进程的内存上限(MB)，为None时不限制
+        self.memory_limit_mb = None
+        
+        # 输出时追加规范化后的日期、金额和货币代码列
+        self.normalize = False
+        
+        # 表格查找前先按字符流预筛页面，跳过不可能有数据的页
+        self.page_prefilter = True
+        
+        # 按最近出数据的策略调整级联顺序；strategy_profiles(pdf_strategy.StrategyProfiles)
+        # 按版面指纹跨运行记住优先策略，为None时每份文档从默认顺序开始
+        self.adaptive_strategy = True
+        self.strategy_profiles = None
+        
+        # 批量转换时预读后续PDF的内存上限(MB)，为0时不预读
+        self.prefetch_mb = DEFAULT_PREFETCH_MB
+        
+        # 批量转换时按估计页数从大到小处理，为False时按文件夹列出的顺序
+        self.largest_first = True
+        
+        # 性能统计(pdf_metrics.BatchMetrics)，为None时不统计；
+        # 指定metrics_dir时批量转换自动统计，结束后在该目录写出JSON报告和Prometheus文件
+        self.metrics = None
+        self.metrics_dir = None
+        
+        # 提取后端（pdf_backend.BACKENDS）：打开文档、取页面字符和线条的实现
+        self.backend = DEFAULT_BACKEND
+    
+    @property
+    def is_running(self):
+        return not self.stop_event.is_set()
+    
+    @is_running.setter
+    def is_running(self, value):
+        if value:
+            self.stop_event.clear()
+        else:
+            self.stop_event.set()
+    
+    def update_progress(self, current, total, message):
+        """更新进度（由界面等调用方覆盖）"""
+        pass
+    
+    def count_metric(self, name, value=1):
+        """启用性能统计时累加计数"""
+        if self.metrics is not None:
+            self.metrics.count(name, value)
+    
+    def is_valid_date(self, text):
+        """验证日期格式"""
+        if text is None:
+            return False
+        return DATE_PATTERN.search(str(text)) is not None
+    
+    def is_valid_amount(self, text):
+        """验证金额格式"""
+        if text is None:
+            return False
+        return AMOUNT_PATTERN.search(str(text)) is not None
+    
+    def is_header_row(self, row):
+        """判断是否为表头行：至少3个单元格是(A)-(H)列标识"""
+        return pdf_rows.is_header_row(row)
+    
+    def contains_house_number(self, row):
+        """检查行是否包含屋號信息"""
+        return pdf_rows.contains_house_number(row)
+    
+    def is_valid_data_row(self, row):
+        """严格验证数据行：必须同时包含日期和金额"""
+        return pdf_rows.is_valid_data_row(row)
+    
+    def has_valid_header_structure(self, table):
+        """检查表格是否有有效的表头结构（前三行中有表头行）"""
+        return find_header_row(table) is not None
+    
+    def extract_tables_with_lines_strategy(self, page, page_num):
+        """使用线条检测策略提取表格 - 加入表头识别，如果没有表头跳过该表格"""
+        layout = PageLayout.wrap(page)
+        strategy_settings = {
+            "vertical_strategy": "lines", 
+            "horizontal_strategy": "lines",
+            "explicit_vertical_lines": layout.explicit_edges,
+            "explicit_horizontal_lines": layout.explicit_edges,
+            "join_tolerance": 15
+        }
+        
+        tables = layout.extract_tables(strategy_settings)
+        data_rows = []
+        skipped_tables = 0
+        
+        if tables:
+            for table_idx, table in enumerate(tables):
+                if table and len(table) > 0:
+                    # 整张表一次分类（见pdf_rows.TableRows）
+                    rows = TableRows(table)
+                    
+                    if rows.header_index is not None:
+                        # 如果有表头，跳过表头行及其后两行
+                        data_rows.extend(self.rows_after_header(rows, "线条检测策略(有表头)"))
+                    else:
+                        # 如果没有表头，跳过整个表格
+                        skipped_tables += 1
+        
+        self.count_metric("tables_skipped_no_header", skipped_tables)
+        return data_rows
+    
+    def rows_after_header(self, rows, method):
+        """有表头的表格：表头行及其后两行之后的非空行，跳过屋號信息行，附加识别方法标记"""
+        data_rows = []
+        filled, house_number = rows.filled, rows.house_number
+        for row_idx in range(rows.data_start, len(rows.table)):
+            if not filled[row_idx]:
+                continue
+            # 检查是否包含屋號信息，如果是则跳过
+            if house_number[row_idx]:
+                self.count_metric("rows_dropped_house_number")
+                continue
+            processed_row = self.improved_column_separation(rows.table[row_idx])
+            processed_row.append(method)
+            data_rows.append(processed_row)
+        return data_rows
+    
+    def improved_column_separation(self, row):
+        """改进的数据分列处理"""
+        # 首先确保所有元素都是字符串
+        row = [str(cell) if cell is not None else '' for cell in row]
+        
+        # 如果已经是11列，直接返回
+        if len(row) == 11:
+            return row
+        
+        # 如果列数不足，尝试智能分列
+        if len(row) < 11:
+            # 尝试从文本中提取关键信息
+            row_text = ' '.join(row)
+            separated_data = self.separate_columns_by_patterns(row_text)
+            
+            if len(separated_data) >= 11:
+                return separated_data[:11]
+            elif len(separated_data) > len(row):
+                # 补充空列到11列
+                separated_data.extend([''] * (11 - len(separated_data)))
+                return separated_data
+        
+        # 如果以上方法都不行，保持原样并补充空列
+        if len(row) > 11:
+            return row[:11]
+        elif len(row) < 11:
+            row.extend([''] * (11 - len(row)))
+        
+        return row
+    
+    def separate_columns_by_patterns(self, text):
+        """根据模式分列数据（一次扫描识别日期、大厦、楼层单位和金额，见pdf_tokenizer）"""
+        return split_row_text(text)
+    
+    def extract_text_data(self, page, page_num):
+        """使用文本策略提取数据 - 跳过前三行，要求第一列是日期且有金额"""
+        text = PageLayout.wrap(page).text
+        if not text:
+            return []
+        
+        text_data = []
+        lines = text.split('\n')
+        
+        # 跳过前三行（假设是表头）
+        data_start_index = 3
+        if data_start_index >= len(lines):
+            return []
+        
+        # 处理数据行（跳过前三行）
+        for line in lines[data_start_index:]:
+            if not line.strip():
+                continue
+                
+            # 检查是否包含屋號信息，如果是则跳过
+            if HOUSE_NUMBER_PATTERN.search(line):
+                self.count_metric("rows_dropped_house_number")
+                continue
+                
+            # 使用更精确的分割方法
+            cells = re.split(r'\s{2,}', line)
+            if cells and any(cells):
+                # 检查金额列（各列以分隔符连接后搜索一次，匹配不会跨列）
+                has_amount = AMOUNT_PATTERN.search(ROW_SEPARATOR.join(cells)) is not None
+                
+                # 检查第一列是否为日期
+                first_col_is_date = len(cells) > 0 and self.is_valid_date(cells[0])
+                
+                # 要求至少有一列金额且第一列是日期
+                if has_amount and first_col_is_date:
+                    processed_row = self.improved_column_separation(cells)
+                    # 添加识别方法标记
+                    processed_row.append("文本提取策略")
+                    text_data.append(processed_row)
+                else:
+                    self.count_metric("rows_dropped_validation")
+        
+        return text_data
+    
+    def extract_tables_with_table_detection(self, page, page_num):
+        """使用表格检测策略提取数据 - 修正逻辑：有表头跳过三行，无表头且第一列不是日期则跳过整个表格"""
+        tables_data = []
+        tables = PageLayout.wrap(page).extract_tables()
+        
+        if tables:
+            for table in tables:
+                if table and len(table) > 0:
+                    # 整张表一次分类（见pdf_rows.TableRows）
+                    rows = TableRows(table)
+                    
+                    if rows.header_index is not None:
+                        # 如果有表头，跳过表头行及其后两行
+                        tables_data.extend(self.rows_after_header(rows, "表格检测策略(有表头)"))
+                    else:
+                        # 如果没有表头，检查表格中是否有第一列是日期的行
+                        has_date_row = any(filled and first_cell_date
+                                           for filled, first_cell_date in zip(rows.filled, rows.first_cell_date))
+                        
+                        # 如果没有日期行，跳过整个表格
+                        if not has_date_row:
+                            self.count_metric("tables_skipped_no_header")
+                            continue
+                        
+                        # 如果有日期行，只处理第一列是日期的行
+                        for row_idx, row in enumerate(table):
+                            if rows.filled[row_idx]:
+                                # 检查是否包含屋號信息，如果是则跳过
+                                if rows.house_number[row_idx]:
+                                    self.count_metric("rows_dropped_house_number")
+                                    continue
+                                
+                                # 检查第一列是否为日期
+                                if rows.first_cell_date[row_idx]:
+                                    processed_row = self.improved_column_separation(row)
+                                    # 添加识别方法标记
+                                    processed_row.append("表格检测策略(无表头)")
+                                    tables_data.append(processed_row)
+                                else:
+                                    self.count_metric("rows_dropped_validation")
+        
+        return tables_data
+    
+    def is_candidate_page(self, page):
+        """页面预筛：只读取字符流，判断页面是否值得完整提取
+        
+        有数据的页必然含有(A)–(H)表头标识（有表头的表格），或至少含有一个日期
+        （无表头表格要求首列是日期，文本策略要求首列是日期且有金额）
+        """
+        text = PageLayout.wrap(page).char_text
+        return HEADER_MARKER_PATTERN.search(text) is not None or DATE_PATTERN.search(text) is not None
+    
+    def page_passes_prefilter(self, page):
+        """执行页面预筛，启用性能统计时计时"""
+        if self.metrics is None:
+            return self.is_candidate_page(page)
+        with self.metrics.timed("prefilter"):
+            return self.is_candidate_page(page)
+    
+    def extract_page_data(self, page, current_page, preferred_strategy=None, tracker=None):
+        """按策略级联提取单页数据，三种策略共用同一份版面分析结果
+        
+        指定preferred_strategy时先尝试该策略，没有结果再按默认顺序尝试其余策略；
+        页面上有线条时不越过表格检测、线条检测（见pdf_strategy.strategy_order），结果与默认顺序一致。
+        传入tracker(pdf_strategy.StrategyTracker)时由它决定顺序（有线条的页上可越过一直没有结果的策略），
+        并记录本页的结果
+        """
+        page = PageLayout.wrap(page)
+        strategies = {
+            # 策略1: 表格检测（修正逻辑）
+            "table": self.extract_tables_with_table_detection,
+            # 策略2: 线条检测（加入表头识别）
+            "lines": self.extract_tables_with_lines_strategy,
+            # 策略3: 文本提取（跳过前三行，只要求金额）
+            "text": self.extract_text_data,
+        }
+        
+        if tracker is not None:
+            preferred_strategy = tracker.preferred
+        ruled = preferred_strategy is not None and bool(page.explicit_edges)
+        order = tracker.order(ruled) if tracker is not None else strategy_order(preferred_strategy, ruled)
+        page_data = []
+        for strategy in order:
+            if self.metrics is None:
+                page_data = strategies[strategy](page, current_page)
+            else:
+                with self.metrics.timed("strategy", strategy):
+                    page_data = strategies[strategy](page, current_page)
+            if page_data:
+                break
+        if tracker is not None:
+            tracker.record(order, page_strategy(page_data))
+        return page_data
+    
+    def iter_pages(self, pdf, first_page, last_page, max_empty_pages=3, preferred_strategy=None,
+                   skipped_strategies=()):
+        """逐页提取页码范围[first_page, last_page]，产出(页码, 数据行)
+        
+        每页处理完即释放后端缓存的页面对象，内存不随页数增长；
+        出现连续max_empty_pages个空页时提前结束：整体的停止点必然不晚于此处。
+        启用自适应排序时，从preferred_strategy开始，之后优先尝试上一个出数据的策略；
+        skipped_strategies为版面记录中可直接越过的策略（见pdf_strategy.StrategyTracker）
+        """
+        tracker = StrategyTracker(preferred_strategy, skipped_strategies) if self.adaptive_strategy else None
+        empty_page_count = 0
+        # 未通过预筛而跳过的页，按空页计入连续空页数
+        skipped_pages = []
+        
+        try:
+            for page_num in range(first_page-1, min(last_page, len(pdf.pages))):
+                if not self.is_running:
+                    break
+                    
+                current_page = page_num + 1
+                page_started = time.perf_counter(), time.thread_time()
+                page = PageLayout(pdf.pages[page_num])
+                skipped = False
+                try:
+                    if self.page_prefilter and not self.page_passes_prefilter(page):
+                        skipped_pages.append(current_page)
+                        skipped = True
+                        page_data = []
+                    else:
+                        page_data = self.extract_page_data(page, current_page, tracker=tracker)
+                finally:
+                    page.close()
+                if self.metrics is not None:
+                    self.record_page_metrics(pdf, current_page, page_started, page_data, skipped)
+                self.check_memory(pdf)
+                yield current_page, page_data
+                
+                if page_data:
+                    empty_page_count = 0
+                else:
+                    empty_page_count += 1
+                
+                if empty_page_count >= max_empty_pages:
+                    break
+        finally:
+            if skipped_pages:
+                self.log_queue.put(f"{pdf_file_name(pdf)} 预筛跳过 {len(skipped_pages)} 页: "
+                                   f"{', '.join(map(str, skipped_pages))}")
+    
+    def record_page_metrics(self, pdf, current_page, page_started, page_data, skipped=False):
+        """记录一页的耗时和页面计数"""
+        wall, cpu = time.perf_counter() - page_started[0], time.thread_time() - page_started[1]
+        self.metrics.record_page(pdf_file_name(pdf), current_page, wall, cpu, page_strategy(page_data), len(page_data))
+        self.metrics.count("pages_skipped_prefilter" if skipped else "pages")
+        self.metrics.count("rows_extracted", len(page_data))
+        if not page_data:
+            self.metrics.count("pages_empty")
+    
+    def extract_pages(self, pdf, first_page, last_page, max_empty_pages=3, preferred_strategy=None,
+                      skipped_strategies=()):
+        """提取页码范围内的数据，返回[(页码, 数据行)]（供工作进程返回分块结果）"""
+        return list(self.iter_pages(pdf, first_page, last_page, max_empty_pages, preferred_strategy,
+                                    skipped_strategies))
+    
+    def check_memory(self, pdf):
+        """超出内存上限时先释放文档级缓存，仍超出则中止当前文件"""
+        if not self.memory_limit_mb:
+            return
+        rss_mb = current_rss_mb()
+        if rss_mb is None or rss_mb <= self.memory_limit_mb:
+            return
+        
+        release_document_cache(pdf)
+        gc.collect()
+        rss_mb = current_rss_mb()
+        if rss_mb is not None and rss_mb > self.memory_limit_mb:
+            raise MemoryError(f"内存占用 {rss_mb:.0f}MB 超过上限 {self.memory_limit_mb:g}MB")
+    
+    def split_page_range(self, start_page, total_pages, chunk_pages):
+        """将起始页之后的页码范围切分为若干分块"""
+        return [(first, min(first + chunk_pages - 1, total_pages))
+                for first in range(start_page, total_pages + 1, chunk_pages)]
+    
+    def iter_pdf_pages(self, pdf_path, start_page=2, max_empty_pages=3, executor=None, chunk_pages=DEFAULT_CHUNK_PAGES,
+                       prefetched=None, resume_from=None, empty_pages_before=0):
+        """按页码顺序产出(页码, 数据行)，并应用连续空页停止规则
+        
+        传入进程池时，页码范围按chunk_pages切分后交由多个工作进程并行处理，
+        结果按页码顺序合并，连续空页停止规则跨分块保持不变。
+        传入预读结果(pdf_pipeline.PrefetchedFile)时，本进程直接从内存解析。
+        续传时从resume_from页开始，empty_pages_before为之前已连续出现的空页数
+        """
+        first_page = resume_from or start_page
+        with open_pdf(prefetched.open_stream() if prefetched is not None else pdf_path, self.backend) as pdf:
+            total_pages = len(pdf.pages)
+            self.log_queue.put(f"处理文件: {os.path.basename(pdf_path)}, 总页数: {total_pages}")
+            # 本进程提取时保留起始页的解析结果，提取该页时不再重复解析
+            fingerprint, preferred_strategy, skipped_strategies = self.strategy_hint(pdf, start_page,
+                                                                                     keep_page=executor is None)
+            
+            if executor is None:
+                yield from self.learn_strategy(fingerprint, self.stop_after_empty_pages(
+                    self.iter_pages(pdf, first_page, total_pages, max_empty_pages, preferred_strategy,
+                                    skipped_strategies),
+                    max_empty_pages, empty_pages_before))
+                return
+        
+        chunks = self.split_page_range(first_page, total_pages, chunk_pages)
+        futures = [executor.submit(_extract_pages_task, pdf_path, first, last, max_empty_pages, self.memory_limit_mb,
+                                   self.page_prefilter, self.adaptive_strategy, preferred_strategy,
+                                   self.metrics is not None, self.backend, skipped_strategies)
+                   for first, last in chunks]
+        if len(chunks) > 1:
+            self.log_queue.put(f"文件 {os.path.basename(pdf_path)} 分为 {len(chunks)} 块并行处理")
+        try:
+            # 按分块顺序惰性取结果，确定停止后其余分块不再等待
+            yield from self.learn_strategy(fingerprint, self.stop_after_empty_pages(
+                (item for future in futures for item in self.chunk_result(future)), max_empty_pages,
+                empty_pages_before))
+        finally:
+            # 取消尚未开始的分块
+            for future in futures:
+                future.cancel()
+    
+    def chunk_result(self, future):
+        """取工作进程的分块结果，合并其性能统计"""
+        pages, metrics = future.result()
+        if metrics is not None and self.metrics is not None:
+            self.metrics.merge(metrics)
+        return pages
+    
+    def strategy_hint(self, pdf, start_page=2, keep_page=False):
+        """返回(版面指纹, 该版面记录的优先策略, 可直接越过的策略)，未启用自适应排序或没有记录时为None, None, ()"""
+        if not self.adaptive_strategy or self.strategy_profiles is None:
+            return None, None, ()
+        fingerprint = layout_fingerprint(pdf, start_page, keep_page)
+        preferred_strategy = self.strategy_profiles.preferred(fingerprint)
+        skipped_strategies = self.strategy_profiles.skipped(fingerprint)
+        if preferred_strategy:
+            self.log_queue.put(f"版面 {fingerprint} 优先尝试策略: {preferred_strategy}"
+                               + (f"，有线条的页上越过: {', '.join(skipped_strategies)}" if skipped_strategies else ""))
+        return fingerprint, preferred_strategy, skipped_strategies
+    
+    def learn_strategy(self, fingerprint, page_results):
+        """转发页面结果并统计各策略出数据的页数，文档处理完后记入该版面的策略记录"""
+        if fingerprint is None:
+            yield from page_results
+            return
+        
+        strategy_pages = {}
+        for current_page, page_data in page_results:
+            strategy = page_strategy(page_data)
+            if strategy:
+                strategy_pages[strategy] = strategy_pages.get(strategy, 0) + 1
+            yield current_page, page_data
+        if self.is_running:
+            self.strategy_profiles.record(fingerprint, strategy_pages)
+    
+    def stop_after_empty_pages(self, page_results, max_empty_pages=3, empty_pages_before=0):
+        """按页码顺序转发页面结果，连续max_empty_pages页无数据时停止（计入之前已连续的空页）"""
+        empty_page_count = empty_pages_before
+        for current_page, page_data in page_results:
+            yield current_page, page_data
+            
+            if page_data:
+                empty_page_count = 0
+            else:
+                empty_page_count += 1
+            
+            if empty_page_count >= max_empty_pages:
+                self.log_queue.put(f"连续 {max_empty_pages} 页无数据，停止处理")
+                break
+    
+    def iter_clean_rows(self, pdf_path, page_results, with_page=False, progress_key=None):
+        """逐行产出清理后的数据（with_page为True时产出(页码, 数据行)），结束时输出识别方法统计
+        
+        已完成的页数记在file_pages_done[progress_key]中（默认以文件路径为键）
+        """
+        strategy_stats = {}
+        total_extracted = 0
+        cleaned_count = 0
+        progress_key = pdf_path if progress_key is None else progress_key
+        
+        for current_page, page_data in page_results:
+            if progress_key in self.file_pages_done:
+                self.file_pages_done[progress_key] += 1
+            for row in page_data:
+                total_extracted += 1
+                # 统计各识别方法的数据量
+                if len(row) >= 12:  # 确保有识别方法列
+                    strategy = row[11] if len(row) > 11 else "未知方法"
+                    strategy_stats[strategy] = strategy_stats.get(strategy, 0) + 1
+                
+                # 数据清理：只检查前11列是否为空
+                if any(cell for cell in row[:11]):
+                    cleaned_count += 1
+                    yield (current_page, row) if with_page else row
+        
+        self.count_metric("rows_dropped_empty", total_extracted - cleaned_count)
+        
+        self.log_queue.put("=== 识别方法统计 ===")
+        for strategy, count in strategy_stats.items():
+            self.log_queue.put(f"{strategy}: {count} 行")
+        
+        self.log_queue.put(f"文件 {os.path.basename(pdf_path)} 总共提取了 {total_extracted} 行数据")
+        self.log_queue.put(f"清理后有效数据: {cleaned_count} 行")
+    
+    def extract_tables_from_pdf(self, pdf_path, start_page=2, max_empty_pages=3, executor=None, chunk_pages=DEFAULT_CHUNK_PAGES):
+        """从PDF中提取表格数据 - 改进版本（一次性返回全部数据行）"""
+        try:
+            page_results = self.iter_pdf_pages(pdf_path, start_page, max_empty_pages, executor, chunk_pages)
+            cleaned_data = list(self.iter_clean_rows(pdf_path, page_results))
+            return cleaned_data, COLUMN_NAMES, None
+            
+        except Exception as e:
+            return None, None, str(e)
+    
+    def cache_settings(self, start_page, max_empty_pages=3):
+        """影响提取结果的参数，作为缓存键的一部分"""
+        settings = {
+            "engine_version": ENGINE_VERSION,
+            "start_page": start_page,
+            "max_empty_pages": max_empty_pages,
+            "page_prefilter": self.page_prefilter,
+            "adaptive_strategy": self.adaptive_strategy,
+        }
+        # 默认后端不写入，已有的缓存和检查点仍然有效
+        if self.backend != DEFAULT_BACKEND:
+            settings["backend"] = self.backend
+        return settings
+    
+    def result_key(self, pdf_file, start_page=2, prefetched=None):
+        """结果缓存与检查点共用的键，两者都未启用时返回None"""
+        if self.result_cache is None and self.checkpoints is None:
+            return None
+        # 预读时已计算过内容哈希
+        file_hash = prefetched.sha256 if prefetched is not None and prefetched.sha256 else file_sha256(pdf_file)
+        return make_cache_key(file_hash, self.cache_settings(start_page))
+    
+    def iter_pages_with_cache(self, pdf_file, start_page=2, executor=None, prefetched=None, result_key=None):
+        """先查结果缓存，命中时直接产出缓存的页面结果；未命中时边提取边写入缓存
+        
+        启用断点续传时，先产出检查点中已完成的页，再从下一页继续提取，新提取的页逐页追加到检查点
+        """
+        if result_key is None:
+            result_key = self.result_key(pdf_file, start_page, prefetched)
+        if result_key is None:
+            yield from self.iter_pdf_pages(pdf_file, start_page, executor=executor, prefetched=prefetched)
+            return
+        
+        if self.result_cache is not None:
+            cached_pages = self.result_cache.get(result_key)
+            if cached_pages is not None:
+                self.log_queue.put(f"缓存命中: {os.path.basename(pdf_file)}，跳过解析")
+                yield from cached_pages
+                return
+        
+        checkpoint_pages = self.checkpoints.load(result_key) if self.checkpoints is not None else []
+        checkpoint = self.checkpoints.writer(result_key, checkpoint_pages) if self.checkpoints is not None else None
+        cache_writer = self.result_cache.writer(result_key) if self.result_cache is not None else None
+        completed = False
+        try:
+            for current_page, page_data in self.resume_pages(pdf_file, start_page, executor, prefetched,
+                                                             checkpoint_pages, checkpoint):
+                if cache_writer is not None:
+                    cache_writer.write_page(current_page, page_data)
+                yield current_page, page_data
+            completed = self.is_running
+        finally:
+            # 中途停止或出错时结果不完整：不写入缓存，保留检查点供下次续传
+            if cache_writer is not None:
+                if completed:
+                    cache_writer.commit()
+                else:
+                    cache_writer.discard()
+            if checkpoint is not None:
+                checkpoint.close(completed)
+    
+    def resume_pages(self, pdf_file, start_page, executor, prefetched, checkpoint_pages, checkpoint,
+                     max_empty_pages=3):
+        """产出检查点中已完成的页，再从其后一页继续提取，新提取的页写入检查点"""
+        resume_from = None
+        empty_pages_before = 0
+        if checkpoint_pages:
+            resume_from = checkpoint_pages[-1][0] + 1
+            self.log_queue.put(f"{os.path.basename(pdf_file)} 从检查点恢复 {len(checkpoint_pages)} 页，"
+                               f"从第 {resume_from} 页继续")
+            for current_page, page_data in checkpoint_pages:
+                empty_pages_before = 0 if page_data else empty_pages_before + 1
+                yield current_page, page_data
+            if empty_pages_before >= max_empty_pages:
+                return
+        
+        # 停止时各分块在不同位置中断，合并的结果会跳页；检查点只记录连续的页
+        next_page = resume_from or start_page
+        for current_page, page_data in self.iter_pdf_pages(pdf_file, start_page, max_empty_pages, executor,
+                                                           prefetched=prefetched, resume_from=resume_from,
+                                                           empty_pages_before=empty_pages_before):
+            if checkpoint is not None and current_page == next_page:
+                checkpoint.write_page(current_page, page_data)
+                next_page += 1
+            yield current_page, page_data
+    
+    def save_rows(self, rows, column_names, output_file, output_format="xlsx"):
+        """将数据行（可迭代对象）边产出边写出到文件，返回写出的行数；没有数据或中途停止时不生成文件"""
+        writer = self.spool_rows(rows, column_names, output_file, output_format)
+        if not self.is_running:
+            writer.abort()
+            return 0
+        row_count = writer.close()
+        self.record_output_metrics(writer, output_format)
+        return row_count
+    
+    def spool_rows(self, rows, column_names, output_file, output_format="xlsx"):
+        """将数据行写入写入器的临时文件，返回尚未完成的写入器（由写出阶段close）"""
+        writer = open_row_writer(output_file, column_names, output_format, self.normalize)
+        try:
+            writer.write_rows(rows)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer
+    
+    def finish_output(self, pdf_file, writer, completion_key=None):
+        """写出阶段：完成输出文件并替换为正式文件，返回(结果信息, 是否成功)
+        
+        只有完整提取的文件才会提交到写出阶段，停止后已提交的文件仍会写完
+        """
+        try:
+            row_count = writer.close()
+        except Exception as e:
+            writer.abort()
+            return f"✗ 处理文件 {os.path.basename(pdf_file)} 时出错: {str(e)}", False
+        self.record_output_metrics(writer, os.path.splitext(writer.output_file)[1].lstrip('.'))
+        self.mark_completed(writer.output_file, row_count, completion_key)
+        return self.conversion_result(pdf_file, row_count)
+    
+    def mark_completed(self, output_file, row_count, completion_key):
+        """完整处理并写出的文件记入完成记录，重新运行时跳过"""
+        if completion_key is not None and row_count and self.checkpoints is not None:
+            self.checkpoints.mark_completed(output_file, completion_key, self.normalize)
+    
+    def record_output_metrics(self, writer, output_format):
+        """记录一个输出文件的写出耗时"""
+        if self.metrics is not None:
+            self.metrics.add_timing("output", output_format, writer.write_seconds, writer.write_cpu_seconds)
+    
+    def conversion_result(self, pdf_file, row_count):
+        if not row_count:
+            return f"警告: {os.path.basename(pdf_file)} 中未找到有效数据", False
+        return f"✓ 成功转换: {os.path.basename(pdf_file)} (提取了 {row_count} 行数据)", True
+    
+    def save_to_dataset(self, dataset, pdf_file, page_rows):
+        """将一个文件的(页码, 数据行)提交到合并数据集；中途停止的文件不提交，返回行数"""
+        spool = dataset.spool_rows(page_rows)
+        if not self.is_running:
+            spool.close()
+            return 0
+        return dataset.submit(os.path.basename(pdf_file), spool)
+    
+    def process_single_pdf(self, pdf_file, output_folder, start_page=2, executor=None, output_format="xlsx",
+                           dataset=None, prefetcher=None, output_stage=None):
+        """处理单个PDF文件：逐页提取并写出，不在内存中积累整份文档（传入进程池时，提取在工作进程中进行）
+        
+        传入合并数据集(pdf_dataset.DatasetWriter)时，数据行追加到数据集，不再单独生成文件。
+        传入预读器(pdf_pipeline.PdfPrefetcher)时使用预读的文件内容；传入写出阶段(pdf_pipeline.OutputStage)时，
+        提取完成后把输出文件交给写出线程完成，立即返回写出结果的Future，本线程可继续处理下一个文件
+        """
+        if not self.is_running:
+            return STOPPED_RESULT
+        
+        prefetched = prefetcher.take(pdf_file) if prefetcher is not None else None
+        try:
+            result_key = self.result_key(pdf_file, start_page, prefetched)
+            if dataset is not None:
+                page_results = self.iter_pages_with_cache(pdf_file, start_page, executor, prefetched, result_key)
+                page_rows = self.iter_clean_rows(pdf_file, page_results, with_page=True)
+                row_count = self.save_to_dataset(dataset, pdf_file, page_rows)
+            else:
+                pdf_name = os.path.splitext(os.path.basename(pdf_file))[0]
+                output_file = os.path.join(output_folder, f"{pdf_name}.{output_format}")
+                if self.checkpoints is not None and self.checkpoints.is_completed(output_file, result_key,
+                                                                                  self.normalize):
+                    return f"已完成，跳过: {os.path.basename(pdf_file)}（输出文件未变化）", True
+                page_results = self.iter_pages_with_cache(pdf_file, start_page, executor, prefetched, result_key)
+                rows = self.iter_clean_rows(pdf_file, page_results)
+                if output_stage is not None:
+                    writer = self.spool_rows(rows, COLUMN_NAMES, output_file, output_format)
+                    # 中途停止时输出不完整，丢弃临时文件，不生成半个输出文件
+                    if not self.is_running:
+                        writer.abort()
+                        return STOPPED_RESULT
+                    return output_stage.submit(self.finish_output, pdf_file, writer, result_key)
+                row_count = self.save_rows(rows, COLUMN_NAMES, output_file, output_format)
+                if self.is_running:
+                    self.mark_completed(output_file, row_count, result_key)
+            
+            return self.conversion_result(pdf_file, row_count)
+            
+        except Exception as e:
+            return f"✗ 处理文件 {os.path.basename(pdf_file)} 时出错: {str(e)}", False
+    
+    def batch_convert(self, pdf_folder, output_folder, start_page=2, max_workers=DEFAULT_WORKERS,
+                      use_processes=True, output_format="xlsx", dataset_format=None, partition_by=None,
+                      pdf_files=None):
+        """批量转换文件夹中的PDF文件，文件夹无效时返回False
+        
+        指定dataset_format(parquet/arrow/csv)时，所有文件的数据行（附来源文件和页码）
+        合并写入输出文件夹中的一个数据集，partition_by可按source或date分区。
+        传入pdf_files时只转换这些文件（监视文件夹时只转换有变化的文件）
+        """
+        if not os.path.exists(pdf_folder):
+            self.log_queue.put("错误: PDF文件夹不存在")
+            return False
+        
+        batch_started = time.monotonic()
+        Path(output_folder).mkdir(parents=True, exist_ok=True)
+        if pdf_files is None:
+            pdf_files = glob.glob(os.path.join(pdf_folder, "*.pdf"))
+        
+        if not pdf_files:
+            self.log_queue.put("错误: 在PDF文件夹中未找到PDF文件")
+            return False
+        
+        # 估计各文件页数，大文件先处理，避免最后只剩一个大文件单独运行
+        schedule = schedule_largest_first(pdf_files)
+        if self.largest_first:
+            pdf_files = [pdf_file for pdf_file, _ in schedule]
+        file_pages = dict(schedule)
+        
+        self.total_files = len(pdf_files)
+        self.processed_files = 0
+        self.total_pages = sum(file_pages.values())
+        self.processed_pages = 0
+        # 已完成文件的估计页数，及处理中的文件已完成的页数
+        self.finished_pages = 0
+        self.file_pages_done = {pdf_file: 0 for pdf_file in pdf_files}
+        self.file_results = {}
+        if self.metrics_dir:
+            self.metrics = BatchMetrics()
+        self.success_count = 0
+        self.failed_count = 0
+        # 只有一个工作单元时不值得启动进程池
+        use_processes = use_processes and max_workers > 1
+        
+        self.log_queue.put(f"找到 {self.total_files} 个PDF文件（估计共 {self.total_pages} 页），使用 {max_workers} 个{'进程' if use_processes else '线程'}处理")
+        
+        dataset = None
+        if dataset_format:
+            try:
+                dataset = DatasetWriter(os.path.join(output_folder, DEFAULT_DATASET_NAME), COLUMN_NAMES,
+                                        dataset_format, partition_by, self.normalize)
+            except ImportError:
+                self.log_queue.put(f"错误: 输出{dataset_format}需要安装pyarrow")
+                return False
+            dataset.start()
+        
+        process_pool = None
+        if use_processes:
+            process_pool, worker_log_queue, log_forwarder = self.start_process_pool(max_workers)
+        
+        # 预读线程提前读入后续文件；写出线程负责完成输出文件（合并数据集有自己的写入线程）。
+        # 多进程模式下工作进程按路径自行读取，预读的内容用不上，不预读
+        prefetcher = None
+        if self.prefetch_mb > 0 and not use_processes:
+            prefetcher = PdfPrefetcher(pdf_files, self.prefetch_mb, max(DEFAULT_PREFETCH_FILES, max_workers),
+                                       stop_event=self.stop_event)
+            prefetcher.start()
+        output_stage = None
+        if dataset is None:
+            output_stage = OutputStage(max_pending=max_workers)
+            output_stage.start()
+        
+        workers_terminated = False
+        try:
+            # 多进程模式下，这里的线程只负责分派任务
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                future_to_file = {
+                    executor.submit(self.process_single_pdf, pdf_file, output_folder, start_page,
+                                    process_pool, output_format, dataset, prefetcher, output_stage): pdf_file 
+                    for pdf_file in pdf_files
+                }
+                
+                file_futures = list(future_to_file)
+                try:
+                    self.collect_results(future_to_file, set(file_futures), file_pages, time.monotonic())
+                except BaseException:
+                    # 中断（如Ctrl+C）按停止处理，不再等待其余文件
+                    self.is_running = False
+                    raise
+                finally:
+                    if not self.is_running:
+                        workers_terminated = self.cancel_batch(file_futures, process_pool, prefetcher)
+        finally:
+            if prefetcher is not None:
+                prefetcher.close()
+            if output_stage is not None:
+                output_stage.close()
+            if process_pool is not None:
+                self.shutdown_process_pool(process_pool, worker_log_queue, log_forwarder, workers_terminated)
+            if dataset is not None:
+                dataset_saved = self.finish_dataset(dataset)
+            if self.metrics_dir:
+                self.write_metrics({
+                    "files": self.total_files, "processed_files": self.processed_files,
+                    "success": self.success_count, "failed": self.failed_count,
+                    "estimated_pages": self.total_pages, "workers": max_workers,
+                    "mode": "process" if use_processes else "thread", "output_format": dataset_format or output_format,
+                    "duration_seconds": round(time.monotonic() - batch_started, 3),
+                })
+        
+        return dataset is None or dataset_saved
+    
+    def start_process_pool(self, max_workers):
+        """创建提取进程池，返回(进程池, 工作进程日志队列, 日志转发线程)
+        
+        工作进程的日志和停止信号通过进程间队列/Event传递，本提取器此后改用该Event作为停止标志；
+        各工作进程启动时报告自己的进程号，停止超时时据此强制结束
+        """
+        ctx = multiprocessing.get_context()
+        worker_log_queue = ctx.Queue()
+        worker_stop_event = ctx.Event()
+        if not self.is_running:
+            worker_stop_event.set()
+        self.stop_event = worker_stop_event
+        self.worker_pid_queue = ctx.Queue()
+        process_pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx,
+                                           initializer=_init_worker,
+                                           initargs=(worker_log_queue, worker_stop_event, self.worker_pid_queue))
+        log_forwarder = threading.Thread(target=self.forward_worker_logs, args=(worker_log_queue,), daemon=True)
+        log_forwarder.start()
+        return process_pool, worker_log_queue, log_forwarder
+    
+    def shutdown_process_pool(self, process_pool, worker_log_queue, log_forwarder, workers_terminated=False):
+        """等待进程池退出，并在转发完工作进程的日志后结束转发线程"""
+        process_pool.shutdown(wait=True)
+        worker_log_queue.put(None)
+        if workers_terminated:
+            # 被强制结束的进程可能没有写完日志，不等待转发线程读到结束标记
+            worker_log_queue.cancel_join_thread()
+            log_forwarder.join(CANCEL_GRACE_SECONDS)
+        else:
+            log_forwarder.join()
+    
+    def collect_results(self, future_to_file, pending, file_pages, started):
+        """收集各文件的结果并定时刷新进度，直到全部完成或停止"""
+        while pending and self.is_running:
+            # 定时醒来刷新进度，大文件处理中也能按已完成的页数推进
+            done, pending = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                pdf_file = future_to_file[future]
+                try:
+                    result = future.result()
+                    if isinstance(result, Future):
+                        # 提取已完成，等待写出阶段的结果
+                        future_to_file[result] = pdf_file
+                        pending.add(result)
+                        continue
+                    if result == STOPPED_RESULT:
+                        continue
+                    result, success = result
+                    self.file_results[pdf_file] = success
+                    self.log_queue.put(result)
+                    self.processed_files += 1
+                    
+                    if success:
+                        self.success_count += 1
+                    else:
+                        self.failed_count += 1
+                except Exception as e:
+                    self.log_queue.put(f"✗ 处理文件 {os.path.basename(pdf_file)} 时发生异常: {str(e)}")
+                    self.file_results[pdf_file] = False
+                    self.processed_files += 1
+                    self.failed_count += 1
+                self.file_pages_done.pop(pdf_file, None)
+                self.finished_pages += file_pages[pdf_file]
+            
+            self.processed_pages = self.finished_pages + sum(
+                min(count, file_pages[pdf_file]) for pdf_file, count in list(self.file_pages_done.items()))
+            self.update_progress(self.processed_pages, self.total_pages, self.progress_message(started))
+    
+    def cancel_batch(self, file_futures, process_pool=None, prefetcher=None):
+        """停止时立即丢弃排队的文件；多进程模式下等待处理中的分块在页边界退出，超时则强制结束工作进程
+        
+        返回是否强制结束了工作进程。中断的文件保留检查点，重新运行时从最后完成的页继续
+        """
+        for future in file_futures:
+            future.cancel()
+        self.log_queue.put(f"已停止：{self.total_files - self.processed_files} 个文件未完成，处理中的文件不生成输出")
+        if prefetcher is not None:
+            prefetcher.close()
+        if process_pool is None:
+            return False
+        
+        process_pool.shutdown(wait=False, cancel_futures=True)
+        running = [future for future in file_futures if not future.done()]
+        if not running or not wait(running, timeout=CANCEL_GRACE_SECONDS).not_done:
+            return False
+        
+        # 之后的停止检查不再访问进程间Event：被强制结束的进程可能正持有它的锁
+        stopped = threading.Event()
+        stopped.set()
+        self.stop_event = stopped
+        # 只结束本进程池的工作进程：active_children只含仍在运行的子进程，不会误伤已退出进程的进程号
+        worker_pids = self.reported_worker_pids()
+        terminated = 0
+        for process in multiprocessing.active_children():
+            if process.pid in worker_pids:
+                process.terminate()
+                terminated += 1
+        if terminated:
+            self.log_queue.put(f"已强制结束 {terminated} 个未在 {CANCEL_GRACE_SECONDS:.0f} 秒内停止的工作进程")
+        return True
+    
+    def reported_worker_pids(self):
+        """取出工作进程启动时报告的进程号"""
+        worker_pids = set()
+        while True:
+            try:
+                worker_pids.add(self.worker_pid_queue.get_nowait())
+            except queue.Empty:
+                return worker_pids
+    
+    def write_metrics(self, batch):
+        """写出本批的性能统计报告，写出失败只记录日志"""
+        try:
+            report_path = self.metrics.write(self.metrics_dir, batch)
+        except OSError as e:
+            self.log_queue.put(f"✗ 写出性能统计失败: {str(e)}")
+            return
+        self.log_queue.put(f"性能统计: {report_path}")
+    
+    def progress_message(self, started):
+        """进度文字：已完成文件数，以及按已完成页数推算的剩余时间"""
+        message = f"处理中: {self.processed_files}/{self.total_files}"
+        remaining_pages = self.total_pages - self.processed_pages
+        if self.processed_pages and remaining_pages > 0:
+            elapsed = time.monotonic() - started
+            message += f"，预计剩余 {format_duration(elapsed * remaining_pages / self.processed_pages)}"
+        return message
+    
+    def finish_dataset(self, dataset):
+        """等待写入线程写完，将合并数据集替换为正式文件；写入失败或中途停止时保留原有数据集，返回False"""
+        try:
+            dataset.close(commit=self.is_running)
+        except RuntimeError as e:
+            self.log_queue.put(f"✗ {str(e)}")
+            return False
+        except OSError as e:
+            self.log_queue.put(f"✗ 合并数据集替换失败: {str(e)}")
+            return False
+        if not self.is_running:
+            self.log_queue.put(f"已停止：合并数据集未更新，保留原有的 {dataset.output_path}")
+            return False
+        if dataset.row_count:
+            self.log_queue.put(f"合并数据集: {dataset.output_path} "
+                               f"({dataset.source_count} 个文件, {dataset.row_count} 行数据)")
+        return True
+    
+    def forward_worker_logs(self, worker_log_queue):
+        """将工作进程的日志转发到本进程的日志队列"""
+        while True:
+            message = worker_log_queue.get()
+            if message is None:
+                break
+            self.log_queue.put(message)
+
+# 工作进程内的提取器实例，由_init_worker创建
+_worker_extractor = None
+
+def pdf_file_name(pdf):
+    """打开的PDF的文件名（从内存打开时取流的name）"""
+    return os.path.basename(str(pdf.path or getattr(pdf.stream, 'name', '')))
+
+def _init_worker(log_queue, stop_event, pid_queue=None):
+    """进程池初始化：在每个工作进程中创建提取器，并报告进程号"""
+    global _worker_extractor
+    _worker_extractor = PDFTableExtractor(log_queue, stop_event)
+    if pid_queue is not None:
+        pid_queue.put(os.getpid())
+
+def _extract_pages_task(pdf_path, first_page, last_page, max_empty_pages, memory_limit_mb=None, page_prefilter=True,
+                        adaptive_strategy=True, preferred_strategy=None, collect_metrics=False,
+                        backend=DEFAULT_BACKEND, skipped_strategies=()):
+    """在工作进程中提取PDF的一段页码范围（内存上限按每个工作进程计算）
+    
+    返回([(页码, 数据行)], 性能统计)，collect_metrics为False时性能统计为None
+    """
+    _worker_extractor.memory_limit_mb = memory_limit_mb
+    _worker_extractor.page_prefilter = page_prefilter
+    _worker_extractor.adaptive_strategy = adaptive_strategy
+    _worker_extractor.metrics = BatchMetrics() if collect_metrics else None
+    with open_pdf(pdf_path, backend) as pdf:
+        pages = _worker_extractor.extract_pages(pdf, first_page, last_page, max_empty_pages, preferred_strategy,
+                                                skipped_strategies)
+    return pages, _worker_extractor.metrics.snapshot() if collect_metrics else None
+
+def current_rss_mb():
+    """当前进程的常驻内存(MB)，无法获取时返回None"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+def release_document_cache(pdf):
+    """释放pdfminer文档级缓存（已解析的对象、字体），之后按需重新解析"""
+    for obj, attr in ((pdf.doc, '_cached_objs'), (pdf.doc, '_parsed_objs'), (pdf.rsrcmgr, '_cached_fonts')):
+        cache = getattr(obj, attr, None)
+        if cache is not None:
+            cache.clear()
+
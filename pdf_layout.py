@@ -0,0 +1,133 @@
+"""单页版面分析层：字符、线条、单词每页只计算一次，供多种提取策略共用"""
+from bisect import bisect_left
+
+from pdf_edges import premerged_table_settings
+
+
+class PageLayout:
+    """对提取后端页面（pdfplumber或pdf_backend.MinerPage）的共享分析结果
+
+    表格查找(TableFinder)只需要页面的 edges / bbox / extract_words，
+    因此本对象可以直接代替页面传入；其余属性转交给原页面。
+    """
+    def __init__(self, page):
+        self.page = page
+        self.bbox = page.bbox
+        self._chars = None
+        self._edges = None
+        self._explicit_edges = None
+        self._text = None
+        self._words = {}
+        self._char_index = None
+
+    @classmethod
+    def wrap(cls, page):
+        """已是PageLayout则原样返回，否则包装后端页面"""
+        return page if isinstance(page, cls) else cls(page)
+
+    def __getattr__(self, name):
+        return getattr(self.page, name)
+
+    @property
+    def chars(self):
+        if self._chars is None:
+            self._chars = self.page.chars
+        return self._chars
+
+    @property
+    def edges(self):
+        if self._edges is None:
+            self._edges = self.page.edges
+        return self._edges
+
+    @property
+    def explicit_edges(self):
+        """页面曲线与线条拆分成的边，作为线条策略的显式分隔线"""
+        if self._explicit_edges is None:
+            from pdfplumber.utils import obj_to_edges
+
+            self._explicit_edges = [edge for obj in self.page.curves + self.edges
+                                    for edge in obj_to_edges(obj)]
+        return self._explicit_edges
+
+    @property
+    def char_text(self):
+        """按内容流顺序直接拼接的字符文本（不做版面排列，用于页面预筛）"""
+        return ''.join(char["text"] for char in self.chars)
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.page.extract_text()
+        return self._text
+
+    def extract_words(self, **kwargs):
+        key = tuple(sorted(kwargs.items()))
+        if key not in self._words:
+            self._words[key] = self.page.extract_words(**kwargs)
+        return self._words[key]
+
+    @property
+    def words(self):
+        return self.extract_words()
+
+    def char_index(self):
+        """按字符垂直中点排序的索引，用于快速取出某一行范围内的字符"""
+        if self._char_index is None:
+            v_mids = [(char["top"] + char["bottom"]) / 2 for char in self.chars]
+            order = sorted(range(len(v_mids)), key=v_mids.__getitem__)
+            self._char_index = ([v_mids[i] for i in order], order)
+        return self._char_index
+
+    def chars_in_rows(self, top, bottom):
+        """垂直中点位于[top, bottom)内的字符，保持原始顺序"""
+        sorted_mids, order = self.char_index()
+        lo = bisect_left(sorted_mids, top)
+        hi = bisect_left(sorted_mids, bottom)
+        chars = self.chars
+        return [chars[i] for i in sorted(order[lo:hi])]
+
+    def extract_tables(self, table_settings=None):
+        """与page.extract_tables()结果一致，但共用本页已计算的字符和线条"""
+        from pdfplumber.table import TableFinder
+
+        # lines策略的边先批量合并，表格查找不再逐条吸附、连接
+        tset = premerged_table_settings(self, table_settings)
+        tables = TableFinder(self, tset).tables
+        return [self.extract_table(table, **(tset.text_settings or {})) for table in tables]
+
+    def extract_table(self, table, **kwargs):
+        """按pdfplumber Table.extract的规则取单元格文本，行内字符改用索引查找"""
+        from pdfplumber.utils import extract_text
+
+        def char_in_bbox(char, bbox):
+            v_mid = (char["top"] + char["bottom"]) / 2
+            h_mid = (char["x0"] + char["x1"]) / 2
+            x0, top, x1, bottom = bbox
+            return (h_mid >= x0) and (h_mid < x1) and (v_mid >= top) and (v_mid < bottom)
+
+        table_arr = []
+        for row in table.rows:
+            arr = []
+            row_bbox = row.bbox
+            row_chars = [char for char in self.chars_in_rows(row_bbox[1], row_bbox[3])
+                         if char_in_bbox(char, row_bbox)]
+
+            for cell in row.cells:
+                if cell is None:
+                    cell_text = None
+                else:
+                    cell_chars = [char for char in row_chars if char_in_bbox(char, cell)]
+
+                    if len(cell_chars):
+                        if "layout" in kwargs:
+                            kwargs["layout_width"] = cell[2] - cell[0]
+                            kwargs["layout_height"] = cell[3] - cell[1]
+                            kwargs["layout_bbox"] = cell
+                        cell_text = extract_text(cell_chars, **kwargs)
+                    else:
+                        cell_text = ""
+                arr.append(cell_text)
+            table_arr.append(arr)
+
+        return table_arr
@@ -0,0 +1,175 @@
+"""批量转换的性能统计：每页、每个策略调用及输出写出的耗时（墙钟与CPU），以及跳过的页和丢弃的行
+
+统计在提取所在的线程/工作进程中累计，工作进程的结果以dict随分块结果返回并合并；
+一批结束后输出JSON报告（按批次带时间戳）和Prometheus文本格式文件（固定文件名，
+可由node_exporter的textfile采集器读取）。
+"""
+import heapq
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_FILE = "pdf_metrics.prom"
+REPORT_PREFIX = "pdf_metrics"
+
+# 报告中保留的最慢页面数
+SLOWEST_PAGES = 20
+
+# 计数项：报告中总是列出（没有发生时为0）
+COUNTERS = (
+    "pages",                      # 完整提取的页数
+    "pages_skipped_prefilter",    # 预筛跳过的页数
+    "pages_empty",                # 没有数据的页数（含预筛跳过）
+    "rows_extracted",             # 各策略产出的数据行
+    "rows_dropped_house_number",  # 含屋號信息而丢弃的行
+    "rows_dropped_validation",    # 首列不是日期或缺少金额而丢弃的行
+    "rows_dropped_empty",         # 前11列全空而丢弃的行
+    "tables_skipped_no_header",   # 没有表头而整体跳过的表格
+)
+
+
+class BatchMetrics:
+    """线程安全的计时与计数"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        # {阶段: {名称: [调用次数, 墙钟秒数, CPU秒数, 单次最长墙钟秒数]}}
+        self.timings = {}
+        self.counters = {}
+        # {文件名: {"pages", "rows", "wall", "cpu"}}
+        self.files = {}
+        # 最慢的页面：[(墙钟秒数, 文件名, 页码, CPU秒数, 策略, 行数)]，小根堆
+        self.slowest = []
+
+    @contextmanager
+    def timed(self, stage, name=""):
+        """统计with块的墙钟与本线程CPU耗时"""
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.add_timing(stage, name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def add_timing(self, stage, name, wall, cpu, calls=1, max_wall=None):
+        with self.lock:
+            entry = self.timings.setdefault(stage, {}).setdefault(name, [0, 0.0, 0.0, 0.0])
+            entry[0] += calls
+            entry[1] += wall
+            entry[2] += cpu
+            entry[3] = max(entry[3], wall if max_wall is None else max_wall)
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_page(self, file_name, page_number, wall, cpu, strategy=None, rows=0):
+        """记录一页的总耗时（预筛与策略级联），更新文件汇总和最慢页面"""
+        self.add_timing("page", "", wall, cpu)
+        with self.lock:
+            self.add_file(file_name, {"pages": 1, "rows": rows, "wall": wall, "cpu": cpu})
+            self.push_slowest((wall, file_name, page_number, cpu, strategy or "", rows))
+
+    def add_file(self, file_name, totals):
+        entry = self.files.setdefault(file_name, {"pages": 0, "rows": 0, "wall": 0.0, "cpu": 0.0})
+        for key, value in totals.items():
+            entry[key] += value
+
+    def push_slowest(self, item):
+        if len(self.slowest) < SLOWEST_PAGES:
+            heapq.heappush(self.slowest, item)
+        elif item[0] > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, item)
+
+    def snapshot(self):
+        """可跨进程传递的统计数据"""
+        with self.lock:
+            return {
+                "timings": {stage: {name: list(entry) for name, entry in names.items()}
+                            for stage, names in self.timings.items()},
+                "counters": dict(self.counters),
+                "files": {name: dict(totals) for name, totals in self.files.items()},
+                "slowest": list(self.slowest),
+            }
+
+    def merge(self, snapshot):
+        """合并工作进程返回的统计数据"""
+        for stage, names in snapshot["timings"].items():
+            for name, (calls, wall, cpu, max_wall) in names.items():
+                self.add_timing(stage, name, wall, cpu, calls, max_wall)
+        for name, value in snapshot["counters"].items():
+            self.count(name, value)
+        with self.lock:
+            for file_name, totals in snapshot["files"].items():
+                self.add_file(file_name, totals)
+            for item in snapshot["slowest"]:
+                self.push_slowest(tuple(item))
+
+    def report(self, batch=None):
+        """JSON报告内容；batch为批次信息（文件数、成功失败数、总耗时等）"""
+        data = self.snapshot()
+        return {
+            "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "batch": batch or {},
+            "counters": {name: data["counters"].get(name, 0)
+                         for name in COUNTERS + tuple(sorted(set(data["counters"]) - set(COUNTERS)))},
+            "timings": [
+                {"stage": stage, "name": name, "calls": calls, "wall_seconds": round(wall, 6),
+                 "cpu_seconds": round(cpu, 6), "max_wall_seconds": round(max_wall, 6),
+                 "mean_wall_seconds": round(wall / calls, 6) if calls else 0.0}
+                for stage, names in sorted(data["timings"].items())
+                for name, (calls, wall, cpu, max_wall) in sorted(names.items())
+            ],
+            "files": [
+                {"file": file_name, "pages": totals["pages"], "rows": totals["rows"],
+                 "wall_seconds": round(totals["wall"], 6), "cpu_seconds": round(totals["cpu"], 6),
+                 "pages_per_second": round(totals["pages"] / totals["wall"], 3) if totals["wall"] else None}
+                for file_name, totals in sorted(data["files"].items(), key=lambda item: -item[1]["wall"])
+            ],
+            "slowest_pages": [
+                {"file": file_name, "page": page_number, "wall_seconds": round(wall, 6),
+                 "cpu_seconds": round(cpu, 6), "strategy": strategy, "rows": rows}
+                for wall, file_name, page_number, cpu, strategy, rows in sorted(data["slowest"], reverse=True)
+            ],
+        }
+
+    def prometheus_text(self, batch=None):
+        """Prometheus文本格式（exposition format 0.0.4）"""
+        data = self.snapshot()
+        lines = [
+            "# HELP pdf_stage_calls_total 各阶段的调用次数",
+            "# TYPE pdf_stage_calls_total counter",
+        ]
+        entries = [(stage, name, entry) for stage, names in sorted(data["timings"].items())
+                   for name, entry in sorted(names.items())]
+        for stage, name, (calls, _, _, _) in entries:
+            lines.append(f'pdf_stage_calls_total{{stage="{stage}",name="{name}"}} {calls}')
+        lines += ["# HELP pdf_stage_seconds_total 各阶段的累计耗时",
+                  "# TYPE pdf_stage_seconds_total counter"]
+        for stage, name, (_, wall, cpu, _) in entries:
+            lines.append(f'pdf_stage_seconds_total{{stage="{stage}",name="{name}",clock="wall"}} {wall:.6f}')
+            lines.append(f'pdf_stage_seconds_total{{stage="{stage}",name="{name}",clock="cpu"}} {cpu:.6f}')
+        lines += ["# HELP pdf_stage_max_seconds 各阶段单次调用的最长墙钟耗时",
+                  "# TYPE pdf_stage_max_seconds gauge"]
+        for stage, name, (_, _, _, max_wall) in entries:
+            lines.append(f'pdf_stage_max_seconds{{stage="{stage}",name="{name}"}} {max_wall:.6f}')
+        lines += ["# HELP pdf_events_total 页面与数据行的计数",
+                  "# TYPE pdf_events_total counter"]
+        for name in sorted(set(COUNTERS) | set(data["counters"])):
+            lines.append(f'pdf_events_total{{event="{name}"}} {data["counters"].get(name, 0)}')
+        for key, value in sorted((batch or {}).items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines += [f"# TYPE pdf_batch_{key} gauge", f"pdf_batch_{key} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, metrics_dir, batch=None):
+        """写出本批的JSON报告和Prometheus文件（先写临时文件再替换），返回JSON报告路径"""
+        os.makedirs(metrics_dir, exist_ok=True)
+        report_path = os.path.join(metrics_dir, f"{REPORT_PREFIX}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        for path, content in ((report_path, json.dumps(self.report(batch), ensure_ascii=False, indent=1)),
+                              (os.path.join(metrics_dir, METRICS_FILE), self.prometheus_text(batch))):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return report_path
@@ -0,0 +1,96 @@
+"""日期与金额规范化：按列批量解析，输出真正的日期、数值金额和货币代码
+
+(A)(B)(C)三个日期列解析为日期，(H)成交金额解析为数值和货币代码；
+整列一次性用pandas向量化处理，代替逐个单元格的正则匹配；同一列中重复的文本只解析一次。
+无法解析的值为空。
+"""
+# 日期列与金额列在数据行中的位置
+DATE_COLUMNS = (0, 1, 2)
+AMOUNT_COLUMN = 7
+
+# 规范化后追加的列
+TYPED_COLUMN_NAMES = ['(A)日期', '(B)日期', '(C)日期', '(H)金额', '(H)货币']
+
+# 日期的三种写法合并为一个正则，各分支的分组以序号区分：
+# 1. 年在前：2020/1/2、2020-1-2（分隔符须前后一致）
+# 2. 2020年1月2日
+# 3. 日在前（香港惯用的日/月/年）：2/1/2020、2-1-2020、2.1.2020
+DATE_PATTERN = (r'(?P<year1>\d{4})(?P<sep1>[/-])(?P<month1>\d{1,2})(?P=sep1)(?P<day1>\d{1,2})'
+                r'|(?P<year2>\d{4})年(?P<month2>\d{1,2})月(?P<day2>\d{1,2})日'
+                r'|(?<!\d)(?P<day3>\d{1,2})(?P<sep3>[/.-])(?P<month3>\d{1,2})(?P=sep3)(?P<year3>\d{4})')
+DATE_BRANCHES = 3
+
+# 金额：货币符号在前（HK$1,234,000、USD 500,000）或单位在后（300万元、1,234.5美元）
+AMOUNT_PREFIX_PATTERN = r'(?P<currency>HK\$|US\$|USD|HKD|\$)\s*(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<unit>万|亿)?'
+AMOUNT_SUFFIX_PATTERN = r'(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<unit>万|亿)?\s*(?P<currency>美元|港币|港元|元)'
+
+# 货币代码：成交纪录中的$和元均指港币
+CURRENCY_CODES = {
+    'HK$': 'HKD', 'HKD': 'HKD', '$': 'HKD', '港币': 'HKD', '港元': 'HKD', '元': 'HKD',
+    'US$': 'USD', 'USD': 'USD', '美元': 'USD',
+}
+UNIT_MULTIPLIERS = {'万': 10000, '亿': 100000000}
+
+
+def unique_text(values):
+    """返回(每个值在去重结果中的位置, 去重后的文本Series)"""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object).fillna('').astype(str))
+    return codes, pd.Series(uniques, dtype=object)
+
+
+def parse_dates(values):
+    """将一列日期文本解析为datetime64，无法解析（含非法日期）的为NaT"""
+    import pandas as pd
+
+    codes, text = unique_text(values)
+    found = text.str.extract(DATE_PATTERN)
+    parts = {}
+    for field in ('year', 'month', 'day'):
+        column = found[f'{field}1']
+        for branch in range(2, DATE_BRANCHES + 1):
+            column = column.fillna(found[f'{field}{branch}'])
+        parts[field] = column.astype(float)
+    dates = pd.to_datetime(pd.DataFrame(parts), errors='coerce')
+    return pd.Series(dates.to_numpy()[codes])
+
+
+def parse_amounts(values):
+    """将一列金额文本解析为(数值, 货币代码)两列，无法解析的为空"""
+    import pandas as pd
+
+    codes, text = unique_text(values)
+    # 每行整体取一个匹配（优先货币符号在前的写法），数值、单位和货币不能来自不同的匹配
+    prefix = text.str.extract(AMOUNT_PREFIX_PATTERN)
+    found = prefix.where(prefix['number'].notna(), text.str.extract(AMOUNT_SUFFIX_PATTERN))
+    number = pd.to_numeric(found['number'].str.replace(',', '', regex=False), errors='coerce')
+    amount = number * found['unit'].map(UNIT_MULTIPLIERS).fillna(1)
+    currency = found['currency'].map(CURRENCY_CODES)
+    return pd.Series(amount.to_numpy()[codes]), pd.Series(currency.to_numpy()[codes])
+
+
+def normalize_columns(columns):
+    """输入按列组织的数据行，返回[(A)日期, (B)日期, (C)日期, 金额, 货币代码]五列(pandas.Series)"""
+    typed = [parse_dates(columns[idx]) for idx in DATE_COLUMNS]
+    typed.extend(parse_amounts(columns[AMOUNT_COLUMN]))
+    return typed
+
+
+def normalize_rows(rows):
+    """在每行末尾追加规范化后的日期(datetime.date)、金额(int/float)和货币代码，缺失值为None"""
+    if not rows:
+        return rows
+    columns = [[row[idx] for row in rows] for idx in range(AMOUNT_COLUMN + 1)]
+    dates_a, dates_b, dates_c, amount, currency = normalize_columns(columns)
+
+    typed_columns = [to_python_dates(dates) for dates in (dates_a, dates_b, dates_c)]
+    typed_columns.append([None if value != value else int(value) if value.is_integer() else value
+                          for value in amount.tolist()])
+    typed_columns.append(currency.astype(object).where(currency.notna(), None).tolist())
+    return [list(row) + list(typed) for row, typed in zip(rows, zip(*typed_columns))]
+
+
+def to_python_dates(dates):
+    mask = dates.notna()
+    return dates.dt.date.astype(object).where(mask, None).tolist()
@@ -0,0 +1,159 @@
+"""批量转换的流水线阶段：预读PDF、提取、写出三段重叠进行
+
+预读线程按处理顺序提前把后续PDF读入内存（同时计算内容哈希），已读入、尚未开始解析的量受内存上限
+和文件数约束；文件开始解析时即让出额度，预读不限制同时处理的文件数；
+提取线程/工作进程只做解析；写出线程逐个完成输出文件（Excel序列化、原子替换），
+队列有上限，写出跟不上时提交方等待，避免积压的临时数据无限增长。
+"""
+import hashlib
+import io
+import queue
+import threading
+from concurrent.futures import Future
+
+# 预读的内存上限(MB)与最多提前读入的文件数（批量转换时不少于工作线程数）
+DEFAULT_PREFETCH_MB = 256
+DEFAULT_PREFETCH_FILES = 8
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class PrefetchedFile:
+    """预读结果：data为文件内容（超过内存上限时为None，只计算了哈希并预热了系统缓存）"""
+    def __init__(self, path, data, sha256):
+        self.path = path
+        self.data = data
+        self.sha256 = sha256
+        self.size = len(data) if data is not None else 0
+
+    def open_stream(self):
+        """返回可交给pdfplumber.open的输入：已读入内存时为BytesIO，否则为路径"""
+        if self.data is None:
+            return self.path
+        stream = io.BytesIO(self.data)
+        stream.name = self.path
+        return stream
+
+
+class PdfPrefetcher:
+    """预读线程：按文件列表顺序读入，已读入、尚未被取走的总量不超过max_bytes"""
+    def __init__(self, pdf_files, max_mb=DEFAULT_PREFETCH_MB, max_files=DEFAULT_PREFETCH_FILES, stop_event=None):
+        self.pdf_files = list(pdf_files)
+        self.file_set = set(self.pdf_files)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_files = max_files
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+        self.condition = threading.Condition()
+        # 已读入、尚未被取走的文件：{路径: PrefetchedFile}
+        self.ready = {}
+        # 已读入、尚未被取走的字节数与文件数
+        self.held_bytes = 0
+        self.held_files = 0
+        self.closed = False
+        self.finished = set()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def run(self):
+        for pdf_file in self.pdf_files:
+            with self.condition:
+                # 等待已读入的文件被取走，留出内存；当前没有占用时总是允许读入（单个大文件）
+                while not self.closed and self.held_files and (
+                        self.held_files >= self.max_files or self.held_bytes >= self.max_bytes):
+                    self.condition.wait(0.5)
+                if self.closed or self.stop_event.is_set():
+                    break
+            prefetched = self.read_file(pdf_file)
+            with self.condition:
+                self.ready[pdf_file] = prefetched
+                self.finished.add(pdf_file)
+                self.held_bytes += prefetched.size
+                self.held_files += 1
+                self.condition.notify_all()
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def read_file(self, pdf_file):
+        """读入文件并计算SHA-256；超过内存上限的文件只计算哈希，不保留内容"""
+        digest = hashlib.sha256()
+        keep = self.max_bytes > 0
+        blocks = []
+        size = 0
+        try:
+            with open(pdf_file, 'rb') as f:
+                for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+                    # 已关闭（停止）时不再读完大文件
+                    if self.closed:
+                        return PrefetchedFile(pdf_file, None, None)
+                    digest.update(block)
+                    size += len(block)
+                    if keep:
+                        blocks.append(block)
+                        if size > self.max_bytes:
+                            keep = False
+                            blocks = []
+        except OSError:
+            # 读取失败交给提取阶段按原路径处理并报告错误
+            return PrefetchedFile(pdf_file, None, None)
+        return PrefetchedFile(pdf_file, b''.join(blocks) if keep else None, digest.hexdigest())
+
+    def take(self, pdf_file):
+        """取出预读结果，未读到时等待；预读已停止或不在列表中时返回None
+        
+        取出即释放该文件占用的预读额度：文件随即开始解析，内容由解析方持有到处理完，
+        预读线程可以继续读入后面的文件，同时处理的文件数只受工作线程数限制
+        """
+        with self.condition:
+            while pdf_file not in self.ready:
+                if self.closed or pdf_file not in self.file_set or pdf_file in self.finished:
+                    return None
+                self.condition.wait(0.5)
+            prefetched = self.ready.pop(pdf_file)
+            self.held_bytes -= prefetched.size
+            self.held_files -= 1
+            self.condition.notify_all()
+            return prefetched
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.ready.clear()
+            self.condition.notify_all()
+        self.thread.join()
+
+
+class OutputStage:
+    """写出线程：按提交顺序逐个执行输出任务，返回Future；队列已满时提交方等待"""
+    def __init__(self, max_pending=4):
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def submit(self, func, *args):
+        future = Future()
+        self.pending.put((future, func, args))
+        return future
+
+    def run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            future, func, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def close(self):
+        """等待已提交的任务全部完成"""
+        if self.thread.is_alive():
+            self.pending.put(None)
+            self.thread.join()
@@ -0,0 +1,301 @@
+"""多机分布式批量转换：共享卷上的SQLite任务队列，各主机上任意数量的工作进程按租约领取文件
+
+每个文件一行（按文件名，各主机挂载路径可以不同）：状态、持有者、租约到期时间、领取令牌。
+- 领取: 在写事务中取一个待处理或租约已过期的文件（按估计页数从大到小），令牌加1
+- 心跳: 持有期间定时延长租约；工作进程退出或失联后租约过期，文件由其他进程重新领取
+- 提交: 输出先写到以令牌命名的暂存文件，在写事务中确认令牌仍有效后才替换为正式文件并标记完成；
+  租约已被他人接手的旧进程提交失败并删除暂存文件，同一文件的输出只提交一次
+文件的大小或修改时间变化后重新加入队列时令牌同样加1，正在处理旧内容的进程无法提交。
+SQLite依赖文件锁，共享卷需支持（NFS需开启锁服务）。
+"""
+import glob
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from pdf_engine import COLUMN_NAMES
+from pdf_schedule import estimate_pages
+
+# 租约时长（秒），心跳每隔其三分之一续租一次
+DEFAULT_LEASE_SECONDS = 60.0
+# 同一文件租约过期（持有者失联）超过该次数后标记为失败，避免反复拖垮工作进程
+MAX_ATTEMPTS = 3
+# 等待数据库锁的时间（秒）
+LOCK_TIMEOUT = 30.0
+# 没有可领取的文件、但还有别人持有租约时，再次检查的间隔（秒）
+IDLE_SECONDS = 2.0
+
+FILE_PENDING = "pending"
+FILE_LEASED = "leased"
+FILE_DONE = "done"
+FILE_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime REAL,
+    pages INTEGER,
+    state TEXT NOT NULL,
+    worker TEXT,
+    lease_until REAL,
+    token INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    output TEXT,
+    message TEXT,
+    updated_at REAL
+)
+"""
+
+
+class JobQueue:
+    """共享的文件队列，每个操作在单独的连接和写事务中完成，可跨线程、进程和主机使用"""
+    def __init__(self, db_path, lease_seconds=DEFAULT_LEASE_SECONDS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        with self.transaction() as conn:
+            conn.execute(SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        """写事务：BEGIN IMMEDIATE 先取得写锁，领取和提交不会与其他进程交错"""
+        conn = sqlite3.connect(self.db_path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def enqueue(self, pdf_files):
+        """加入队列；已在队列中的文件大小或修改时间变化时重新待处理，返回新加入或重置的文件数
+
+        每个工作进程启动时都会调用：只为不在队列中或有变化的文件估计页数（读取共享卷上的文件内容），
+        其余文件只需stat
+        """
+        now = time.time()
+        known = self.known_files()
+        rows = []
+        for pdf_file in pdf_files:
+            try:
+                stat = os.stat(pdf_file)
+            except OSError:
+                continue
+            name = os.path.basename(pdf_file)
+            if known.get(name) == (stat.st_size, stat.st_mtime):
+                continue
+            rows.append((name, stat.st_size, stat.st_mtime, estimate_pages(pdf_file), FILE_PENDING, now))
+        if not rows:
+            return 0
+        with self.transaction() as conn:
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT INTO files (name, size, mtime, pages, state, updated_at) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    size = excluded.size, mtime = excluded.mtime, pages = excluded.pages,
+                    state = excluded.state, worker = NULL, lease_until = NULL, token = token + 1,
+                    attempts = 0, output = NULL, message = NULL, updated_at = excluded.updated_at
+                WHERE size != excluded.size OR mtime != excluded.mtime
+            """, rows)
+            return conn.total_changes - before
+
+    def known_files(self):
+        """队列中各文件的{文件名: (大小, 修改时间)}；只读，不取写锁"""
+        conn = sqlite3.connect(self.db_path, timeout=LOCK_TIMEOUT)
+        try:
+            return {name: (size, mtime) for name, size, mtime in conn.execute("SELECT name, size, mtime FROM files")}
+        finally:
+            conn.close()
+
+    def claim(self, worker):
+        """领取一个文件，返回(文件名, 令牌)；没有可领取的文件时返回None"""
+        now = time.time()
+        with self.transaction() as conn:
+            # 持有者失联次数过多的文件不再领取
+            conn.execute("UPDATE files SET state = ?, message = ?, updated_at = ? "
+                         "WHERE state = ? AND lease_until < ? AND attempts >= ?",
+                         (FILE_FAILED, f"租约过期 {MAX_ATTEMPTS} 次，不再重试", now, FILE_LEASED, now, MAX_ATTEMPTS))
+            row = conn.execute("SELECT name, token FROM files WHERE state = ? OR (state = ? AND lease_until < ?) "
+                               "ORDER BY pages DESC, name LIMIT 1", (FILE_PENDING, FILE_LEASED, now)).fetchone()
+            if row is None:
+                return None
+            name, token = row[0], row[1] + 1
+            conn.execute("UPDATE files SET state = ?, worker = ?, lease_until = ?, token = ?, "
+                         "attempts = attempts + 1, updated_at = ? WHERE name = ?",
+                         (FILE_LEASED, worker, now + self.lease_seconds, token, now, name))
+            return name, token
+
+    def heartbeat(self, name, token):
+        """延长租约，租约已失效（被他人接手或文件已重新入队）时返回False"""
+        now = time.time()
+        with self.transaction() as conn:
+            cursor = conn.execute("UPDATE files SET lease_until = ?, updated_at = ? "
+                                  "WHERE name = ? AND token = ? AND state = ?",
+                                  (now + self.lease_seconds, now, name, token, FILE_LEASED))
+            return cursor.rowcount == 1
+
+    def commit(self, name, token, success, message, staged_file=None, output_file=None):
+        """令牌仍有效时把暂存文件替换为正式输出并标记完成，返回是否提交成功；失败时删除暂存文件"""
+        with self.transaction() as conn:
+            row = conn.execute("SELECT token, state FROM files WHERE name = ?", (name,)).fetchone()
+            committed = row is not None and row[0] == token and row[1] == FILE_LEASED
+            if committed:
+                # 在写事务中替换，持有更新令牌的进程要等本事务结束才能提交
+                if staged_file is not None:
+                    os.replace(staged_file, output_file)
+                conn.execute("UPDATE files SET state = ?, worker = NULL, lease_until = NULL, output = ?, "
+                             "message = ?, updated_at = ? WHERE name = ?",
+                             (FILE_DONE if success else FILE_FAILED,
+                              output_file if staged_file is not None else None, message, time.time(), name))
+        if not committed and staged_file is not None:
+            remove_file(staged_file)
+        return committed
+
+    def release(self, name, token):
+        """停止时交还未完成的文件，其他进程无需等待租约过期即可领取"""
+        with self.transaction() as conn:
+            conn.execute("UPDATE files SET state = ?, worker = NULL, lease_until = NULL, "
+                         "attempts = MAX(attempts - 1, 0), updated_at = ? WHERE name = ? AND token = ? AND state = ?",
+                         (FILE_PENDING, time.time(), name, token, FILE_LEASED))
+
+    def counts(self):
+        """{状态: 文件数}"""
+        with self.transaction() as conn:
+            return dict(conn.execute("SELECT state, COUNT(*) FROM files GROUP BY state").fetchall())
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class QueueWorker:
+    """从共享队列领取文件并转换，直到队列中没有待处理或被他人持有的文件
+
+    本机用max_workers个线程同时处理（传入进程池时页面提取在工作进程中进行），
+    一个心跳线程为本机持有的所有租约续租。
+    """
+    def __init__(self, extractor, job_queue, pdf_folder, output_folder, start_page=2, max_workers=1,
+                 process_pool=None, output_format="xlsx"):
+        self.extractor = extractor
+        self.queue = job_queue
+        self.pdf_folder = pdf_folder
+        self.output_folder = output_folder
+        self.start_page = start_page
+        self.max_workers = max_workers
+        self.process_pool = process_pool
+        self.output_format = output_format
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        # 本机持有的租约 {文件名: 令牌}
+        self.leases = {}
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.success_count = 0
+        self.failed_count = 0
+
+    def run(self):
+        """领取并处理文件直到队列处理完或停止"""
+        log = self.extractor.log_queue
+        added = self.queue.enqueue([os.path.join(self.pdf_folder, name) for name in os.listdir(self.pdf_folder)
+                                    if name.endswith(".pdf")])
+        log.put(f"工作进程 {self.worker_id} 加入队列 {self.queue.db_path}（新加入 {added} 个文件）")
+        os.makedirs(self.output_folder, exist_ok=True)
+        heartbeat = threading.Thread(target=self.heartbeat_loop, daemon=True)
+        heartbeat.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(self.claim_loop) for _ in range(self.max_workers)]
+                try:
+                    for future in futures:
+                        future.result()
+                except BaseException:
+                    # 中断（如Ctrl+C）按停止处理，处理中的文件在当前页后中断
+                    self.extractor.is_running = False
+                    raise
+        finally:
+            self.done.set()
+            heartbeat.join()
+            # 停止或出错时交还仍持有的文件
+            with self.lock:
+                leases = list(self.leases.items())
+            for name, token in leases:
+                self.queue.release(name, token)
+        counts = self.queue.counts()
+        log.put(f"本机完成 {self.success_count} 个文件，失败 {self.failed_count} 个；队列状态: "
+                + ", ".join(f"{state} {count}" for state, count in sorted(counts.items())))
+
+    def claim_loop(self):
+        while self.extractor.is_running:
+            claimed = self.queue.claim(self.worker_id)
+            if claimed is None:
+                counts = self.queue.counts()
+                if not counts.get(FILE_PENDING) and not counts.get(FILE_LEASED):
+                    return
+                # 其他进程还持有租约：等待其完成，或租约过期后接手
+                self.done.wait(IDLE_SECONDS)
+                continue
+            name, token = claimed
+            with self.lock:
+                self.leases[name] = token
+            try:
+                self.process_file(name, token)
+            finally:
+                with self.lock:
+                    self.leases.pop(name, None)
+
+    def heartbeat_loop(self):
+        while not self.done.wait(self.queue.lease_seconds / 3):
+            with self.lock:
+                leases = list(self.leases.items())
+            for name, token in leases:
+                try:
+                    alive = self.queue.heartbeat(name, token)
+                except sqlite3.Error as e:
+                    self.extractor.log_queue.put(f"续租 {name} 失败: {str(e)}")
+                    continue
+                if not alive:
+                    self.extractor.log_queue.put(f"{name} 的租约已被接手，处理结果将不会提交")
+
+    def process_file(self, name, token):
+        """转换一个文件：输出写到暂存文件，提交时才替换为正式文件"""
+        extractor = self.extractor
+        pdf_file = os.path.join(self.pdf_folder, name)
+        output_file = os.path.join(self.output_folder, f"{os.path.splitext(name)[0]}.{self.output_format}")
+        staged_file = f"{output_file}.{token}.staged"
+        # 之前的持有者失联时留下的暂存文件
+        for stale_file in glob.glob(glob.escape(output_file) + ".*.staged*"):
+            remove_file(stale_file)
+        try:
+            page_results = extractor.iter_pages_with_cache(pdf_file, self.start_page, self.process_pool)
+            rows = extractor.iter_clean_rows(pdf_file, page_results)
+            row_count = extractor.save_rows(rows, COLUMN_NAMES, staged_file, self.output_format)
+        except Exception as e:
+            message = f"✗ 处理文件 {name} 时出错: {str(e)}"
+            success = False
+            row_count = 0
+        else:
+            if not extractor.is_running:
+                # 中途停止：不提交，由run交还租约
+                return
+            message, success = extractor.conversion_result(pdf_file, row_count)
+        committed = self.queue.commit(name, token, success, message,
+                                      staged_file if row_count else None, output_file)
+        if not committed:
+            extractor.log_queue.put(f"{name} 已由其他工作进程接手，丢弃本次结果")
+            return
+        extractor.log_queue.put(message)
+        with self.lock:
+            if success:
+                self.success_count += 1
+            else:
+                self.failed_count += 1
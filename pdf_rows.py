@@ -0,0 +1,136 @@
+"""表格行分类：表头、屋號、日期、金额的判断规则只编译一次，整张表一次完成分类
+
+原做法逐行调用 is_header_row / contains_house_number / is_valid_date，每次重建模式列表、
+重新拼接行文本并分别搜索；判断表头结构和查找表头行时前三行的表头判断还要重复一遍。
+这里每张表按需各拼接一次：各行文本以分隔符连成一个字符串，每种规则整表只搜索一次，
+再按匹配位置落到对应的行（屋號行很少，通常整表一次搜索即可确定所有行都不是）；
+分隔符不会出现在任何匹配中，与逐行判断的结果完全相同。表头只在前三行中查找一次。
+"""
+import re
+
+# 日期、金额的识别规则：任一模式出现即视为有效，合并为一个预编译的正则
+DATE_PATTERN = re.compile('|'.join([
+    r'\d{1,2}/\d{1,2}/\d{4}', r'\d{1,2}-\d{1,2}-\d{4}',
+    r'\d{4}/\d{1,2}/\d{1,2}', r'\d{4}-\d{1,2}-\d{1,2}',
+    r'\d{4}年\d{1,2}月\d{1,2}日', r'\d{1,2}\.\d{1,2}\.\d{4}',
+]))
+AMOUNT_PATTERN = re.compile('|'.join([
+    r'\$[\d,]+', r'USD\s*[\d,]+', r'HKD\s*[\d,]+',
+    r'HK\$[\d,]+', r'[\d,]+\.?\d*\s*(美元|港币|元)',
+]))
+
+# 表头单元格：(A)–(H)列标识（去掉首尾空白后完全相同）
+HEADER_CELLS = frozenset(f"({letter})" for letter in "ABCDEFGH")
+# 一行中至少有这么多个列标识才是表头行
+HEADER_MIN_COLUMNS = 3
+# 表头须出现在表格的前几行
+HEADER_SEARCH_ROWS = 3
+# 从表头行起跳过的行数（表头行 + 两行说明）
+HEADER_SKIP_ROWS = 3
+
+# 屋號信息行的标识
+HOUSE_NUMBER_MARKERS = ('屋號', 'House number', '屋名', 'Name of the house')
+HOUSE_NUMBER_PATTERN = re.compile('|'.join(map(re.escape, HOUSE_NUMBER_MARKERS)))
+
+# 整表拼接时的行分隔符：不会出现在屋號标识和日期的匹配中
+ROW_SEPARATOR = '\x00'
+
+
+def cell_text(cell):
+    return str(cell) if cell is not None else ''
+
+
+def row_text(row):
+    """各单元格（None为空字符串）以空格连接；单元格通常都是字符串，直接连接"""
+    try:
+        return ' '.join(row) if None not in row else ' '.join(['' if cell is None else cell for cell in row])
+    except TypeError:
+        return ' '.join(map(cell_text, row))
+
+
+def is_header_row(row):
+    """至少有HEADER_MIN_COLUMNS个单元格是(A)–(H)列标识"""
+    if not row:
+        return False
+    return sum(1 for cell in row if cell is not None and str(cell).strip() in HEADER_CELLS) >= HEADER_MIN_COLUMNS
+
+
+def contains_house_number(row):
+    """行（各单元格以空格连接）中含有屋號信息"""
+    if not row:
+        return False
+    return HOUSE_NUMBER_PATTERN.search(row_text(row)) is not None
+
+
+def is_valid_data_row(row):
+    """非空单元格连接后同时含有日期和金额"""
+    if not any(cell for cell in row):
+        return False
+    row_text = ' '.join(str(cell) for cell in row if cell)
+    return DATE_PATTERN.search(row_text) is not None and AMOUNT_PATTERN.search(row_text) is not None
+
+
+def find_header_row(table):
+    """表头行的下标：只在前HEADER_SEARCH_ROWS行中查找，不足这么多行或没有表头时返回None"""
+    if not table or len(table) < HEADER_SEARCH_ROWS:
+        return None
+    for row_idx in range(HEADER_SEARCH_ROWS):
+        if is_header_row(table[row_idx]):
+            return row_idx
+    return None
+
+
+def matched_rows(pattern, texts):
+    """各文本中是否有pattern的匹配：文本以分隔符连成一个字符串后只搜索一次，
+    匹配所在的文本由其之前的分隔符个数确定；文本本身含有分隔符时逐个搜索"""
+    joined = ROW_SEPARATOR.join(texts)
+    if joined.count(ROW_SEPARATOR) != max(len(texts) - 1, 0):
+        return [pattern.search(text) is not None for text in texts]
+    flags = [False] * len(texts)
+    row_idx = 0
+    position = 0
+    for match in pattern.finditer(joined):
+        row_idx += joined.count(ROW_SEPARATOR, position, match.start())
+        position = match.start()
+        flags[row_idx] = True
+    return flags
+
+
+class TableRows:
+    """一张表的行分类结果，各项在首次使用时整表一次算出
+
+    header_index: 表头行的下标，前HEADER_SEARCH_ROWS行中没有表头（或不足三行）时为None
+    filled: 各行是否有非None的单元格
+    house_number: 各行是否含有屋號信息
+    first_cell_date: 各行首个单元格是否含有日期
+    """
+    def __init__(self, table):
+        self.table = table
+        self.header_index = find_header_row(table)
+        self._filled = None
+        self._house_number = None
+        self._first_cell_date = None
+
+    @property
+    def data_start(self):
+        """有表头时数据行的起始下标（跳过表头行及其后两行）"""
+        return self.header_index + HEADER_SKIP_ROWS
+
+    @property
+    def filled(self):
+        if self._filled is None:
+            self._filled = [row.count(None) != len(row) for row in self.table]
+        return self._filled
+
+    @property
+    def house_number(self):
+        if self._house_number is None:
+            self._house_number = matched_rows(HOUSE_NUMBER_PATTERN, [row_text(row) for row in self.table])
+        return self._house_number
+
+    @property
+    def first_cell_date(self):
+        if self._first_cell_date is None:
+            self._first_cell_date = matched_rows(DATE_PATTERN, [str(row[0]) if row and row[0] is not None else ''
+                                                                for row in self.table])
+        return self._first_cell_date
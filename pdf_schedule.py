@@ -0,0 +1,123 @@
+"""批量转换的调度：按估计页数从大到小分派文件，进度和剩余时间按页数加权
+
+一批文件中如果最大的一份排在最后，整批都要等它单独处理完；先处理大文件，
+小文件填补各工作单元的空闲，整批耗时接近最大文件与平均负载中的较大者。
+页数从trailer的/Root所指目录中/Pages页面树根的/Count读取；目录或页面树根在压缩的对象流中时，
+取/Type /Pages字典中最大的/Count，都读不到时按文件大小估算。
+书签(/Outlines)等字典中的/Count不是页数，增量更新前的旧页面树也不采用。
+"""
+import mmap
+import os
+import re
+
+# trailer（或交叉引用流）中的/Root、目录中的/Pages引用，以及页面树节点
+ROOT_PATTERN = re.compile(rb'/Root\s+(\d+)\s+(\d+)\s+R')
+PAGES_REF_PATTERN = re.compile(rb'/Pages\s+(\d+)\s+(\d+)\s+R')
+PAGES_TYPE_PATTERN = re.compile(rb'/Type\s*/Pages(?![A-Za-z])')
+COUNT_PATTERN = re.compile(rb'/Count\s+(\d+)')
+
+# 先只扫描文件头尾各1MB，页面树通常在其中（线性化文件在开头，多数生成器在末尾）
+SCAN_WINDOW = 1024 * 1024
+
+# 读不到页数时按每页约40KB估算
+BYTES_PER_PAGE = 40 * 1024
+
+
+def read_page_count(pdf_file):
+    """从页面树读取页数，读不到时返回None"""
+    try:
+        with open(pdf_file, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                windows = [(0, min(size, SCAN_WINDOW))]
+                if size > SCAN_WINDOW:
+                    windows.append((max(size - SCAN_WINDOW, SCAN_WINDOW), size))
+                pages = page_count_in(data, windows)
+                if pages is None and size > 2 * SCAN_WINDOW:
+                    pages = page_count_in(data, [(0, size)])
+    except (OSError, ValueError):
+        return None
+    return pages
+
+
+def page_count_in(data, ranges):
+    """从文件内容中按文件顺序排列的若干区段[(起, 止)]读取页数，读不到时返回None
+
+    只按偏移查找，不复制对象内容；各模式都以字面文字开头，整个文件扫描一遍也很快
+    """
+    root = last_match(ROOT_PATTERN, data, ranges)
+    if root is not None:
+        catalog = object_span(data, ranges, root.group(1), root.group(2))
+        pages_ref = PAGES_REF_PATTERN.search(data, *catalog) if catalog is not None else None
+        if pages_ref is not None:
+            page_tree = object_span(data, ranges, pages_ref.group(1), pages_ref.group(2))
+            count = COUNT_PATTERN.search(data, *page_tree) if page_tree is not None else None
+            if count is not None:
+                return int(count.group(1))
+
+    # 目录或页面树根在对象流中：页面树各节点中根节点的/Count最大
+    counts = []
+    for start, end in ranges:
+        for match in PAGES_TYPE_PATTERN.finditer(data, start, end):
+            body_start = max(data.rfind(b'obj', start, match.start()), start)
+            body_end = data.find(b'endobj', match.end(), end)
+            count = COUNT_PATTERN.search(data, body_start, end if body_end == -1 else body_end)
+            if count is not None:
+                counts.append(int(count.group(1)))
+    return max(counts) if counts else None
+
+
+def last_match(pattern, data, ranges):
+    """各区段中最后一处匹配，没有时返回None"""
+    last = None
+    for start, end in ranges:
+        for last in pattern.finditer(data, start, end):
+            pass
+    return last
+
+
+def object_span(data, ranges, number, generation):
+    """间接对象最后一次定义（增量更新以后出现的为准）的内容区段(起, 止)，找不到时返回None"""
+    header = re.compile(rb'%s\s+%s\s+obj\b' % (number, generation))
+    span = None
+    for start, end in ranges:
+        for match in header.finditer(data, start, end):
+            # 排除 "12 0 obj" 匹配到 "112 0 obj" 的后半
+            if match.start() > 0 and data[match.start() - 1:match.start()].isdigit():
+                continue
+            body_end = data.find(b'endobj', match.end(), end)
+            span = match.end(), end if body_end == -1 else body_end
+    return span
+
+
+def estimate_pages(pdf_file):
+    """估计文件的页数（至少为1），用作调度和进度的权重"""
+    pages = read_page_count(pdf_file)
+    if pages:
+        return pages
+    try:
+        size = os.path.getsize(pdf_file)
+    except OSError:
+        return 1
+    return max(1, round(size / BYTES_PER_PAGE))
+
+
+def schedule_largest_first(pdf_files):
+    """返回按估计页数从大到小排列的[(文件, 估计页数)]，页数相同时按文件名"""
+    schedule = [(pdf_file, estimate_pages(pdf_file)) for pdf_file in pdf_files]
+    schedule.sort(key=lambda item: (-item[1], item[0]))
+    return schedule
+
+
+def format_duration(seconds):
+    """剩余时间的显示文字"""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}秒"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}分{seconds:02d}秒"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}小时{minutes:02d}分"
@@ -0,0 +1,401 @@
+"""本地转换服务：常驻进程保持预热的提取工作进程，通过HTTP（或Unix套接字）提交和查询任务
+
+每次运行命令行都要启动解释器、导入pdfplumber并创建进程池；服务启动时做完这些，
+之后每个任务只需解析PDF本身。任务接口（JSON）:
+
+    POST /jobs                  {"path": "...pdf", "start_page": 2, "output_format": "xlsx", "output_dir": "..."}
+                                提交任务，返回 {"id": ..., "status": "queued"}；不指定output_format时只提取数据行
+    GET  /jobs/<id>[?wait=秒]   任务状态；指定wait时等到任务结束或超时再返回
+    GET  /jobs/<id>/events      按行推送状态变化（JSON Lines），任务结束后关闭连接
+    GET  /jobs/<id>/rows        任务完成后返回 {"columns": [...], "rows": [[...], ...]}
+                                （已结束任务的数据行总数超出上限时，最早结束的任务的数据行被丢弃，返回410）
+    GET  /jobs/<id>/output      任务完成后下载输出文件
+    GET  /health                工作进程数和各状态的任务数
+
+用法: python pdf_service.py [--port 8765 | --unix-socket /tmp/pdf_service.sock] [-j 4] [--mode process|thread]
+默认只监听127.0.0.1。
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import socketserver
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, quote
+
+from pdf_engine import PDFTableExtractor, DEFAULT_WORKERS, OUTPUT_FORMATS, COLUMN_NAMES
+from pdf_cache import ResultCache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE_MB
+from pdf_strategy import StrategyProfiles
+from pdf_backend import BACKENDS, DEFAULT_BACKEND
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# 保留的已结束任务数，超出时丢弃最早结束的任务（连同其数据行）
+MAX_FINISHED_JOBS = 200
+# 已结束任务保留的数据行总数，超出时从最早结束的任务起丢弃数据行（任务状态仍可查询）
+MAX_RETAINED_ROWS = 100000
+# GET /jobs/<id>?wait= 的最长等待时间（秒）
+MAX_WAIT_SECONDS = 60.0
+# 状态推送检查页数进度的间隔（秒）
+EVENT_INTERVAL = 0.5
+
+JOB_PATH_PATTERN = re.compile(r'^/jobs/([0-9a-f]{32})(/rows|/output|/events)?$')
+
+
+def _warm_worker():
+    """预热工作进程：导入pdfplumber，之后的任务不再承担导入开销"""
+    import pdfplumber  # noqa: F401
+    return os.getpid()
+
+
+class Job:
+    """一个转换任务；状态变化时通知等待者"""
+    def __init__(self, path, start_page=2, output_format=None, output_dir=None):
+        self.id = uuid.uuid4().hex
+        self.path = path
+        self.start_page = start_page
+        self.output_format = output_format
+        self.output_dir = output_dir
+        self.status = JOB_QUEUED
+        self.message = None
+        self.rows = None
+        self.row_count = None
+        self.output = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.condition = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def update(self, **changes):
+        with self.condition:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self.condition.notify_all()
+
+    def to_dict(self, pages_done=None):
+        info = {
+            "id": self.id, "path": self.path, "status": self.status, "message": self.message,
+            "row_count": self.row_count,
+            "output": self.output, "submitted_at": self.submitted_at,
+            "started_at": self.started_at, "finished_at": self.finished_at,
+        }
+        if pages_done is not None:
+            info["pages_done"] = pages_done
+        if self.finished_at is not None:
+            info["seconds"] = round(self.finished_at - self.submitted_at, 3)
+        return info
+
+
+class ConversionService:
+    """常驻的转换服务：任务由协调线程处理，页面提取在预热的进程池中进行（与批量转换相同）"""
+    def __init__(self, extractor, max_workers=DEFAULT_WORKERS, use_processes=True):
+        self.extractor = extractor
+        self.max_workers = max_workers
+        self.use_processes = use_processes and max_workers > 1
+        self.jobs = {}
+        self.finished_jobs = []
+        # 已结束任务保留的数据行总数
+        self.retained_rows = 0
+        self.lock = threading.Lock()
+        self.executor = None
+        self.process_pool = None
+        self.worker_log_queue = None
+        self.log_forwarder = None
+
+    def start(self):
+        """创建并预热工作进程"""
+        import pdfplumber  # noqa: F401  本进程也要打开PDF读取页数
+
+        self.extractor.is_running = True
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        if self.use_processes:
+            self.process_pool, self.worker_log_queue, self.log_forwarder = \
+                self.extractor.start_process_pool(self.max_workers)
+            warmed = wait([self.process_pool.submit(_warm_worker) for _ in range(self.max_workers)])
+            pids = {future.result() for future in warmed.done}
+            self.extractor.log_queue.put(f"已预热 {len(pids)} 个工作进程")
+
+    def close(self):
+        """停止接收任务，取消排队的任务并关闭工作进程"""
+        self.extractor.is_running = False
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.process_pool is not None:
+            self.extractor.shutdown_process_pool(self.process_pool, self.worker_log_queue, self.log_forwarder)
+            self.process_pool = None
+
+    def submit(self, path, start_page=2, output_format=None, output_dir=None):
+        job = Job(path, start_page, output_format, output_dir)
+        with self.lock:
+            self.jobs[job.id] = job
+        self.executor.submit(self.run_job, job)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def pages_done(self, job):
+        # 按任务记录进度：同一文件的多个任务同时处理时互不影响
+        return self.extractor.file_pages_done.get(job.id) if job.status == JOB_RUNNING else None
+
+    def wait(self, job, timeout):
+        with job.condition:
+            job.condition.wait_for(lambda: job.finished, timeout)
+
+    def run_job(self, job):
+        """提取一个任务的数据行，指定了输出格式时再写出文件"""
+        extractor = self.extractor
+        job.update(status=JOB_RUNNING, started_at=time.time())
+        extractor.file_pages_done[job.id] = 0
+        try:
+            page_results = extractor.iter_pages_with_cache(job.path, job.start_page, self.process_pool)
+            rows = list(extractor.iter_clean_rows(job.path, page_results, progress_key=job.id))
+            if not extractor.is_running:
+                job.update(status=JOB_FAILED, message="服务已停止", finished_at=time.time())
+                return
+            output = None
+            if job.output_format and rows:
+                output_dir = job.output_dir or os.path.dirname(job.path)
+                pdf_name = os.path.splitext(os.path.basename(job.path))[0]
+                output = os.path.join(output_dir, f"{pdf_name}.{job.output_format}")
+                os.makedirs(output_dir, exist_ok=True)
+                extractor.save_rows(iter(rows), COLUMN_NAMES, output, job.output_format)
+            message, _ = extractor.conversion_result(job.path, len(rows))
+            job.update(status=JOB_DONE, message=message, rows=rows, row_count=len(rows), output=output,
+                       finished_at=time.time())
+        except Exception as e:
+            job.update(status=JOB_FAILED, message=f"✗ 处理文件 {os.path.basename(job.path)} 时出错: {str(e)}",
+                       finished_at=time.time())
+        finally:
+            extractor.file_pages_done.pop(job.id, None)
+            self.retire(job)
+
+    def retire(self, job):
+        """记录已结束的任务，超出MAX_FINISHED_JOBS时丢弃最早的；
+        保留的数据行超出MAX_RETAINED_ROWS时，丢弃较早结束的任务的数据行（刚结束的任务总是保留）"""
+        with self.lock:
+            self.finished_jobs.append(job.id)
+            self.retained_rows += len(job.rows or ())
+            while len(self.finished_jobs) > MAX_FINISHED_JOBS:
+                self.drop_rows(self.jobs.pop(self.finished_jobs.pop(0)))
+            for job_id in self.finished_jobs[:-1]:
+                if self.retained_rows <= MAX_RETAINED_ROWS:
+                    break
+                self.drop_rows(self.jobs[job_id])
+
+    def drop_rows(self, job):
+        if job.rows is not None:
+            self.retained_rows -= len(job.rows)
+            job.rows = None
+
+    def health(self):
+        with self.lock:
+            jobs = list(self.jobs.values())
+        counts = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"workers": self.max_workers, "mode": "process" if self.use_processes else "thread", "jobs": counts}
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """任务接口；服务实例由服务器的service属性提供"""
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        # 每个请求都记日志太多，只由服务记录任务本身的日志
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message):
+        self.send_json(status, {"error": message})
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/jobs":
+            self.send_error_json(404, "未知的接口")
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            params = json.loads(self.rfile.read(length) or b"{}")
+            path = params["path"]
+            start_page = int(params.get("start_page", 2))
+        except (ValueError, KeyError, TypeError):
+            self.send_error_json(400, "请求体应为JSON，且包含path")
+            return
+        output_format = params.get("output_format")
+        if output_format is not None and output_format not in OUTPUT_FORMATS:
+            self.send_error_json(400, f"output_format 应为 {', '.join(OUTPUT_FORMATS)} 之一")
+            return
+        if not os.path.isfile(path):
+            self.send_error_json(400, f"文件不存在: {path}")
+            return
+        job = self.service.submit(path, start_page, output_format, params.get("output_dir"))
+        self.send_json(202, {"id": job.id, "status": job.status})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self.send_json(200, self.service.health())
+            return
+        match = JOB_PATH_PATTERN.match(url.path)
+        job = self.service.get(match.group(1)) if match else None
+        if job is None:
+            self.send_error_json(404, "任务不存在" if match else "未知的接口")
+            return
+
+        action = match.group(2)
+        if action is None:
+            try:
+                timeout = min(float(parse_qs(url.query).get("wait", ["0"])[0]), MAX_WAIT_SECONDS)
+            except ValueError:
+                self.send_error_json(400, "wait 应为秒数")
+                return
+            if timeout > 0:
+                self.service.wait(job, timeout)
+            self.send_json(200, job.to_dict(self.service.pages_done(job)))
+        elif action == "/events":
+            self.send_events(job)
+        elif not job.finished:
+            self.send_error_json(409, "任务尚未完成")
+        elif action == "/rows":
+            rows = job.rows
+            if rows is None and job.row_count:
+                self.send_error_json(410, "该任务的数据行已被丢弃（保留的数据行超出上限），请重新提交任务")
+                return
+            self.send_json(200, {"columns": COLUMN_NAMES, "rows": rows or []})
+        else:
+            self.send_output(job)
+
+    def send_events(self, job):
+        """状态或页数变化时推送一行JSON，任务结束后关闭连接"""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        last = None
+        while True:
+            with job.condition:
+                job.condition.wait_for(lambda: job.finished, EVENT_INTERVAL)
+            info = job.to_dict(self.service.pages_done(job))
+            state = (info["status"], info.get("pages_done"))
+            if state != last:
+                last = state
+                try:
+                    self.wfile.write((json.dumps(info, ensure_ascii=False) + "\n").encode('utf-8'))
+                    self.wfile.flush()
+                except OSError:
+                    return
+            if job.finished:
+                return
+
+    def send_output(self, job):
+        if not job.output or not os.path.exists(job.output):
+            self.send_error_json(404, "该任务没有输出文件")
+            return
+        with open(job.output, 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(os.path.basename(job.output))}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """监听Unix套接字的HTTP服务器（只有本机能访问，权限由套接字文件控制）"""
+    daemon_threads = True
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None):
+    """创建HTTP服务器；指定unix_socket时监听Unix套接字，不占用端口"""
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        server = UnixHTTPServer(unix_socket, ServiceRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ServiceRequestHandler)
+        server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    from pdf_cli import ConsoleLog
+
+    parser = argparse.ArgumentParser(description="PDF转Excel本地转换服务（预热的工作进程 + HTTP任务接口）")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"监听地址（默认: {DEFAULT_HOST}）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"监听端口（默认: {DEFAULT_PORT}）")
+    parser.add_argument("--unix-socket", default=None, help="改为监听该Unix套接字文件")
+    parser.add_argument("-j", "--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"工作进程数，也是同时处理的任务数（默认: CPU核心数 {DEFAULT_WORKERS}）")
+    parser.add_argument("--mode", choices=["process", "thread"], default="process",
+                        help="执行模式：多进程或多线程（默认: process）")
+    parser.add_argument("--normalize", action="store_true", help="输出文件追加规范化的日期、金额列")
+    parser.add_argument("--memory-limit", type=float, default=None, help="每个工作进程的内存上限，单位MB")
+    parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help=f"提取后端（默认: {DEFAULT_BACKEND}）")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"结果缓存目录（默认: {DEFAULT_CACHE_DIR}）")
+    parser.add_argument("--cache-size", type=float, default=DEFAULT_CACHE_SIZE_MB,
+                        help=f"结果缓存容量上限，单位MB（默认: {DEFAULT_CACHE_SIZE_MB}）")
+    parser.add_argument("--no-cache", action="store_true", help="不使用结果缓存")
+    args = parser.parse_args(argv)
+
+    log = ConsoleLog()
+    extractor = PDFTableExtractor(log_queue=log)
+    extractor.normalize = args.normalize
+    extractor.memory_limit_mb = args.memory_limit
+    extractor.backend = args.backend
+    extractor.strategy_profiles = StrategyProfiles(args.cache_dir)
+    if not args.no_cache:
+        extractor.result_cache = ResultCache(args.cache_dir, args.cache_size)
+
+    service = ConversionService(extractor, max(1, args.workers), use_processes=args.mode == "process")
+    service.start()
+    server = make_server(service, args.host, args.port, args.unix_socket)
+    log.put(f"转换服务已启动: {args.unix_socket or f'http://{args.host}:{server.server_address[1]}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.unix_socket and os.path.exists(args.unix_socket):
+            os.remove(args.unix_socket)
+    log.put("转换服务已停止")
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
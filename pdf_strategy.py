@@ -0,0 +1,195 @@
+"""提取策略自适应排序：按版面指纹记住哪种策略实际提取出数据，下次优先尝试
+
+同一开发商的成交纪录册各页版面基本一致，几乎每页都由同一种策略提取出数据。
+文档内按最近出数据的策略排序，跨运行按版面指纹持久化；优先策略没有结果时仍走完整级联。
+表格检测和线条检测都依赖页面上的线条：没有任何线条的页上两者必然没有结果，优先策略直接提前尝试；
+有线条的页上先保持默认顺序，排在优先策略前面的这两种策略在本文档中连续SKIP_AFTER_FAILURES页
+没有结果（或该版面上次一页都没有出数据）后才越过它们；越过的第一页及之后每VERIFY_INTERVAL页
+仍走一次完整级联复核，被越过的策略出数据时恢复默认顺序。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from pdf_cache import DEFAULT_CACHE_DIR
+
+# 默认级联顺序：表格检测、线条检测、文本提取
+STRATEGIES = ("table", "lines", "text")
+
+# 依赖页面线条的策略
+EDGE_STRATEGIES = ("table", "lines")
+
+# 识别方法列的文字 → 策略
+STRATEGY_LABELS = {"表格检测策略": "table", "线条检测策略": "lines", "文本提取策略": "text"}
+
+# 识别方法在数据行中的位置
+METHOD_COLUMN = 11
+
+PROFILE_FILE = "strategy_profiles.json"
+
+# 最多保留的版面数，超出时淘汰最久未更新的
+MAX_PROFILES = 1000
+
+# 有线条的页上，排在优先策略前面的策略连续这么多页没有结果后越过
+SKIP_AFTER_FAILURES = 3
+# 越过期间每隔这么多页走一次完整级联复核
+VERIFY_INTERVAL = 10
+
+
+def strategy_order(preferred=None, ruled=True):
+    """优先策略在前，其余按默认级联顺序；页面有线条(ruled)时，依赖线条的策略不能被越过"""
+    if preferred not in STRATEGIES:
+        return STRATEGIES
+    ahead = STRATEGIES[:STRATEGIES.index(preferred)]
+    if ruled and any(strategy in EDGE_STRATEGIES for strategy in ahead):
+        return STRATEGIES
+    return (preferred,) + tuple(strategy for strategy in STRATEGIES if strategy != preferred)
+
+
+def edge_strategies_ahead(preferred):
+    """默认顺序中排在preferred前面、依赖线条的策略"""
+    if preferred not in STRATEGIES:
+        return ()
+    return tuple(strategy for strategy in STRATEGIES[:STRATEGIES.index(preferred)] if strategy in EDGE_STRATEGIES)
+
+
+class StrategyTracker:
+    """一份文档（多进程时为一个分块）内的策略顺序：优先尝试最近出数据的策略，
+    有线条的页上只在排在它前面的策略都已连续没有结果时越过它们（见模块说明）"""
+    def __init__(self, preferred=None, skipped=()):
+        self.preferred = preferred if preferred in STRATEGIES else None
+        # 各策略在出数据的页上连续没有结果的页数；版面记录中被越过的策略直接视为已达到
+        self.failures = {strategy: SKIP_AFTER_FAILURES for strategy in skipped}
+        self.skipped_pages = 0
+
+    def skipping(self):
+        ahead = edge_strategies_ahead(self.preferred)
+        return bool(ahead) and all(self.failures.get(strategy, 0) >= SKIP_AFTER_FAILURES for strategy in ahead)
+
+    def order(self, ruled):
+        """本页的尝试顺序；越过的第一页及之后每VERIFY_INTERVAL页走完整级联"""
+        if ruled and self.skipping():
+            self.skipped_pages += 1
+            if self.skipped_pages % VERIFY_INTERVAL != 1:
+                return strategy_order(self.preferred, ruled=False)
+        return strategy_order(self.preferred, ruled)
+
+    def record(self, order, winner):
+        """记录一页的结果：winner之前尝试过的策略各计一次没有结果；整页没有数据时不计"""
+        if winner not in order:
+            return
+        for strategy in order[:order.index(winner)]:
+            self.failures[strategy] = self.failures.get(strategy, 0) + 1
+        self.failures[winner] = 0
+        self.preferred = winner
+
+    @property
+    def skipped(self):
+        """当前越过的策略"""
+        return edge_strategies_ahead(self.preferred) if self.skipping() else ()
+
+
+def page_strategy(page_data):
+    """根据识别方法列判断该页数据由哪种策略提取，无法判断时返回None"""
+    for row in page_data:
+        if len(row) > METHOD_COLUMN:
+            for label, strategy in STRATEGY_LABELS.items():
+                if str(row[METHOD_COLUMN]).startswith(label):
+                    return strategy
+    return None
+
+
+def layout_fingerprint(pdf, page_number=1, keep_page=False):
+    """版面指纹：生成软件、页面尺寸、是否有表格线及所用字体（取起始页），同一模板的纪录册相同
+
+    keep_page为True时不释放起始页已解析的字符和线条，随后提取该页时直接使用，不再重复解析
+    """
+    metadata = pdf.metadata or {}
+    page = pdf.pages[min(max(page_number, 1), len(pdf.pages)) - 1]
+    try:
+        fonts = sorted({char.get("fontname", "") for char in page.chars})
+        ruled = bool(page.lines or page.rects)
+        size = [round(page.width), round(page.height)]
+    finally:
+        if not keep_page:
+            page.close()
+    payload = json.dumps([str(metadata.get("Producer", "")), str(metadata.get("Creator", "")), size, ruled, fonts],
+                         ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class StrategyProfiles:
+    """各版面指纹的策略统计，保存在缓存目录的JSON文件中"""
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.path = os.path.join(cache_dir, PROFILE_FILE)
+        self.lock = threading.Lock()
+        self.profiles = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                profiles = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return profiles if isinstance(profiles, dict) else {}
+
+    def preferred(self, fingerprint):
+        """该版面上次出数据最多的策略，没有记录时返回None"""
+        profile = self.profiles.get(fingerprint)
+        return profile.get("strategy") if isinstance(profile, dict) else None
+
+    def skipped(self, fingerprint):
+        """该版面上可以直接越过的策略：排在优先策略前面、上次一页都没有出数据，
+        而优先策略至少出了SKIP_AFTER_FAILURES页"""
+        profile = self.profiles.get(fingerprint)
+        if not isinstance(profile, dict) or not isinstance(profile.get("pages"), dict):
+            return ()
+        pages = profile["pages"]
+        ahead = edge_strategies_ahead(profile.get("strategy"))
+        if not ahead or pages.get(profile["strategy"], 0) < SKIP_AFTER_FAILURES or \
+                any(pages.get(strategy, 0) for strategy in ahead):
+            return ()
+        return ahead
+
+    def record(self, fingerprint, strategy_pages):
+        """记录一份文档中各策略出数据的页数，并立即写回文件"""
+        if not strategy_pages:
+            return
+        with self.lock:
+            self.profiles[fingerprint] = {
+                "strategy": max(strategy_pages, key=strategy_pages.get),
+                "pages": strategy_pages,
+                "updated": time.time(),
+            }
+            if len(self.profiles) > MAX_PROFILES:
+                oldest = sorted(self.profiles, key=lambda key: self.profiles[key].get("updated", 0))
+                for key in oldest[:len(self.profiles) - MAX_PROFILES]:
+                    del self.profiles[key]
+            self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.profiles, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # 无法保存时只影响下次运行的初始顺序
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def clear(self):
+        """清空已记录的版面，返回删除的条目数"""
+        with self.lock:
+            removed = len(self.profiles)
+            self.profiles = {}
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        return removed
@@ -0,0 +1,128 @@
+"""行文本分列：一次匹配识别日期、大厦、楼层单位和金额，分配到A–K列
+
+原做法按日期→大厦→楼层单位→金额的顺序逐项搜索，每找到一项就从文本中删去再搜下一项。
+成交纪录的行文本通常就是按列顺序排列的，因此先用一个预编译的整行正则一次匹配，
+直接从命名分组取出各列；只有行首的其余文字中可能含有其他匹配等情况下，
+才退回逐项搜索，两种做法的分列结果完全相同。
+"""
+import re
+
+DATE_REGEX = r'\d{1,2}[/\-\.]\d{1,2}[/\-\.]\d{4}'
+BUILDING_REGEX = r'Tower\s*\d+[A-Z]?'
+UNIT_REGEX = r'(\d+)\s*([A-Z])'
+AMOUNT_REGEX = r'\$[\d,]+\.?\d*|USD\s*[\d,]+\.?\d*|HKD\s*[\d,]+\.?\d*'
+
+DATE_PATTERN = re.compile(DATE_REGEX)
+BUILDING_PATTERN = re.compile(BUILDING_REGEX, re.IGNORECASE)
+UNIT_PATTERN = re.compile(UNIT_REGEX)
+AMOUNT_PATTERN = re.compile(AMOUNT_REGEX)
+REST_SPLIT_PATTERN = re.compile(r'\s{2,}')
+
+# 整行正则：[其余文字] [日期×0–3] 大厦 楼层单位 [[字母前缀]金额] [其余文字]，各项以空白分隔
+ROW_PATTERN = re.compile(
+    r'\s*(?P<lead>(?:\S+\s+)*?)'
+    rf'(?:(?P<date1>{DATE_REGEX})\s+)?'
+    rf'(?:(?P<date2>{DATE_REGEX})\s+)?'
+    rf'(?:(?P<date3>{DATE_REGEX})\s+)?'
+    rf'(?P<building>(?i:{BUILDING_REGEX}))\s+'
+    r'(?P<floor>\d+)\s*(?P<flat>[A-Z])'
+    rf'(?:\s+(?P<prefix>[A-Za-z]*)(?P<amount>{AMOUNT_REGEX})(?=\s|\Z))?'
+)
+ROW_GROUPS = ('lead', 'date1', 'date2', 'date3', 'building', 'floor', 'flat', 'prefix', 'amount')
+# 行首其余文字中若含有任何一项的匹配，逐项搜索会先找到它，此时不能走整行匹配；
+# USD/HKD之后的空白可能在删去中间各项后与后面的数字连成金额，因此只要出现即退回
+LEAD_CONFLICT_PATTERN = re.compile(rf'{DATE_REGEX}|(?i:tower)|\d\s*[A-Z]|\$[\d,]|USD|HKD')
+
+
+def split_row_text(text):
+    """将一行文本分为11列：日期×3、大厦、楼层、单位、车位、金额、其余文本×2、K列"""
+    result = split_by_row_pattern(text)
+    if result is None:
+        result = split_by_stages(text)
+    return result
+
+
+def split_by_row_pattern(text):
+    """整行一次匹配分列；无法保证与逐项搜索结果一致时返回None"""
+    match = ROW_PATTERN.match(text)
+    if match is None:
+        return None
+    lead, date1, date2, date3, building, floor, flat, prefix, amount = match.group(*ROW_GROUPS)
+    if lead and LEAD_CONFLICT_PATTERN.search(lead):
+        return None
+    tail = text[match.end():]
+    # 金额不紧跟在楼层单位之后时，逐项搜索可能在后面的文字中找到金额
+    if amount is None:
+        if AMOUNT_PATTERN.search(tail):
+            return None
+        prefix = amount = ''
+    dates = [date for date in (date1, date2, date3) if date is not None]
+    # 日期不足3个时，金额之后的日期也会被逐项搜索取到
+    if len(dates) < 3:
+        if DATE_PATTERN.search(tail):
+            return None
+        dates.extend([''] * (3 - len(dates)))
+
+    # 删去各项后的剩余文本：行首其余文字与金额前缀、金额之后的文字之间至少隔着两个空白，
+    # 按两个以上空白拆分I、J列时两段各自独立，因此只需保留两段本身
+    lead = lead.strip()
+    tail = (prefix + tail).strip()
+    remaining_text = f"{lead}  {tail}" if lead and tail else lead or tail
+    return dates + [building, floor, flat, '', amount] + split_rest(remaining_text)
+
+
+def split_rest(remaining_text):
+    """剩余文本按两个以上空白分为I、J列，再补K列"""
+    if not remaining_text:
+        return ['', '', '']
+    parts = REST_SPLIT_PATTERN.split(remaining_text)
+    if len(parts) >= 2:
+        return [parts[0], ' '.join(parts[1:]), '']
+    return [remaining_text, '', '']
+
+
+def split_by_stages(text):
+    """逐项搜索分列（原做法）：每识别一项即从文本中删去，再搜索下一项"""
+    result = []
+    remaining_text = text
+
+    # 提取日期信息
+    date_matches = DATE_PATTERN.findall(remaining_text)
+    for date in date_matches[:3]:  # 最多取3个日期
+        result.append(date)
+        remaining_text = remaining_text.replace(date, '', 1)
+
+    # 如果日期不足3个，补充空值
+    while len(result) < 3:
+        result.append('')
+
+    # 提取建筑名称
+    building_match = BUILDING_PATTERN.search(remaining_text)
+    if building_match:
+        result.append(building_match.group(0))
+        remaining_text = remaining_text.replace(building_match.group(0), '', 1)
+    else:
+        result.append('')
+
+    # 提取楼层和单位
+    unit_match = UNIT_PATTERN.search(remaining_text)
+    if unit_match:
+        result.append(unit_match.group(1))  # 楼层
+        result.append(unit_match.group(2))  # 单位
+        remaining_text = remaining_text.replace(unit_match.group(0), '', 1)
+    else:
+        result.extend(['', ''])  # 补充两个空值
+
+    # 车位信息 (G列)
+    result.append('')  # 默认为空
+
+    # 提取金额 (H列)
+    amount_match = AMOUNT_PATTERN.search(remaining_text)
+    if amount_match:
+        result.append(amount_match.group(0))
+        remaining_text = remaining_text.replace(amount_match.group(0), '', 1)
+    else:
+        result.append('')
+
+    # 剩余文本放入I、J列，再补K列
+    return result + split_rest(remaining_text.strip())
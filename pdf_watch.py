@@ -0,0 +1,216 @@
+"""监视文件夹：新增或修改的PDF写完后自动转换，清单记录已处理的文件，只转换有变化的文件
+
+优先使用watchdog的文件系统通知（需安装watchdog），不可用时定时扫描文件夹。
+文件的大小和修改时间在两次检查之间不变、且修改时间已过SETTLE_SECONDS秒，才视为已写完，
+避免转换复制到一半的文件。清单保存在输出文件夹的pdf_manifest.jsonl，每个文件一行：
+路径、大小、修改时间、内容哈希、输出文件；大小和修改时间与清单一致的文件不再读取，
+只有修改时间变化而内容哈希不变的文件（如重新复制）只更新清单，不重新转换。
+"""
+import glob
+import json
+import os
+import threading
+import time
+
+from pdf_cache import file_sha256
+
+MANIFEST_FILE = "pdf_manifest.jsonl"
+
+# 没有文件系统通知时的扫描间隔（秒）
+DEFAULT_POLL_SECONDS = 2.0
+# 有文件系统通知时，仍定期全量扫描一次，防止漏掉通知
+RESCAN_SECONDS = 60.0
+# 修改时间距今不足该秒数的文件视为仍在写入
+SETTLE_SECONDS = 1.0
+# 等待期间检查停止标志的间隔（秒）
+STOP_CHECK_SECONDS = 0.5
+
+
+class Manifest:
+    """已处理文件的清单：追加写的JSONL，同一路径以最后一条为准"""
+    def __init__(self, output_folder):
+        self.path = os.path.join(output_folder, MANIFEST_FILE)
+        self.lock = threading.Lock()
+        self.entries, line_count = self.load()
+        # 同一文件反复更新后旧记录过多时，启动时重写一次
+        if line_count > 2 * len(self.entries) + 100:
+            self.rewrite()
+
+    def load(self):
+        """返回({路径: 记录}, 行数)"""
+        entries = {}
+        line_count = 0
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    line_count += 1
+                    try:
+                        entry = json.loads(line)
+                        entries[entry["path"]] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except OSError:
+            pass
+        return entries, line_count
+
+    def rewrite(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def get(self, pdf_file):
+        return self.entries.get(os.path.abspath(pdf_file))
+
+    def record(self, pdf_file, size, mtime, sha256, output):
+        entry = {"path": os.path.abspath(pdf_file), "size": size, "mtime": mtime, "sha256": sha256,
+                 "output": output, "processed_at": time.time()}
+        with self.lock:
+            self.entries[entry["path"]] = entry
+            try:
+                with open(self.path, 'a', encoding='utf-8', newline='\n') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            except OSError:
+                # 记录失败只影响下次是否重新转换该文件
+                pass
+
+
+class WakeHandler:
+    """watchdog的事件处理器：文件夹中的PDF有变化时唤醒监视循环"""
+    def __init__(self, wake):
+        self.wake = wake
+
+    def dispatch(self, event):
+        paths = [getattr(event, "src_path", ""), getattr(event, "dest_path", "")]
+        if any(isinstance(path, str) and path.lower().endswith(".pdf") for path in paths):
+            self.wake.set()
+
+
+class FolderWatcher:
+    """监视PDF文件夹，有变化的文件写完后调用extractor.batch_convert转换，直到extractor停止"""
+    def __init__(self, extractor, pdf_folder, output_folder, poll_seconds=DEFAULT_POLL_SECONDS,
+                 output_format="xlsx", **convert_options):
+        self.extractor = extractor
+        self.pdf_folder = pdf_folder
+        self.output_folder = output_folder
+        self.poll_seconds = poll_seconds
+        self.output_format = output_format
+        self.convert_options = convert_options
+        self.manifest = None
+        self.wake = threading.Event()
+        # 上次检查时各文件的(大小, 修改时间)
+        self.observed = {}
+        self.unsettled = False
+
+    def start_observer(self):
+        """启动文件系统通知，未安装watchdog或启动失败时返回None"""
+        try:
+            from watchdog.observers import Observer
+        except ImportError:
+            return None
+        observer = Observer()
+        try:
+            observer.schedule(WakeHandler(self.wake), self.pdf_folder, recursive=False)
+            observer.start()
+        except OSError:
+            return None
+        return observer
+
+    def run(self):
+        """监视直到extractor停止；文件夹无效时返回False"""
+        log = self.extractor.log_queue
+        if not os.path.isdir(self.pdf_folder):
+            log.put("错误: PDF文件夹不存在")
+            return False
+        os.makedirs(self.output_folder, exist_ok=True)
+        self.manifest = Manifest(self.output_folder)
+        observer = self.start_observer()
+        if observer is not None:
+            log.put(f"开始监视文件夹（文件系统通知）: {self.pdf_folder}")
+        else:
+            log.put(f"开始监视文件夹（每 {self.poll_seconds:g} 秒扫描一次）: {self.pdf_folder}")
+        try:
+            while self.extractor.is_running:
+                changed = self.changed_files()
+                if changed:
+                    self.convert(changed)
+                self.wait_for_change(observer is not None)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+        log.put("已停止监视文件夹")
+        return True
+
+    def wait_for_change(self, notified):
+        """等待文件夹变化通知或下次扫描；有未写完的文件时SETTLE_SECONDS后再检查"""
+        timeout = RESCAN_SECONDS if notified else self.poll_seconds
+        if self.unsettled:
+            timeout = min(timeout, SETTLE_SECONDS)
+        deadline = time.monotonic() + timeout
+        while self.extractor.is_running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self.wake.wait(min(remaining, STOP_CHECK_SECONDS)):
+                break
+        self.wake.clear()
+
+    def changed_files(self):
+        """返回已写完、与清单不一致的[(路径, 大小, 修改时间)]"""
+        now = time.time()
+        observed = {}
+        changed = []
+        self.unsettled = False
+        for pdf_file in sorted(glob.glob(os.path.join(self.pdf_folder, "*.pdf"))):
+            try:
+                stat = os.stat(pdf_file)
+            except OSError:
+                continue
+            state = (stat.st_size, stat.st_mtime)
+            observed[pdf_file] = state
+            if self.observed.get(pdf_file) != state or now - stat.st_mtime < SETTLE_SECONDS:
+                self.unsettled = True
+                continue
+            entry = self.manifest.get(pdf_file)
+            if entry is not None and (entry["size"], entry["mtime"]) == state:
+                continue
+            changed.append((pdf_file, stat.st_size, stat.st_mtime))
+        self.observed = observed
+        return changed
+
+    def output_file(self, pdf_file):
+        pdf_name = os.path.splitext(os.path.basename(pdf_file))[0]
+        return os.path.join(self.output_folder, f"{pdf_name}.{self.output_format}")
+
+    def convert(self, changed):
+        """转换有变化的文件并更新清单；内容未变且输出仍在的文件只更新清单"""
+        pending = []
+        for pdf_file, size, mtime in changed:
+            try:
+                sha256 = file_sha256(pdf_file)
+            except OSError:
+                continue
+            entry = self.manifest.get(pdf_file)
+            if entry is not None and entry["sha256"] == sha256 and (
+                    entry["output"] is None or os.path.exists(entry["output"])):
+                self.manifest.record(pdf_file, size, mtime, sha256, entry["output"])
+                continue
+            pending.append((pdf_file, size, mtime, sha256))
+        if not pending:
+            return
+
+        self.extractor.log_queue.put(f"检测到 {len(pending)} 个新增或修改的PDF")
+        self.extractor.batch_convert(self.pdf_folder, self.output_folder, output_format=self.output_format,
+                                     pdf_files=[pdf_file for pdf_file, _, _, _ in pending],
+                                     **self.convert_options)
+        for pdf_file, size, mtime, sha256 in pending:
+            success = self.extractor.file_results.get(pdf_file)
+            # 停止时未处理完的文件不记入清单，下次继续；转换失败的文件在再次修改后重试
+            if success is None:
+                continue
+            output = self.output_file(pdf_file)
+            self.manifest.record(pdf_file, size, mtime, sha256,
+                                 os.path.abspath(output) if success and os.path.exists(output) else None)
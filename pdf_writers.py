@@ -0,0 +1,215 @@
+"""逐行输出写入器：数据行边提取边写出，内存占用与行数无关
+
+所有写入器都先写临时文件，close时原子替换为正式文件；没有数据时不生成文件。
+数据行按批写出，启用规范化时每批整列解析日期和金额，追加为类型化的列。
+"""
+import csv
+import os
+import pickle
+import tempfile
+import time
+
+from pdf_normalize import TYPED_COLUMN_NAMES, normalize_rows
+
+SHEET_NAME = '交易资料'
+
+# Excel列宽上限
+MAX_COLUMN_WIDTH = 50
+
+
+class RowWriter:
+    """写入器基类：支持with语句，异常退出时丢弃临时文件"""
+    def __init__(self, output_file, column_names, normalize=False, batch_size=10000):
+        self.output_file = output_file
+        self.normalize = normalize
+        self.column_names = list(column_names) + (TYPED_COLUMN_NAMES if normalize else [])
+        self.tmp_file = output_file + ".part"
+        self.batch_size = batch_size
+        self.pending = []
+        self.row_count = 0
+        # 写出（规范化、序列化、替换文件）累计的墙钟与CPU秒数，不含产出数据行的时间
+        self.write_seconds = 0.0
+        self.write_cpu_seconds = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def write_row(self, row):
+        # 过滤全空行
+        if not any(row):
+            return
+        self.pending.append(row)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write_row(row)
+
+    def flush(self):
+        """写出缓冲的一批数据行（需要时先整批规范化）"""
+        if not self.pending:
+            return
+        started = time.perf_counter(), time.thread_time()
+        rows = normalize_rows(self.pending) if self.normalize else self.pending
+        self.pending = []
+        self.write_batch(rows)
+        self.row_count += len(rows)
+        self.add_write_time(started)
+
+    def add_write_time(self, started):
+        self.write_seconds += time.perf_counter() - started[0]
+        self.write_cpu_seconds += time.thread_time() - started[1]
+
+    def write_batch(self, rows):
+        """写出一批数据行（由子类实现）"""
+        raise NotImplementedError
+
+    def finish(self):
+        """写完临时文件（由子类实现）"""
+        raise NotImplementedError
+
+    def release(self):
+        """不写完，直接关闭打开的资源（由子类实现）"""
+        raise NotImplementedError
+
+    def close(self):
+        """完成写出并替换为正式文件，返回写出的行数"""
+        self.flush()
+        started = time.perf_counter(), time.thread_time()
+        self.finish()
+        if self.row_count:
+            os.replace(self.tmp_file, self.output_file)
+        else:
+            self.remove_tmp()
+        self.add_write_time(started)
+        return self.row_count
+
+    def abort(self):
+        self.release()
+        self.remove_tmp()
+
+    def remove_tmp(self):
+        try:
+            os.remove(self.tmp_file)
+        except OSError:
+            pass
+
+
+class CsvRowWriter(RowWriter):
+    """CSV写入器（带BOM的UTF-8，Excel可直接打开）"""
+    def __init__(self, output_file, column_names, normalize=False):
+        super().__init__(output_file, column_names, normalize)
+        self.file = open(self.tmp_file, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.column_names)
+
+    def write_batch(self, rows):
+        self.writer.writerows(rows)
+
+    def finish(self):
+        if not self.file.closed:
+            self.file.close()
+
+    release = finish
+
+
+class RowSpool:
+    """行缓冲：按批pickle追加到临时文件，写完后按批读回，内存占用与行数无关"""
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.batch = []
+        self.file = tempfile.TemporaryFile()
+        self.row_count = 0
+
+    def append(self, row):
+        self.batch.append(row)
+        self.row_count += 1
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            pickle.dump(self.batch, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+            self.batch = []
+
+    def iter_batches(self):
+        self.flush()
+        self.file.seek(0)
+        while True:
+            try:
+                yield pickle.load(self.file)
+            except EOFError:
+                break
+
+    def __iter__(self):
+        for batch in self.iter_batches():
+            yield from batch
+
+    @property
+    def closed(self):
+        return self.file.closed
+
+    def close(self):
+        self.file.close()
+
+
+class ExcelRowWriter(RowWriter):
+    """xlsx写入器：使用openpyxl的只写(write-only)模式
+
+    只写模式要求列宽在第一行之前设置，因此提取过程中数据行先追加到临时缓冲文件，
+    同时实时统计每列最大长度；close时设置列宽，再把缓冲逐批流式写入工作簿。
+    """
+    def __init__(self, output_file, column_names, normalize=False):
+        super().__init__(output_file, column_names, normalize)
+        self.spool = RowSpool(self.batch_size)
+        self.max_lengths = [len(str(col)) for col in self.column_names]
+
+    def write_batch(self, rows):
+        max_lengths = self.max_lengths
+        for row in rows:
+            self.spool.append(row)
+            for idx, cell in enumerate(row):
+                cell_length = len(str(cell)) if cell is not None else 0
+                if cell_length > max_lengths[idx]:
+                    max_lengths[idx] = cell_length
+
+    def finish(self):
+        if self.spool.closed:
+            return
+        try:
+            if self.row_count:
+                self.write_workbook()
+        finally:
+            self.spool.close()
+
+    def release(self):
+        self.spool.close()
+
+    def write_workbook(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(SHEET_NAME)
+        for idx, max_len in enumerate(self.max_lengths):
+            column_letter = chr(65 + idx) if idx < 26 else f"A{chr(65 + idx - 26)}"
+            worksheet.column_dimensions[column_letter].width = min(max_len + 2, MAX_COLUMN_WIDTH)
+
+        worksheet.append(self.column_names)
+        for row in self.spool:
+            worksheet.append(row)
+        workbook.save(self.tmp_file)
+
+
+def open_row_writer(output_file, column_names, output_format="xlsx", normalize=False):
+    """按输出格式创建写入器，normalize为True时追加规范化后的日期和金额列"""
+    if output_format == "csv":
+        return CsvRowWriter(output_file, column_names, normalize)
+    return ExcelRowWriter(output_file, column_names, normalize)
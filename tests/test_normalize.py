@@ -0,0 +1,34 @@
+"""金额、日期规范化的单元测试：python -m pytest tests"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_normalize import normalize_rows, parse_amounts  # noqa: E402
+
+
+def amounts(values):
+    amount, currency = parse_amounts(values)
+    return [(None if value != value else value, code if isinstance(code, str) else None)
+            for value, code in zip(amount.tolist(), currency.tolist())]
+
+
+def test_prefix_and_suffix_amounts():
+    assert amounts(['HK$1,234,000', 'USD 500,000', '$3.5万', '300万元', '1,234.5美元', '另议']) == [
+        (1234000, 'HKD'), (500000, 'USD'), (35000, 'HKD'), (3000000, 'HKD'), (1234.5, 'USD'), (None, None)]
+
+
+def test_mixed_amounts_take_one_whole_match():
+    # 数值、单位和货币都来自货币符号在前的匹配，不与后面单位在后的写法拼接
+    assert amounts(['$12 (3万美元)', 'US$5 另100万元']) == [(12, 'HKD'), (5, 'USD')]
+
+
+def test_repeated_text_maps_back_to_each_row():
+    assert amounts(['$12 (3万美元)', '300万元', '$12 (3万美元)']) == [(12, 'HKD'), (3000000, 'HKD'), (12, 'HKD')]
+
+
+def test_normalize_rows_appends_typed_columns():
+    row = ['2/1/2020', '2020-01-03', '', 'Tower 1', '5', 'A', '', 'US$5 另100万元', '', '', '']
+    typed = normalize_rows([row])[0][len(row):]
+    assert [str(value) if value is not None else None for value in typed] == \
+        ['2020-01-02', '2020-01-03', None, '5', 'USD']
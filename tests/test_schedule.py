@@ -0,0 +1,58 @@
+"""按页数调度的单元测试：python -m pytest tests"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_schedule import BYTES_PER_PAGE, SCAN_WINDOW, estimate_pages, read_page_count  # noqa: E402
+
+CATALOG = b'1 0 obj\n<< /Type /Catalog /Pages 2 0 R /Outlines 3 0 R >>\nendobj\n'
+PAGE_TREE = b'2 0 obj\n<< /Type /Pages /Kids [4 0 R 5 0 R] /Count 2 >>\nendobj\n'
+OUTLINES = b'3 0 obj\n<< /Type /Outlines /First 6 0 R /Last 6 0 R /Count 50 >>\nendobj\n'
+TRAILER = b'trailer\n<< /Root 1 0 R /Size 7 >>\nstartxref\n0\n%%EOF\n'
+
+
+def write_pdf(tmp_path, *parts):
+    path = tmp_path / "sample.pdf"
+    path.write_bytes(b'%PDF-1.4\n' + b''.join(parts))
+    return str(path)
+
+
+def test_outline_count_is_not_the_page_count(tmp_path):
+    assert read_page_count(write_pdf(tmp_path, CATALOG, PAGE_TREE, OUTLINES, TRAILER)) == 2
+
+
+def test_incremental_update_uses_the_latest_page_tree(tmp_path):
+    update = (b'2 0 obj\n<< /Type /Pages /Kids [4 0 R] /Count 1 >>\nendobj\n'
+              b'trailer\n<< /Root 1 0 R /Size 7 /Prev 0 >>\nstartxref\n0\n%%EOF\n')
+    assert read_page_count(write_pdf(tmp_path, CATALOG, PAGE_TREE, OUTLINES, TRAILER, update)) == 1
+
+
+def test_page_tree_in_the_middle_of_a_large_file(tmp_path):
+    padding = b'%' + b'x' * (3 * SCAN_WINDOW) + b'\n'
+    assert read_page_count(write_pdf(tmp_path, padding, CATALOG, PAGE_TREE, OUTLINES, padding, TRAILER)) == 2
+
+
+def test_object_stream_pdf_falls_back_to_size_quickly(tmp_path):
+    # 目录和页面树都在压缩的对象流中，明文里只有/Root引用：整个文件扫描后按文件大小估算
+    stream = os.urandom(4 * 1024 * 1024)
+    objects = [b'%d 0 obj\n<< /Type /ObjStm /N 100 /First 800 /Length %d >>\nstream\n%s\nendstream\nendobj\n'
+               % (number, len(stream), stream) for number in range(10, 26)]
+    path = write_pdf(tmp_path, *objects, b'30 0 obj\n<< /Type /XRef /Root 1 0 R /Size 31 >>\n'
+                     b'stream\n\nendstream\nendobj\nstartxref\n0\n%%EOF\n')
+    size = os.path.getsize(path)
+
+    tracemalloc.start()
+    started = time.monotonic()
+    try:
+        assert read_page_count(path) is None
+        elapsed = time.monotonic() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # 不复制对象内容或文件片段
+    assert peak < SCAN_WINDOW
+    assert elapsed < 5
+    assert estimate_pages(path) == round(size / BYTES_PER_PAGE)